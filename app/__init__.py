@@ -2,10 +2,11 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 
-from .extensions import db, migrate, csrf, login_manager, mail, oauth
-from .models import User
-from . import admin, inscriptions, orders, portal
+from .extensions import db, migrate, csrf, login_manager, mail, oauth, limiter, metrics
+from . import admin, health, identity, inscriptions, observability, orders, portal, sessions
+from .services import portal as portal_service
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / ".env", override=False)
@@ -15,27 +16,42 @@ def create_app(config_class="config.Config"):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # IP y esquema reales del cliente detrás del balanceador (rate limiting, logs, URLs externas)
+    hops = app.config.get("PROXY_FIX_HOPS", 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
     # Inicializar extensiones
     db.init_app(app)
     migrate.init_app(app, db)
+    # Primero, para medir también las consultas de los demás before_request
+    observability.init_app(app)
+    metrics.init_app(app)
+    # Antes de CSRF y login: el tráfico abusivo se corta sin tocar la base
+    limiter.init_app(app)
     csrf.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
     oauth.init_app(app)
     _register_oauth_clients(app)
 
-    # Cargar usuario
+    sessions.init_app(app)
+    identity.init_app(app)
+    portal_service.init_app(app)
+
+    # Cargar usuario (con perfil de apoderado, vía caché de identidad)
     @login_manager.user_loader
     def load_user(user_id):
         if not user_id:
             return None
         try:
-            return User.query.get(int(user_id))
+            return identity.load_user(int(user_id))
         except (TypeError, ValueError):
             return None
 
     # Registrar blueprints
     from . import routes, auth, admin
+    app.register_blueprint(health.bp)
     app.register_blueprint(routes.bp)
     app.register_blueprint(auth.bp, url_prefix="/auth")
     app.register_blueprint(admin.bp, url_prefix="/admin")
@@ -43,6 +59,9 @@ def create_app(config_class="config.Config"):
     app.register_blueprint(inscriptions.bp)
     app.register_blueprint(orders.bp)
 
+    from .cli import register_commands
+    register_commands(app)
+
     from datetime import datetime, timezone
 
     @app.context_processor
@@ -60,12 +79,22 @@ def _register_oauth_clients(app: Flask) -> None:
     if not client_id or not client_secret:
         return
 
-    oauth.register(
+    google = oauth.register(
         name="google",
         client_id=client_id,
         client_secret=client_secret,
         server_metadata_url=discovery_url,
         client_kwargs={
             "scope": "openid email profile",
+            # OAuth2Session de Authlib solo aplica ``default_timeout`` (token y userinfo)
+            "default_timeout": app.config.get("GOOGLE_HTTP_TIMEOUT", 10),
         },
     )
+
+    # Discovery y JWKS desde caché (y red solo si se pidió warmup) para no pagarlos en el login.
+    from .services import google_oauth
+
+    with app.app_context():
+        google_oauth.prime_client(
+            app, google, allow_network=app.config.get("GOOGLE_OAUTH_WARMUP", False)
+        )
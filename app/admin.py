@@ -1,8 +1,18 @@
 # app/admin.py
-import calendar
 from datetime import date
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from flask_login import login_required, current_user
 from sqlalchemy.orm import joinedload
 
@@ -17,11 +27,17 @@ from .forms import (
     SimpleCSRFForm,
 )
 from .services import admin as admin_service
+from .services import archive as archive_service
 from .services import enrollments as enrollment_service
 from .services import guardians as guardian_service
 from .services import subscriptions as subscription_service
 from .services import orders as order_service
+from .services import exports as export_service
+from .services import ledger as ledger_service
+from .services import diagnostics as diagnostics_service
+from .observability import profiling
 from .models import (
+    ArchivedSubscription,
     Child,
     Order,
     Enrollment,
@@ -33,7 +49,6 @@ from .models import (
     User,
     Subscription,
     SubscriptionStatus,
-    BillingCycle,
     Guardian,
     KnowledgeLevel,
 )
@@ -42,77 +57,6 @@ from .extensions import db
 bp = Blueprint("admin", __name__, template_folder="templates")
 
 
-def _add_months(base_date: date, months: int) -> date:
-    month = base_date.month - 1 + months
-    year = base_date.year + month // 12
-    month = month % 12 + 1
-    day = min(base_date.day, calendar.monthrange(year, month)[1])
-    return date(year, month, day)
-
-
-def _subscription_due_info(subscription: Subscription):
-    if subscription.status != SubscriptionStatus.active:
-        return None
-
-    orders = sorted(subscription.orders, key=lambda o: o.created_at, reverse=True)
-    pending_like = next(
-        (
-            order
-            for order in orders
-            if order.payment_status in {PaymentStatus.pending, PaymentStatus.reserved}
-        ),
-        None,
-    )
-    if pending_like:
-        return None
-
-    today = date.today()
-    cycle_months = 1 if subscription.billing_cycle == BillingCycle.monthly else 3
-    last_paid = next(
-        (order for order in orders if order.payment_status == PaymentStatus.paid), None
-    )
-
-    if last_paid:
-        due_date = _add_months(last_paid.created_at.date(), cycle_months)
-        if due_date > today:
-            return None
-        recommended_method = last_paid.payment_method
-        last_order = last_paid
-        reason = (
-            f"Última orden pagada el {last_paid.created_at.strftime('%d-%m-%Y')}"
-        )
-    elif orders:
-        last_order = orders[0]
-        due_date = last_order.created_at.date()
-        if due_date > today:
-            return None
-        recommended_method = last_order.payment_method
-        reason = (
-            f"Última orden {last_order.payment_status.value.lower()} el "
-            f"{last_order.created_at.strftime('%d-%m-%Y')}"
-        )
-    else:
-        due_date = subscription.start_date or today
-        if due_date > today:
-            return None
-        last_order = None
-        recommended_method = PaymentMethod.transfer
-        reason = "La suscripción no tiene órdenes registradas."
-
-    days_overdue = max(0, (today - due_date).days)
-    amount = order_service.calculate_subscription_amount(subscription)
-
-    return {
-        "subscription": subscription,
-        "due_date": due_date,
-        "days_overdue": days_overdue,
-        "recommended_method": recommended_method,
-        "amount_clp": amount,
-        "last_order": last_order,
-        "reason": reason,
-    }
-
-
 @bp.before_request
 def ensure_admin_permissions():
     if not current_user.is_authenticated:
@@ -144,22 +88,7 @@ def dashboard_payments():
     pending_orders = Order.query.filter_by(payment_status=PaymentStatus.pending).all()
     paid_orders = Order.query.filter_by(payment_status=PaymentStatus.paid).all()
 
-    active_subscriptions = (
-        Subscription.query.options(
-            joinedload(Subscription.guardian).joinedload(Guardian.user),
-            joinedload(Subscription.plan),
-            joinedload(Subscription.orders),
-        )
-        .filter(Subscription.status == SubscriptionStatus.active)
-        .all()
-    )
-    subscriptions_due = []
-    for subscription in active_subscriptions:
-        info = _subscription_due_info(subscription)
-        if info is not None:
-            subscriptions_due.append(info)
-
-    subscriptions_due.sort(key=lambda item: (item["due_date"], item["subscription"].id))
+    subscriptions_due = order_service.subscriptions_due()
 
     return render_template(
         "admin/dashboard_payments.html",
@@ -168,6 +97,8 @@ def dashboard_payments():
         new_children=new_children,
         last_login=last_login,
         subscriptions_due=subscriptions_due,
+        PaymentStatus=PaymentStatus,
+        PaymentMethod=PaymentMethod,
     )
 
 
@@ -184,7 +115,10 @@ def issue_subscription_order(subscription_id):
         .first()
     )
     if subscription is None:
-        abort(404)
+        if db.session.get(ArchivedSubscription, subscription_id) is None:
+            abort(404)
+        flash("La suscripción está archivada: no se pueden emitir órdenes.", "warning")
+        return redirect(request.referrer or url_for("admin.dashboard_payments"))
 
     if subscription.status != SubscriptionStatus.active:
         flash("La suscripción debe estar activa para emitir una nueva orden.", "warning")
@@ -202,7 +136,7 @@ def issue_subscription_order(subscription_id):
         flash("La suscripción ya tiene una orden pendiente o reservada.", "info")
         return redirect(request.referrer or url_for("admin.dashboard_payments"))
 
-    info = _subscription_due_info(subscription)
+    info = order_service.subscription_due_info(subscription)
     if info is None:
         flash("La suscripción aún no requiere una nueva orden de pago.", "info")
         return redirect(request.referrer or url_for("admin.dashboard_payments"))
@@ -221,6 +155,82 @@ def issue_subscription_order(subscription_id):
     return redirect(url_for("admin.dashboard_payments"))
 
 
+@bp.route("/dashboard/pagos/exportar")
+@login_required
+def export_orders():
+    try:
+        date_from = date.fromisoformat(request.args["desde"]) if request.args.get("desde") else None
+        date_to = date.fromisoformat(request.args["hasta"]) if request.args.get("hasta") else None
+        statuses = [PaymentStatus[name] for name in request.args.getlist("estado") if name]
+        methods = [PaymentMethod[name] for name in request.args.getlist("metodo") if name]
+    except (KeyError, ValueError):
+        abort(400)
+
+    rows = export_service.iter_order_rows(date_from, date_to, statuses, methods)
+    period = f"{date_from or 'inicio'}_{date_to or date.today()}"
+    if request.args.get("formato") == "jsonl":
+        body = export_service.iter_jsonl_gzip(rows)
+        mimetype = "application/gzip"
+        filename = f"ordenes_{period}.jsonl.gz"
+    else:
+        body = export_service.iter_csv(rows)
+        mimetype = "text/csv"
+        filename = f"ordenes_{period}.csv"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# --- Ingresos ---
+@bp.route("/dashboard/ingresos")
+@login_required
+def dashboard_revenue():
+    granularity = request.args.get("granularidad", "month")
+    if granularity not in ledger_service.GRANULARITIES:
+        abort(400)
+    today = date.today()
+    if granularity == "month":
+        start = subscription_service.add_months(today, -11).replace(day=1)
+    else:
+        start = date.fromordinal(today.toordinal() - 29)
+    series = ledger_service.revenue_series(granularity, start, today)
+    max_total = max((item["total_clp"] for item in series), default=0)
+    return render_template(
+        "admin/dashboard_revenue.html",
+        series=series,
+        granularity=granularity,
+        max_total=max_total,
+        PaymentMethod=PaymentMethod,
+    )
+
+
+# --- Perfiles de solicitudes lentas ---
+@bp.route("/dashboard/perfiles")
+@login_required
+def dashboard_profiles():
+    profiles = profiling.list_profiles(current_app, limit=request.args.get("limite", 50, type=int))
+    return render_template(
+        "admin/dashboard_profiles.html",
+        profiles=profiles,
+        threshold_ms=current_app.config.get("PROFILER_THRESHOLD_MS", 1000),
+        sampling_enabled=current_app.config.get("PROFILER_ENABLED", False),
+        header_name=current_app.config.get("PROFILER_HEADER", "X-Profile"),
+    )
+
+
+# --- Diagnóstico de la base de datos ---
+@bp.route("/dashboard/diagnostico")
+@login_required
+def dashboard_diagnostics():
+    return render_template(
+        "admin/dashboard_diagnostics.html",
+        pool=diagnostics_service.pool_status(),
+    )
+
+
 # --- Suscripciones ---
 @bp.route("/dashboard/subscriptions")
 @login_required
@@ -242,6 +252,21 @@ def dashboard_subscriptions():
     )
 
 
+def _render_archived_subscription(subscription_id):
+    """Vista de solo lectura para enlaces antiguos a una suscripción ya archivada (o 404)."""
+    archived = ArchivedSubscription.query.options(
+        joinedload(ArchivedSubscription.guardian).joinedload(Guardian.user),
+        joinedload(ArchivedSubscription.plan),
+    ).filter_by(id=subscription_id).first()
+    if archived is None:
+        abort(404)
+    return render_template(
+        "admin/subscription_archived.html",
+        subscription=archived,
+        history=archive_service.subscription_history(archived.id),
+    )
+
+
 @bp.route("/dashboard/subscriptions/<int:subscription_id>", methods=["GET", "POST"])
 @login_required
 def subscription_detail(subscription_id):
@@ -257,7 +282,10 @@ def subscription_detail(subscription_id):
         .first()
     )
     if subscription is None:
-        abort(404)
+        if request.method == "POST" and db.session.get(ArchivedSubscription, subscription_id) is not None:
+            flash("La suscripción está archivada y no admite cambios.", "warning")
+            return redirect(url_for("admin.subscription_detail", subscription_id=subscription_id))
+        return _render_archived_subscription(subscription_id)
 
     guardian = subscription.guardian
     workshops = (
@@ -476,10 +504,15 @@ def subscription_detail(subscription_id):
             flash("No se pudo reactivar la suscripción.", "warning")
 
     pending_orders_count = Order.query.filter_by(payment_status=PaymentStatus.pending).count()
+    # El historial archivado solo se consulta a pedido (?historial=1)
+    show_history = request.args.get("historial") == "1"
+    history = archive_service.subscription_history(subscription.id) if show_history else None
 
     return render_template(
         "admin/subscription_detail.html",
         subscription=subscription,
+        show_history=show_history,
+        history=history,
         guardian_form=guardian_form,
         child_forms=child_forms,
         delete_child_forms=delete_child_forms,
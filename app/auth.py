@@ -1,6 +1,5 @@
 # app/auth.py
 import os
-import secrets
 from urllib.parse import urlparse
 
 from flask import (
@@ -14,6 +13,7 @@ from flask import (
     session,
 )
 from flask_login import login_user, logout_user, login_required
+from sqlalchemy import func, or_, select
 
 try:  # pragma: no cover - dependencia opcional
     from authlib.integrations.base_client.errors import OAuthError
@@ -23,9 +23,12 @@ except ModuleNotFoundError:  # pragma: no cover - fallback cuando Authlib no est
         """Excepción base para errores de OAuth cuando Authlib no está instalado."""
 
         pass
-from .models import User
+from .models import User, make_unusable_password, normalize_email
 from datetime import datetime, timezone
+from . import identity
 from .extensions import db, oauth
+from .services import google_oauth
+from .services.upserts import upsert
 
 bp = Blueprint("auth", __name__, template_folder="templates")
 
@@ -45,17 +48,68 @@ def _allow_insecure_transport_if_needed() -> None:
         os.environ.setdefault("OAUTHLIB_INSECURE_TRANSPORT", "1")
 
 
-def _finalize_login(user: User) -> None:
-    user.previous_login_at = user.last_login_at
-    user.last_login_at = datetime.now(timezone.utc)
-    db.session.commit()
-    login_user(user)
+def _upsert_google_user(userinfo: dict, email: str) -> User:
+    """
+    Crea o actualiza el usuario de Google y registra el login, sin hacer commit.
+
+    Busca por ``google_sub`` o por correo normalizado; si no existe, inserta con un upsert
+    nativo sobre ``email`` para que dos primeros logins simultáneos no choquen.
+    """
+    now = datetime.now(timezone.utc)
+    sub = userinfo.get("sub")
+    name = userinfo.get("name")
+
+    match_email = func.lower(User.email) == email
+    criteria = or_(User.google_sub == sub, match_email) if sub else match_email
+    candidates = User.query.filter(criteria).limit(2).all()
+    user = next((u for u in candidates if sub and u.google_sub == sub), None) or next(
+        iter(candidates), None
+    )
+
+    if user is not None:
+        user.google_sub = sub or user.google_sub
+        user.name = name or user.name
+        user.email_confirmed_at = user.email_confirmed_at or now
+        user.activate()
+        user.previous_login_at = user.last_login_at
+        user.last_login_at = now
+        return user
+
+    users = User.__table__
+    upsert(
+        users,
+        values={
+            "email": email,
+            "name": name or email,
+            "google_sub": sub,
+            "password_hash": make_unusable_password(),
+            "is_active": True,
+            "email_confirmed_at": now,
+            "last_login_at": now,
+        },
+        conflict_columns=["email"],
+        # En MySQL el orden importa: previous_login_at debe leer el last_login_at anterior.
+        update_values={
+            "google_sub": func.coalesce(sub, users.c.google_sub),
+            "name": func.coalesce(name, users.c.name),
+            "is_active": True,
+            "email_confirmed_at": func.coalesce(users.c.email_confirmed_at, now),
+            "previous_login_at": users.c.last_login_at,
+            "last_login_at": now,
+            "updated_at": now,
+        },
+    )
+    user = db.session.execute(select(User).where(User.email == email)).scalar_one()
+    identity.invalidate(user.id)
+    return user
 
 
 def _get_google_client():
     google = oauth.create_client("google")
     if google is None:
         current_app.logger.error("No se pudo crear el cliente de Google OAuth.")
+        return None
+    google_oauth.ensure_fresh(current_app, google)
     return google
 
 @bp.route("/login", methods=["GET", "POST"])
@@ -171,36 +225,15 @@ def google_callback():
         flash("No pudimos obtener tus datos de Google.", "danger")
         return redirect(url_for("auth.login"))
 
-    email = userinfo["email"]
+    email = normalize_email(userinfo["email"])
     if not userinfo.get("email_verified", True):
         flash("Tu correo de Google no está verificado.", "warning")
         return redirect(url_for("auth.login"))
 
-    user = User.query.filter_by(email=email).first()
-    if user:
-        user.google_sub = userinfo.get("sub")
-        user.name = userinfo.get("name") or user.name
-        user.email_confirmed_at = user.email_confirmed_at or datetime.now(timezone.utc)
-        user.activate()
-        db.session.commit()
-    else:
-        user = User(
-            email=email,
-            name=userinfo.get("name") or email,
-            google_sub=userinfo.get("sub"),
-            _is_active=True,
-        )
-        user.set_password(secrets.token_urlsafe(32))
-        user.activate()
-        user.email_confirmed_at = datetime.now(timezone.utc)
-        db.session.add(user)
-
-    if not user.id:
-        db.session.flush()
-        db.session.commit()
-
     try:
-        _finalize_login(user)
+        user = _upsert_google_user(userinfo, email)
+        db.session.commit()  # ✅ único commit del login
+        login_user(user)
     except Exception as exc:
         current_app.logger.error("Error guardando sesión Google para %s: %s", email, exc, exc_info=True)
         db.session.rollback()
@@ -0,0 +1,223 @@
+# app/cli.py
+from datetime import timedelta
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+
+
+@click.command("webpay-reconcile")
+@click.option("--older-than", type=int, default=None,
+              help="Minutos sin actividad para considerar abandonada una orden.")
+@click.option("--workers", type=int, default=None, help="Consultas simultáneas a Transbank.")
+@click.option("--batch-size", type=int, default=None, help="Órdenes por commit.")
+@click.option("--limit", type=int, default=None, help="Máximo de órdenes a revisar.")
+@click.option("--dry-run", is_flag=True, help="Solo informa, no modifica órdenes.")
+@with_appcontext
+def webpay_reconcile_command(older_than, workers, batch_size, limit, dry_run):
+    """Reconcilia órdenes Webpay pendientes consultando su estado en Transbank."""
+    from .services import reconciliation
+
+    config = current_app.config
+    report = reconciliation.reconcile_stale_webpay_orders(
+        timedelta(minutes=older_than or config.get("WEBPAY_RECONCILE_AFTER_MINUTES", 30)),
+        max_workers=workers or config.get("WEBPAY_RECONCILE_WORKERS", 8),
+        batch_size=batch_size or config.get("WEBPAY_RECONCILE_BATCH_SIZE", 100),
+        limit=limit,
+        dry_run=dry_run,
+    )
+
+    prefix = "[dry-run] " if dry_run else ""
+    click.echo(f"{prefix}Órdenes revisadas: {report['checked']}")
+    click.echo(f"{prefix}Pagadas: {len(report['paid'])} {report['paid'] or ''}")
+    click.echo(f"{prefix}Fallidas: {len(report['failed'])} {report['failed'] or ''}")
+    click.echo(f"{prefix}Sin cambios: {len(report['unchanged'])}")
+    for order_id, error in report["errors"]:
+        click.echo(f"{prefix}Error en orden #{order_id}: {error}", err=True)
+
+
+@click.command("revenue-rebuild")
+@click.option("--backfill", is_flag=True,
+              help="Registra primero un evento para órdenes pagadas sin historial.")
+@with_appcontext
+def revenue_rebuild_command(backfill):
+    """Recalcula los acumulados de ingresos desde el libro de pagos."""
+    from .extensions import db
+    from .services import ledger
+
+    if backfill:
+        click.echo(f"Eventos agregados: {ledger.backfill_paid_orders()}")
+    click.echo(f"Acumulados recalculados: {ledger.rebuild_rollups()}")
+    db.session.commit()
+
+
+@click.command("google-warmup")
+@with_appcontext
+def google_warmup_command():
+    """Descarga discovery y JWKS de Google al caché en disco (útil en el deploy)."""
+    from .extensions import oauth
+    from .services import google_oauth
+
+    google = oauth.create_client("google")
+    if google is None:
+        raise click.ClickException("Google OAuth no está configurado.")
+    if not google_oauth.prime_client(current_app, google):
+        raise click.ClickException("No se pudieron obtener los metadatos de Google.")
+    click.echo("Metadatos de Google OAuth en caché.")
+
+
+@click.command("sessions-sweep")
+@with_appcontext
+def sessions_sweep_command():
+    """Elimina las sesiones vencidas del almacén del lado del servidor."""
+    from .sessions import ServerSideSessionInterface
+
+    interface = current_app.session_interface
+    if not isinstance(interface, ServerSideSessionInterface):
+        raise click.ClickException("SESSION_BACKEND es 'cookie': no hay sesiones que limpiar.")
+    click.echo(f"Sesiones eliminadas: {interface.store.sweep()}")
+
+
+@click.command("outbox-drain")
+@click.option("--batch-size", type=int, default=None, help="Correos reclamados por lote.")
+@click.option("--loop", is_flag=True, help="Sigue esperando correos nuevos en vez de terminar.")
+@click.option("--interval", type=float, default=None, help="Segundos entre revisiones con --loop.")
+@with_appcontext
+def outbox_drain_command(batch_size, loop, interval):
+    """Envía los correos pendientes del outbox sobre una sola conexión SMTP."""
+    import time
+
+    from .services import outbox
+
+    config = current_app.config
+    while True:
+        counts = outbox.drain(
+            batch_size=batch_size or config.get("OUTBOX_BATCH_SIZE", 50),
+            lease_seconds=config.get("OUTBOX_LEASE_SECONDS", 300),
+            max_attempts=config.get("OUTBOX_MAX_ATTEMPTS", 5),
+            backoff=config.get("OUTBOX_RETRY_BACKOFF", 60),
+        )
+        if any(counts.values()) or not loop:
+            click.echo(
+                f"Enviados: {counts['sent']} · Reintentos: {counts['retried']} · Fallidos: {counts['failed']}"
+            )
+        if not loop:
+            return
+        time.sleep(interval or config.get("OUTBOX_POLL_INTERVAL", 5))
+
+
+@click.command("payment-reminders")
+@click.option("--dry-run", is_flag=True, help="Solo informa a quién se enviaría.")
+@click.option("--limit", type=int, default=None, help="Máximo de recordatorios a enviar.")
+@click.option("--rate", type=int, default=None, help="Recordatorios por minuto (0 = sin límite).")
+@click.option("--dedupe-days", type=int, default=None, help="No repetir a quien se recordó en estos días.")
+@with_appcontext
+def payment_reminders_command(dry_run, limit, rate, dedupe_days):
+    """Envía recordatorios de pago a los apoderados con suscripciones vencidas."""
+    from .services import reminders
+
+    report = reminders.send_payment_reminders(
+        dry_run=dry_run,
+        limit=limit,
+        per_minute=rate,
+        dedupe_days=dedupe_days,
+        progress=lambda recipient: click.echo(f"Enviado: {recipient}"),
+    )
+
+    prefix = "[dry-run] " if dry_run else ""
+    click.echo(f"{prefix}Apoderados con pagos vencidos: {report['due_guardians']}")
+    click.echo(f"{prefix}Omitidos (recordados recientemente): {len(report['skipped_recent'])}")
+    if dry_run:
+        for item in report["to_send"]:
+            amount = f"${item['total_clp']:,}".replace(",", ".")
+            click.echo(f"{prefix}{item['recipient']}: {item['subscriptions']} suscripción(es), {amount}")
+    click.echo(f"{prefix}Enviados: {report['sent']} de {len(report['to_send'])}")
+    for recipient, error in report["errors"]:
+        click.echo(f"{prefix}Error con {recipient}: {error}", err=True)
+    if report["interrupted"]:
+        raise click.ClickException(
+            "Envío interrumpido por un error transitorio del servidor SMTP; vuelve a ejecutar el "
+            "comando más tarde (los ya recordados se omiten)."
+        )
+
+
+@click.command("archive")
+@click.option("--retention-days", type=int, default=None,
+              help="Días desde el último cambio para archivar (por defecto ARCHIVE_RETENTION_DAYS).")
+@click.option("--chunk-size", type=int, default=None, help="Filas movidas por transacción.")
+@click.option("--dry-run", is_flag=True, help="Solo informa cuántas filas se moverían.")
+@with_appcontext
+def archive_command(retention_days, chunk_size, dry_run):
+    """Mueve suscripciones canceladas, órdenes pagadas y matrículas cerradas antiguas al archivo."""
+    from .services import archive
+
+    config = current_app.config
+    counts = archive.archive(
+        retention_days=retention_days if retention_days is not None else config.get("ARCHIVE_RETENTION_DAYS", 730),
+        chunk_size=chunk_size or config.get("ARCHIVE_CHUNK_SIZE", 500),
+        dry_run=dry_run,
+    )
+
+    prefix = "[dry-run] " if dry_run else ""
+    click.echo(
+        f"{prefix}Archivadas: {counts['subscriptions']} suscripciones · {counts['orders']} órdenes · "
+        f"{counts['enrollments']} matrículas"
+    )
+
+
+@click.command("profiler-token")
+@click.argument("email")
+@with_appcontext
+def profiler_token_command(email):
+    """Genera el token del encabezado de perfilado para un administrador."""
+    from .extensions import db
+    from .models import User, normalize_email
+    from .observability import profiling
+
+    user = db.session.execute(
+        db.select(User).where(User.email == normalize_email(email))
+    ).scalar_one_or_none()
+    if user is None or not user.is_admin:
+        raise click.ClickException("El correo no corresponde a un administrador.")
+    header = current_app.config.get("PROFILER_HEADER", "X-Profile")
+    click.echo(f"{header}: {profiling.make_token(current_app, user.id)}")
+
+
+@click.command("snapshot-load")
+@click.argument("source_url", envvar="SNAPSHOT_SOURCE_URL")
+@click.option("--output", type=click.Path(dir_okay=False), default=None,
+              help="Archivo SQLite de destino (por defecto instance/snapshot.db).")
+@click.option("--chunk-size", type=int, default=5000, help="Filas por bloque leído e insertado.")
+@click.option("--table", "tables", multiple=True, help="Copia solo estas tablas (repetible).")
+@with_appcontext
+def snapshot_load_command(source_url, output, chunk_size, tables):
+    """Copia una base (p. ej. producción) a SQLite local con datos personales seudonimizados."""
+    import os
+
+    from .services import snapshot
+
+    output = output or os.path.join(current_app.instance_path, "snapshot.db")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    key = current_app.config.get("SNAPSHOT_PSEUDONYM_KEY") or current_app.config["SECRET_KEY"]
+
+    def _progress(table, total):
+        click.echo(f"  {table}: {total} filas", err=True)
+
+    copied = snapshot.copy_snapshot(
+        source_url, output, key=key, chunk_size=chunk_size, tables=tables or None, progress=_progress
+    )
+    for table, total in copied.items():
+        click.echo(f"{table}: {total}")
+    click.echo(f"Snapshot escrito en {output}")
+
+
+def register_commands(app: Flask) -> None:
+    app.cli.add_command(webpay_reconcile_command)
+    app.cli.add_command(revenue_rebuild_command)
+    app.cli.add_command(google_warmup_command)
+    app.cli.add_command(sessions_sweep_command)
+    app.cli.add_command(outbox_drain_command)
+    app.cli.add_command(payment_reminders_command)
+    app.cli.add_command(archive_command)
+    app.cli.add_command(profiler_token_command)
+    app.cli.add_command(snapshot_load_command)
@@ -4,6 +4,9 @@ from flask_wtf.csrf import CSRFProtect
 from flask_login import LoginManager
 from flask_mail import Mail
 
+from .observability.metrics import Metrics
+from .ratelimit import RateLimiter
+
 try:  # pragma: no cover - dependencia opcional
     from authlib.integrations.flask_client import OAuth
 except ModuleNotFoundError:  # pragma: no cover - fallback para entornos sin Authlib
@@ -43,4 +46,6 @@ csrf = CSRFProtect()
 login_manager = LoginManager()
 login_manager.login_view = "auth.login"
 mail = Mail()
-oauth = OAuth()
\ No newline at end of file
+oauth = OAuth()
+limiter = RateLimiter()
+metrics = Metrics()
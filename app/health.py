@@ -0,0 +1,18 @@
+# app/health.py
+from flask import Blueprint, current_app
+
+from .services import health as health_service
+
+bp = Blueprint("health", __name__)
+
+
+@bp.route("/healthz")
+def healthz():
+    """El proceso responde; sin E/S."""
+    return {"status": "ok"}
+
+
+@bp.route("/readyz")
+def readyz():
+    report = health_service.readiness(current_app._get_current_object())
+    return report, 200 if report["ready"] else 503, {"Cache-Control": "no-store"}
@@ -0,0 +1,76 @@
+# app/identity.py
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached
+
+from .cache import TTLCache
+from .extensions import db
+from .models import Guardian, User
+
+_EXTENSION_KEY = "identity_cache"
+
+
+def _columns(instance) -> dict:
+    return {attr.key: getattr(instance, attr.key) for attr in instance.__mapper__.column_attrs}
+
+
+def _cache_entry(user: User) -> tuple[dict, dict | None]:
+    guardian = user.guardian_profile
+    return _columns(user), (_columns(guardian) if guardian is not None else None)
+
+
+def _rebuild_detached(entry: tuple[dict, dict | None]) -> User:
+    """Reconstruye un User desacoplado (con su perfil) a partir de los valores cacheados."""
+    user_values, guardian_values = entry
+    user = User(**user_values)
+    user.guardian_profile = Guardian(**guardian_values) if guardian_values is not None else None
+    # Ambos quedan como recién cargados: sin historial pendiente y con su identity key.
+    if user.guardian_profile is not None:
+        make_transient_to_detached(user.guardian_profile)
+    make_transient_to_detached(user)
+    return user
+
+
+def get_cache() -> TTLCache | None:
+    return current_app.extensions.get(_EXTENSION_KEY)
+
+
+def invalidate(user_id) -> None:
+    cache = get_cache() if has_app_context() else None
+    if cache is not None and user_id is not None:
+        cache.delete(int(user_id))
+
+
+def load_user(user_id: int) -> User | None:
+    """
+    Carga el usuario con ``guardian_profile`` en una sola consulta. Con caché activa, los
+    accesos repetidos dentro del TTL se resuelven sin ir a la base de datos.
+    """
+    cache = get_cache()
+    entry = cache.get(user_id) if cache is not None else None
+    if entry is not None:
+        # merge(load=False) adjunta la copia a la sesión actual sin emitir SELECT.
+        return db.session.merge(_rebuild_detached(entry), load=False)
+
+    user = db.session.execute(
+        select(User).options(joinedload(User.guardian_profile)).where(User.id == user_id)
+    ).scalar_one_or_none()
+    if user is not None and cache is not None:
+        cache.set(user_id, _cache_entry(user))
+    return user
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_identities(session, _flush_context):
+    if not has_app_context() or get_cache() is None:
+        return
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, User):
+            invalidate(instance.id)
+        elif isinstance(instance, Guardian):
+            invalidate(instance.user_id or (instance.user.id if instance.user else None))
+
+
+def init_app(app: Flask) -> None:
+    ttl = app.config.get("IDENTITY_CACHE_TTL", 30)
+    app.extensions[_EXTENSION_KEY] = TTLCache(ttl, app.config.get("IDENTITY_CACHE_SIZE", 2048)) if ttl else None
@@ -16,6 +16,7 @@ from .services import guardians as guardian_service
 from .services import subscriptions as subscription_service
 from .services import enrollments as enrollment_service
 from .services import orders as order_service
+from .services import outbox as outbox_service
 from sqlalchemy.exc import SQLAlchemyError
 
 bp = Blueprint("inscriptions", __name__, template_folder="templates")
@@ -114,6 +115,8 @@ def inscripcion(plan_id):
 
             order = order_service.create_order(subscription, amount, method)
             subscription.reglamento_accepted_at = datetime.now(timezone.utc)
+            # Mismo commit: el correo existe solo si la inscripción quedó guardada
+            outbox_service.enqueue_inscription_confirmation(order)
 
             db.session.commit()  # ✅ commit antes de redirigir
 
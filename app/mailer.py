@@ -0,0 +1,63 @@
+# app/mailer.py
+import smtplib
+
+from flask import Flask, current_app
+from flask_mail import BadHeaderError, Connection
+
+# Errores posibles al enviar un mensaje (AssertionError: Flask-Mail sin destinatario o remitente).
+SEND_ERRORS = (smtplib.SMTPException, OSError, BadHeaderError, AssertionError)
+
+
+def is_permanent(exc: BaseException) -> bool:
+    """
+    Rechazo definitivo (reintentar no cambia el resultado): respuestas 5xx y mensajes mal
+    formados. Los 4xx (p. ej. el 421 de Gmail por exceso de envíos), las caídas de conexión y
+    la autenticación fallida (configuración, afecta a todos) se reintentan.
+    """
+    if isinstance(exc, (BadHeaderError, AssertionError)):
+        return True
+    if isinstance(exc, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code >= 500
+    return False
+
+
+class TimeoutConnection(Connection):
+    """``flask_mail.Connection`` con timeout de socket (sin él, un SMTP colgado bloquea para siempre)."""
+
+    def __init__(self, mail, timeout: float):
+        super().__init__(mail)
+        self.timeout = timeout
+
+    def configure_host(self):
+        mail = self.mail
+        smtp_class = smtplib.SMTP_SSL if mail.use_ssl else smtplib.SMTP
+        host = smtp_class(mail.server, mail.port, timeout=self.timeout)
+        host.set_debuglevel(int(mail.debug))
+        if mail.use_tls:
+            host.starttls()
+        if mail.username and mail.password:
+            host.login(mail.username, mail.password)
+        return host
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.host is None:
+            return
+        try:
+            self.host.quit()
+        except (smtplib.SMTPException, OSError):
+            self.host.close()
+        self.host = None
+
+
+def connect(app: Flask | None = None) -> TimeoutConnection:
+    """Conexión SMTP (sin abrir: usar como context manager) con ``MAIL_TIMEOUT``."""
+    app = app or current_app
+    return TimeoutConnection(app.extensions["mail"], app.config.get("MAIL_TIMEOUT", 30))
+
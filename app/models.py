@@ -1,10 +1,40 @@
 # app/models.py
 import enum
+import json
+import secrets
 from datetime import datetime, date, timezone
+from functools import lru_cache
 from .extensions import db
+from flask import current_app, has_app_context
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 
+# Prefijo de contraseñas inutilizables (cuentas solo OAuth): no es un hash válido de Werkzeug.
+UNUSABLE_PASSWORD_PREFIX = "!"
+DEFAULT_PASSWORD_HASH_METHOD = "scrypt"
+
+
+def normalize_email(email: str | None) -> str | None:
+    return email.strip().lower() if email else email
+
+
+def make_unusable_password() -> str:
+    return UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(16)
+
+
+def password_hash_method() -> str:
+    """Método de hash configurado (``PASSWORD_HASH_METHOD``), p. ej. ``scrypt`` o ``pbkdf2:sha256:600000``."""
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD") or DEFAULT_PASSWORD_HASH_METHOD
+    return DEFAULT_PASSWORD_HASH_METHOD
+
+
+@lru_cache(maxsize=8)
+def _canonical_hash_method(method: str) -> str:
+    """Forma completa del método tal como Werkzeug la escribe en el hash (``scrypt:32768:8:1``)."""
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
 
 # ---------- Mixins ----------
 class UtcTimestampMixin:
@@ -60,6 +90,12 @@ class PaymentStatus(enum.Enum):
     paid = "Pagada"
     failed = "Fallida"
 
+class OutboxStatus(enum.Enum):
+    pending = "Pendiente"
+    processing = "Procesando"
+    sent = "Enviado"
+    failed = "Fallido"
+
 
 # ---------- Core ----------
 class User(UserMixin, UtcTimestampMixin, db.Model):
@@ -84,10 +120,36 @@ class User(UserMixin, UtcTimestampMixin, db.Model):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        # Búsquedas por correo sin distinguir mayúsculas (incluye filas antiguas sin normalizar).
+        db.Index("ix_users_email_lower", db.func.lower(email)),
+    )
+
+    @validates("email")
+    def _normalize_email(self, _key, value):
+        return normalize_email(value)
+
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=password_hash_method())
+
+    def set_unusable_password(self):
+        """Marca la cuenta como solo OAuth: ninguna contraseña coincide y no se paga un hash lento."""
+        self.password_hash = make_unusable_password()
+
+    def has_usable_password(self) -> bool:
+        return bool(self.password_hash) and not self.password_hash.startswith(UNUSABLE_PASSWORD_PREFIX)
+
+    def password_needs_rehash(self) -> bool:
+        if not self.has_usable_password():
+            return False
+        current = self.password_hash.split("$", 1)[0]
+        return current != _canonical_hash_method(password_hash_method())
 
     def check_password(self, password: str) -> bool:
+        # Solo verifica. Hoy no hay login con contraseña (solo Google); cuando lo haya, ese
+        # flujo debe llamar a set_password si password_needs_rehash() tras un check exitoso.
+        if not self.has_usable_password():
+            return False
         return check_password_hash(self.password_hash, password)
 
     @property
@@ -266,10 +328,211 @@ class Order(UtcTimestampMixin, db.Model):
     )
     currency = db.Column(db.String(3), default="CLP", nullable=False)
 
-    detail = db.Column(db.Text, nullable=True)       # snapshot JSON si quieres
-    external_id = db.Column(db.String(120), nullable=True)  # id de Webpay, etc.
+    detail = db.Column(db.Text, nullable=True)       # snapshot JSON (ver build_order_snapshot)
+    external_id = db.Column(db.String(120), nullable=True, index=True)  # id de Webpay, etc.
 
     subscription = db.relationship("Subscription", back_populates="orders")
 
+    @property
+    def snapshot(self) -> dict | None:
+        """Snapshot guardado al crear la orden; ``None`` en órdenes antiguas o texto libre."""
+        if not self.detail:
+            return None
+        try:
+            data = json.loads(self.detail)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def __repr__(self):
+        return f"<Order {self.id} sub={self.subscription_id} {self.amount_clp} {self.payment_status.name}>"
+
+
+# ---------- Archivo histórico ----------
+# Copias de filas movidas por `flask archive` (mismo id y columnas que la tabla original, más
+# ``archived_at``). ``subscription_id`` no tiene FK: apunta a ``subscriptions`` o, si la
+# suscripción también se archivó, a ``archived_subscriptions``.
+class ArchivedSubscription(UtcTimestampMixin, db.Model):
+    __tablename__ = "archived_subscriptions"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    guardian_id = db.Column(
+        db.Integer, db.ForeignKey("guardians.id", ondelete="CASCADE"),
+        nullable=False, index=True
+    )
+    plan_id = db.Column(db.Integer, db.ForeignKey("plans.id"), nullable=False)
+    reglamento_accepted_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    billing_cycle = db.Column(db.Enum(BillingCycle), nullable=False)
+    status = db.Column(db.Enum(SubscriptionStatus), nullable=False)
+    start_date = db.Column(db.Date, nullable=True)
+    end_date = db.Column(db.Date, nullable=True)
+    archived_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+
+    guardian = db.relationship("Guardian")
+    plan = db.relationship("Plan")
+
+    def __repr__(self):
+        return f"<ArchivedSubscription {self.id} guardian={self.guardian_id} plan={self.plan_id}>"
+
+
+class ArchivedEnrollment(UtcTimestampMixin, db.Model):
+    __tablename__ = "archived_enrollments"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    subscription_id = db.Column(db.Integer, nullable=False, index=True)
+    child_id = db.Column(
+        db.Integer, db.ForeignKey("children.id", ondelete="CASCADE"),
+        nullable=False, index=True
+    )
+    workshop_id = db.Column(db.Integer, db.ForeignKey("workshops.id"), nullable=False)
+    status = db.Column(db.Enum(EnrollmentStatus), nullable=False)
+    notes = db.Column(db.Text, nullable=True)
+    archived_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+
+    child = db.relationship("Child")
+    workshop = db.relationship("Workshop")
+
+    def __repr__(self):
+        return f"<ArchivedEnrollment child={self.child_id} workshop={self.workshop_id}>"
+
+
+class ArchivedOrder(UtcTimestampMixin, db.Model):
+    __tablename__ = "archived_orders"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    subscription_id = db.Column(db.Integer, nullable=False, index=True)
+    amount_clp = db.Column(db.Integer, nullable=False)
+    payment_method = db.Column(db.Enum(PaymentMethod), nullable=False)
+    payment_status = db.Column(db.Enum(PaymentStatus), nullable=False)
+    currency = db.Column(db.String(3), default="CLP", nullable=False)
+    detail = db.Column(db.Text, nullable=True)
+    external_id = db.Column(db.String(120), nullable=True, index=True)
+    archived_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+
+    snapshot = Order.snapshot
+
+    def __repr__(self):
+        return f"<ArchivedOrder {self.id} sub={self.subscription_id} {self.amount_clp} {self.payment_status.name}>"
+
+
+# ---------- Libro de pagos ----------
+class PaymentEvent(db.Model):
+    """Registro append-only de cada cambio de estado de pago de una orden."""
+    __tablename__ = "payment_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Sin FK: el libro debe sobrevivir aunque la orden se elimine o archive.
+    order_id = db.Column(db.Integer, nullable=False, index=True)
+    subscription_id = db.Column(db.Integer, nullable=False, index=True)
+    from_status = db.Column(db.Enum(PaymentStatus), nullable=True)
+    to_status = db.Column(db.Enum(PaymentStatus), nullable=False)
+    payment_method = db.Column(db.Enum(PaymentMethod), nullable=False)
+    amount_clp = db.Column(db.Integer, nullable=False)
+    occurred_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
+
+    def __repr__(self):
+        return f"<PaymentEvent order={self.order_id} {self.from_status} -> {self.to_status}>"
+
+
+class RevenueRollup(db.Model):
+    """Ingresos netos (pagos menos reversas) por día o mes y método de pago."""
+    __tablename__ = "revenue_rollups"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "granularity", "period_start", "payment_method", name="uq_revenue_rollups_period"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(5), nullable=False)  # "day" | "month"
+    period_start = db.Column(db.Date, nullable=False)
+    payment_method = db.Column(db.Enum(PaymentMethod), nullable=False)
+    paid_amount_clp = db.Column(db.BigInteger, default=0, nullable=False)
+    paid_count = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<RevenueRollup {self.granularity} {self.period_start} {self.payment_method.name}>"
+
+
+# ---------- Correos ----------
+class OutboxMessage(db.Model):
+    """
+    Correo por enviar, escrito en la misma transacción que el cambio que lo origina:
+    si el commit falla no hay correo. Lo envía ``flask outbox-drain``.
+    """
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        db.Index("ix_outbox_messages_status_available", "status", "available_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    # Evita duplicados si el mismo evento se procesa dos veces (p. ej. retorno de Webpay repetido)
+    dedupe_key = db.Column(db.String(120), nullable=True, unique=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON con el contexto de la plantilla
+    status = db.Column(db.Enum(OutboxStatus), default=OutboxStatus.pending, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    available_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+    claimed_by = db.Column(db.String(80), nullable=True)
+    claimed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    sent_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+
+    @property
+    def context(self) -> dict:
+        return json.loads(self.payload)
+
+    def __repr__(self):
+        return f"<OutboxMessage {self.id} {self.kind} {self.status.name}>"
+
+
+class PaymentReminder(db.Model):
+    """Recordatorio de pago enviado; define la ventana de no repetición por destinatario."""
+    __tablename__ = "payment_reminders"
+    __table_args__ = (
+        db.Index("ix_payment_reminders_recipient_sent", "recipient", "sent_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    guardian_id = db.Column(
+        db.Integer, db.ForeignKey("guardians.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    recipient = db.Column(db.String(255), nullable=False)
+    subscription_ids = db.Column(db.String(255), nullable=False)  # "12,15"
+    amount_clp = db.Column(db.Integer, nullable=False)
+    sent_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<PaymentReminder {self.recipient} {self.sent_at}>"
+
+
+# ---------- Sesiones del lado del servidor ----------
+class ServerSession(db.Model):
+    """Datos de sesión cuando ``SESSION_BACKEND = "sqlalchemy"``; la cookie solo lleva ``sid``."""
+    __tablename__ = "server_sessions"
+
+    sid = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
     def __repr__(self):
-        return f"<Order {self.id} sub={self.subscription_id} {self.amount_clp} {self.payment_status.name}>"
\ No newline at end of file
+        return f"<ServerSession {self.sid[:8]}… expires={self.expires_at}>"
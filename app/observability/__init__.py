@@ -0,0 +1,13 @@
+# app/observability/__init__.py
+from flask import Flask
+
+from . import accesslog, profiling, sql, templates
+from .sql import QueryBudgetExceeded
+
+
+def init_app(app: Flask) -> None:
+    sql.init_app(app)
+    if app.config.get("TEMPLATE_TIMING", True):
+        templates.init_app(app)
+    profiling.init_app(app)
+    accesslog.init_app(app)
@@ -0,0 +1,191 @@
+# app/observability/accesslog.py
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import Flask, current_app, g, request, session
+
+from . import sql, templates
+
+_EXTENSION_KEY = "access_log"
+_STOP = object()
+
+
+class AccessLogWriter:
+    """
+    Escribe líneas JSON desde un hilo propio. Las solicitudes solo encolan (sin bloquear: si la
+    cola está llena la línea se descarta y se cuenta en ``dropped``). El archivo rota por tamaño
+    y por antigüedad, conservando ``backups`` archivos anteriores.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_bytes: int = 50 * 1024 * 1024,
+        rotate_seconds: float = 24 * 60 * 60,
+        backups: int = 14,
+        queue_size: int = 10000,
+        flush_interval: float = 1.0,
+    ):
+        # Admite "{pid}" para que cada worker escriba su propio archivo.
+        self.path_template = path
+        self.path = Path(path.format(pid=os.getpid()))
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid = None
+        self._file = None
+        self._opened_at = 0.0
+
+    # --- lado de la solicitud ---
+    def write(self, record: dict) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # Tras un fork la cola y el hilo del padre no sirven en el hijo.
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._file = None
+            self._pid = os.getpid()
+            self.path = Path(self.path_template.format(pid=self._pid))
+            self._thread = threading.Thread(target=self._run, name="access-log-writer", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Vacía la cola y cierra el archivo (se llama al terminar el proceso)."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # --- hilo escritor ---
+    def _run(self) -> None:
+        while True:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < 1000:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            stop = any(item is _STOP for item in batch)
+            lines = [json.dumps(item, ensure_ascii=False, default=str) for item in batch if item is not _STOP]
+            if lines:
+                try:
+                    self._write_lines(lines)
+                except OSError:
+                    self.dropped += len(lines)
+            if stop:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _write_lines(self, lines: list[str]) -> None:
+        handle = self._open()
+        handle.write("\n".join(lines) + "\n")
+        handle.flush()
+        if handle.tell() >= self.max_bytes or time.time() - self._opened_at >= self.rotate_seconds:
+            self._rotate()
+
+    def _open(self):
+        if self._file is not None:
+            # Otro proceso pudo haber rotado el archivo: se reabre si ya no es el mismo inodo.
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._file.fileno()).st_ino:
+                    return self._file
+            except FileNotFoundError:
+                pass
+            self._file.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.time()
+        return self._file
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        try:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.{stamp}"))
+        except FileNotFoundError:
+            return
+        rotated = sorted(self.path.parent.glob(f"{self.path.name}.*"))
+        for old in rotated[: max(0, len(rotated) - self.backups)]:
+            old.unlink(missing_ok=True)
+
+
+def _start_request() -> None:
+    g._access_started_at = time.perf_counter()
+
+
+def _log_request(response):
+    started = g.get("_access_started_at")
+    app = current_app._get_current_object()
+    if started is None or request.endpoint in app.config.get(
+        "ACCESS_LOG_EXCLUDE", ("metrics", "static", "health.healthz", "health.readyz")
+    ):
+        return response
+
+    stats = sql.current_stats()
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        # Desde la sesión, sin disparar el user_loader.
+        "user_id": session.get("_user_id"),
+        "remote_addr": request.remote_addr,
+        "bytes": response.calculate_content_length(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "db_ms": stats.duration_ms if stats is not None else None,
+        "db_queries": stats.count if stats is not None else None,
+        "template_ms": templates.template_ms(),
+        "templates": templates.renders(),
+        "outbound_ms": round(g.get("_outbound_seconds", 0.0) * 1000, 2),
+    }
+    app.extensions[_EXTENSION_KEY].write(record)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    """Activa el access log JSON si ``ACCESS_LOG_ENABLED``."""
+    if not app.config.get("ACCESS_LOG_ENABLED", False):
+        return
+    path = app.config.get("ACCESS_LOG_PATH") or os.path.join(app.instance_path, "logs", "access.jsonl")
+    writer = AccessLogWriter(
+        path,
+        max_bytes=app.config.get("ACCESS_LOG_MAX_BYTES", 50 * 1024 * 1024),
+        rotate_seconds=app.config.get("ACCESS_LOG_ROTATE_SECONDS", 24 * 60 * 60),
+        backups=app.config.get("ACCESS_LOG_BACKUPS", 14),
+        queue_size=app.config.get("ACCESS_LOG_QUEUE_SIZE", 10000),
+        flush_interval=app.config.get("ACCESS_LOG_FLUSH_INTERVAL", 1.0),
+    )
+    app.extensions[_EXTENSION_KEY] = writer
+    atexit.register(writer.close)
+
+    sql.enable_collection(app)
+    templates.init_app(app)
+    app.before_request(_start_request)
+    app.after_request(_log_request)
@@ -0,0 +1,334 @@
+# app/observability/metrics.py
+import atexit
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from flask import Flask, Response, abort, current_app, g, has_app_context, has_request_context, request
+
+_EXTENSION_KEY = "metrics"
+# Acumulado de los workers terminados (sus <pid>.json se pliegan aquí y se borran)
+_RETIRED_FILE = "retired.json"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (tipo, ayuda, buckets)
+DEFINITIONS = {
+    "http_requests_total": ("counter", "Solicitudes HTTP atendidas por endpoint, método y estado.", None),
+    "http_request_duration_seconds": ("histogram", "Latencia de las solicitudes HTTP por endpoint.", LATENCY_BUCKETS),
+    "outbound_requests_total": ("counter", "Llamadas a servicios externos por resultado.", None),
+    "outbound_request_duration_seconds": ("histogram", "Latencia de llamadas a Transbank y Google.", LATENCY_BUCKETS),
+    "template_render_duration_seconds": ("histogram", "Tiempo de render por plantilla.", LATENCY_BUCKETS),
+    "template_render_queries_total": ("counter", "Consultas SQL emitidas durante el render (cargas perezosas).", None),
+    "db_pool_size": ("gauge", "Tamaño configurado del pool de SQLAlchemy.", None),
+    "db_pool_checked_out": ("gauge", "Conexiones del pool en uso.", None),
+    "db_pool_overflow": ("gauge", "Conexiones abiertas por sobre el tamaño del pool.", None),
+}
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class MetricsRegistry:
+    """Contadores, histogramas y gauges de un proceso, serializables para agregarlos entre workers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, dict[tuple, float]] = {}
+        self.histograms: dict[str, dict[tuple, list]] = {}
+        self.gauges: dict[str, dict[tuple, float]] = {}
+
+    def inc(self, name: str, labels: dict, amount: float = 1) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, labels: dict, value: float) -> None:
+        buckets = DEFINITIONS[name][2]
+        key = _key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            # [conteo por bucket (no acumulado) + bucket +Inf, suma]
+            data = series.setdefault(key, [[0] * (len(buckets) + 1), 0.0])
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            data[0][index] += 1
+            data[1] += value
+
+    def set_gauge(self, name: str, labels: dict, value: float) -> None:
+        with self._lock:
+            self.gauges.setdefault(name, {})[_key(labels)] = value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                kind: {
+                    name: [[list(map(list, key)), value] for key, value in series.items()]
+                    for name, series in getattr(self, kind).items()
+                }
+                for kind in ("counters", "histograms", "gauges")
+            }
+
+    def merge(self, data: dict, *, gauges: bool = True) -> None:
+        """Suma contadores e histogramas (y gauges si ``gauges``) de otro proceso."""
+        with self._lock:
+            for name, rows in data.get("counters", {}).items():
+                series = self.counters.setdefault(name, {})
+                for key, value in rows:
+                    key = tuple(map(tuple, key))
+                    series[key] = series.get(key, 0) + value
+            for name, rows in data.get("histograms", {}).items():
+                series = self.histograms.setdefault(name, {})
+                for key, (counts, total) in rows:
+                    key = tuple(map(tuple, key))
+                    current = series.setdefault(key, [[0] * len(counts), 0.0])
+                    current[0] = [a + b for a, b in zip(current[0], counts)]
+                    current[1] += total
+            if gauges:
+                for name, rows in data.get("gauges", {}).items():
+                    series = self.gauges.setdefault(name, {})
+                    for key, value in rows:
+                        key = tuple(map(tuple, key))
+                        series[key] = series.get(key, 0) + value
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(registry: MetricsRegistry) -> str:
+    """Formato de exposición de texto de Prometheus (versión 0.0.4)."""
+    lines = []
+    for name, (kind, help_text, buckets) in DEFINITIONS.items():
+        source = {"counter": registry.counters, "histogram": registry.histograms, "gauge": registry.gauges}[kind]
+        series = source.get(name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key in sorted(series):
+            value = series[key]
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip((*buckets, math.inf), counts):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Metrics:
+    """
+    Extensión de métricas. Con ``METRICS_DIR`` cada worker vuelca su registro a
+    ``<pid>.json`` (cada ``METRICS_FLUSH_INTERVAL`` segundos y al salir) y ``/metrics`` suma
+    los archivos de todos los workers. Los archivos de workers terminados se pliegan en
+    ``retired.json`` (sin sus gauges) para que los contadores no retrocedan ni se acumulen archivos.
+    Fuera de DEBUG/TESTING, ``/metrics`` exige ``METRICS_TOKEN``.
+    """
+
+    def __init__(self, app: Flask | None = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+        registry = MetricsRegistry()
+        directory = app.config.get("METRICS_DIR")
+        state = {
+            "registry": registry,
+            "dir": Path(directory) if directory else None,
+            "flush_interval": app.config.get("METRICS_FLUSH_INTERVAL", 5),
+            "last_flush": 0.0,
+        }
+        app.extensions[_EXTENSION_KEY] = state
+        if state["dir"] is not None:
+            state["dir"].mkdir(parents=True, exist_ok=True)
+            atexit.register(self._flush, state)
+
+        app.before_request(self._start_timer)
+        app.after_request(self._record_request)
+        app.add_url_rule(app.config.get("METRICS_PATH", "/metrics"), "metrics", self._view)
+        if not app.config.get("METRICS_TOKEN") and not (app.debug or app.testing):
+            app.logger.warning("METRICS_TOKEN no está configurado: /metrics responderá 403.")
+
+    @staticmethod
+    def _state() -> dict | None:
+        if not has_app_context():
+            return None
+        return current_app.extensions.get(_EXTENSION_KEY)
+
+    @property
+    def registry(self) -> MetricsRegistry | None:
+        state = self._state()
+        return state["registry"] if state else None
+
+    @staticmethod
+    def _start_timer() -> None:
+        g._metrics_started_at = time.perf_counter()
+
+    def _record_request(self, response):
+        state = self._state()
+        started = g.pop("_metrics_started_at", None)
+        if state is None or started is None or request.endpoint == "metrics":
+            return response
+        if request.endpoint in current_app.config.get("METRICS_EXCLUDE", ("health.healthz", "health.readyz")):
+            return response
+        endpoint = request.endpoint or "<unmatched>"
+        registry = state["registry"]
+        registry.observe("http_request_duration_seconds", {"endpoint": endpoint}, time.perf_counter() - started)
+        registry.inc(
+            "http_requests_total",
+            {"endpoint": endpoint, "method": request.method, "status": response.status_code},
+        )
+        if state["dir"] is not None and time.monotonic() - state["last_flush"] >= state["flush_interval"]:
+            self._sample_pool(registry)
+            self._flush(state)
+        return response
+
+    @staticmethod
+    def _sample_pool(registry: MetricsRegistry) -> None:
+        from ..extensions import db
+
+        pool = db.engine.pool
+        for name, getter in (
+            ("db_pool_size", "size"),
+            ("db_pool_checked_out", "checkedout"),
+            ("db_pool_overflow", "overflow"),
+        ):
+            if hasattr(pool, getter):
+                registry.set_gauge(name, {}, getattr(pool, getter)())
+
+    @staticmethod
+    def _flush(state: dict) -> None:
+        # Se usa el pid actual: tras el fork de gunicorn cada worker escribe su propio archivo.
+        path = state["dir"] / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        state["last_flush"] = time.monotonic()
+        try:
+            tmp.write_text(json.dumps(state["registry"].to_dict()), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            # Un volcado fallido se reintenta en el siguiente intervalo.
+            pass
+
+    def collect(self) -> MetricsRegistry:
+        state = self._state()
+        registry = state["registry"]
+        self._sample_pool(registry)
+        if state["dir"] is None:
+            return registry
+
+        self._flush(state)
+        self._retire_dead(state["dir"])
+        merged = MetricsRegistry()
+        merged.merge(registry.to_dict())
+        own = str(os.getpid())
+        for path in sorted(state["dir"].glob("*.json")):
+            if path.stem == own:
+                continue
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            merged.merge(data, gauges=path.stem.isdigit() and _pid_alive(int(path.stem)))
+        return merged
+
+    @staticmethod
+    def _retire_dead(directory: Path) -> None:
+        dead = [
+            path for path in directory.glob("*.json")
+            if path.stem.isdigit() and not _pid_alive(int(path.stem))
+        ]
+        if not dead:
+            return
+        # Bajo lock: dos workers sirviendo /metrics a la vez no deben plegar el mismo archivo.
+        with open(directory / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            retired_path = directory / _RETIRED_FILE
+            retired = MetricsRegistry()
+            try:
+                retired.merge(json.loads(retired_path.read_text(encoding="utf-8")), gauges=False)
+            except (OSError, ValueError):
+                pass
+            folded = []
+            for path in dead:
+                try:
+                    retired.merge(json.loads(path.read_text(encoding="utf-8")), gauges=False)
+                except FileNotFoundError:
+                    continue  # ya lo plegó otro worker
+                except (OSError, ValueError):
+                    pass  # ilegible: se descarta igual, nadie más lo escribirá
+                folded.append(path)
+            tmp = retired_path.with_suffix(".tmp")
+            try:
+                tmp.write_text(json.dumps(retired.to_dict()), encoding="utf-8")
+                os.replace(tmp, retired_path)
+            except OSError:
+                return
+            for path in folded:
+                path.unlink(missing_ok=True)
+
+    def _view(self):
+        token = current_app.config.get("METRICS_TOKEN")
+        if not token:
+            # Sin token solo se expone en desarrollo y pruebas: el tráfico por endpoint no es público.
+            if not (current_app.debug or current_app.testing):
+                abort(403)
+        elif request.headers.get("Authorization") != f"Bearer {token}":
+            abort(403)
+        return Response(render(self.collect()), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+@contextmanager
+def track_outbound(service: str, operation: str):
+    """
+    Mide una llamada externa (p. ej. ``track_outbound("transbank", "commit")``) y acumula su
+    duración en la solicitud en curso (``outbound_ms`` del access log).
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - started
+        if has_request_context():
+            g._outbound_seconds = g.get("_outbound_seconds", 0.0) + elapsed
+        state = Metrics._state()
+        if state is not None:
+            labels = {"service": service, "operation": operation}
+            state["registry"].observe("outbound_request_duration_seconds", labels, elapsed)
+            state["registry"].inc("outbound_requests_total", {**labels, "outcome": outcome})
@@ -0,0 +1,248 @@
+# app/observability/profiling.py
+import cProfile
+import json
+import os
+import pstats
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import Flask, current_app, g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+_EXTENSION_KEY = "profiler"
+_TOKEN_SALT = "request-profiler"
+_MAX_DEPTH = 80
+_ROOTS = (str(Path(__file__).resolve().parents[2]), sys.prefix)
+
+
+def _label(filename: str, name: str, line: int) -> str:
+    for prefix in _ROOTS:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip(os.sep)
+            break
+    return f"{name} ({filename}:{line})"
+
+
+def _function_label(code) -> str:
+    return _label(code.co_filename, code.co_name, code.co_firstlineno)
+
+
+class _RequestSamples:
+    __slots__ = ("own", "cumulative", "total")
+
+    def __init__(self):
+        self.own = Counter()
+        self.cumulative = Counter()
+        self.total = 0
+
+    def add(self, frame) -> None:
+        seen = set()
+        depth = 0
+        leaf = _function_label(frame.f_code)
+        while frame is not None and depth < _MAX_DEPTH:
+            label = _function_label(frame.f_code)
+            if label not in seen:
+                seen.add(label)
+                self.cumulative[label] += 1
+            frame = frame.f_back
+            depth += 1
+        self.own[leaf] += 1
+        self.total += 1
+
+    def top(self, interval: float, limit: int) -> list[dict]:
+        return [
+            {
+                "function": label,
+                "cumulative_ms": round(count * interval * 1000, 1),
+                "self_ms": round(self.own.get(label, 0) * interval * 1000, 1),
+            }
+            for label, count in self.cumulative.most_common(limit)
+        ]
+
+
+class SamplingProfiler:
+    """
+    Un único hilo muestrea cada ``interval`` segundos la pila de los hilos que están atendiendo
+    una solicitud. El costo por solicitud es registrar y desregistrar su hilo.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: dict[int, _RequestSamples] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid = None
+
+    def _ensure_thread(self) -> None:
+        # Tras un fork el hilo del padre no existe en el hijo.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                active = dict(self._active)
+            frames = sys._current_frames()
+            for thread_id, samples in active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples.add(frame)
+
+    def start(self) -> _RequestSamples:
+        self._ensure_thread()
+        samples = _RequestSamples()
+        with self._lock:
+            self._active[threading.get_ident()] = samples
+        return samples
+
+    def stop(self) -> _RequestSamples | None:
+        with self._lock:
+            return self._active.pop(threading.get_ident(), None)
+
+
+def _serializer(app: Flask) -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(app.secret_key, salt=_TOKEN_SALT)
+
+
+def make_token(app: Flask, user_id: int) -> str:
+    """Token para el encabezado de perfilado; se firma con ``SECRET_KEY`` y caduca."""
+    return _serializer(app).dumps({"admin": user_id})
+
+
+def _header_token_valid(app: Flask, token: str) -> bool:
+    try:
+        _serializer(app).loads(token, max_age=app.config.get("PROFILER_TOKEN_MAX_AGE", 3600))
+    except BadSignature:
+        return False
+    return True
+
+
+def profile_dir(app: Flask) -> Path:
+    return Path(app.config.get("PROFILER_DIR") or Path(app.instance_path) / "profiles")
+
+
+def _write_profile(app: Flask, record: dict, stats: pstats.Stats | None = None) -> None:
+    directory = profile_dir(app)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Prefijo en nanosegundos: el orden alfabético es el de captura (base de la rotación).
+    name = f"{time.time_ns()}-{record['id']}"
+    if stats is not None:
+        stats.dump_stats(directory / f"{name}.prof")
+        record["raw"] = f"{name}.prof"
+    tmp = directory / f"{name}.tmp"
+    tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, directory / f"{name}.json")
+    _rotate(directory, app.config.get("PROFILER_MAX_FILES", 200))
+
+
+def _rotate(directory: Path, keep: int) -> None:
+    summaries = sorted(directory.glob("*.json"))
+    for old in summaries[: max(0, len(summaries) - keep)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def _cprofile_top(profile: cProfile.Profile, limit: int) -> tuple[pstats.Stats, list[dict]]:
+    stats = pstats.Stats(profile)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    top = []
+    for (filename, line, name), (_cc, calls, own, cumulative, _callers) in rows:
+        top.append({
+            "function": _label(filename, name, line),
+            "calls": calls,
+            "cumulative_ms": round(cumulative * 1000, 1),
+            "self_ms": round(own * 1000, 1),
+        })
+    return stats, top
+
+
+def list_profiles(app: Flask, limit: int = 50) -> list[dict]:
+    """Perfiles capturados, del más lento al más rápido."""
+    profiles = []
+    for path in profile_dir(app).glob("*.json"):
+        try:
+            profiles.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    profiles.sort(key=lambda item: item["duration_ms"], reverse=True)
+    return profiles[:limit]
+
+
+def _start_request() -> None:
+    app = current_app._get_current_object()
+    state = app.extensions[_EXTENSION_KEY]
+    g._profile_started_at = time.perf_counter()
+
+    token = request.headers.get(app.config.get("PROFILER_HEADER", "X-Profile"))
+    if token and _header_token_valid(app, token):
+        profile = cProfile.Profile()
+        g._profile_cprofile = profile
+        profile.enable()
+    elif state["sampler"] is not None:
+        g._profile_samples = state["sampler"].start()
+
+
+def _finish_request(_exc) -> None:
+    app = current_app._get_current_object()
+    state = app.extensions[_EXTENSION_KEY]
+    started = g.pop("_profile_started_at", None)
+    profile = g.pop("_profile_cprofile", None)
+    if profile is not None:
+        profile.disable()
+    samples = state["sampler"].stop() if g.pop("_profile_samples", None) is not None else None
+    if started is None:
+        return
+
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    threshold = app.config.get("PROFILER_THRESHOLD_MS", 1000)
+    if profile is None and (samples is None or duration_ms < threshold):
+        return
+
+    limit = app.config.get("PROFILER_TOP_FUNCTIONS", 25)
+    record = {
+        "id": secrets.token_hex(4),
+        "captured_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "duration_ms": duration_ms,
+    }
+    stats = None
+    if profile is not None:
+        stats, record["top"] = _cprofile_top(profile, limit)
+        record["mode"] = "cprofile"
+    else:
+        record["top"] = samples.top(state["sampler"].interval, limit)
+        record["mode"] = "sampling"
+        record["samples"] = samples.total
+    try:
+        _write_profile(app, record, stats)
+    except OSError as exc:
+        app.logger.warning("No se pudo guardar el perfil de %s: %s", request.path, exc)
+
+
+def init_app(app: Flask) -> None:
+    """
+    Perfila solicitudes que superan ``PROFILER_THRESHOLD_MS`` (muestreo, si ``PROFILER_ENABLED``)
+    o que traen un token válido en ``PROFILER_HEADER`` (cProfile completo).
+    """
+    sampler = None
+    if app.config.get("PROFILER_ENABLED", False):
+        sampler = SamplingProfiler(app.config.get("PROFILER_SAMPLE_INTERVAL_MS", 5) / 1000)
+    app.extensions[_EXTENSION_KEY] = {"sampler": sampler}
+    app.before_request(_start_request)
+    app.teardown_request(_finish_request)
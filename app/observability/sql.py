@@ -0,0 +1,163 @@
+# app/observability/sql.py
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from flask import Flask, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_EXTENSION_KEY = "sql_stats"
+_listeners_installed = False
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|:\w+|%s|\?")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """La solicitud superó el presupuesto de consultas o repitió una consulta (N+1) en modo estricto."""
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Forma normalizada de una sentencia: literales y parámetros pasan a ``?`` y las listas
+    ``IN (...)`` colapsan, de modo que la misma consulta con distintos ids cuente como una.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("IN (?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class SQLStats:
+    count: int = 0
+    duration: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 2)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Formas ejecutadas ``threshold`` o más veces: la firma típica de un N+1."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def current_stats() -> SQLStats | None:
+    if not has_request_context():
+        return None
+    return g.get("_sql_stats")
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault("_sql_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, _parameters, _context, _executemany):
+    started = conn.info.get("_sql_started_at")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def _handle_error(exception_context):
+    # La sentencia falló: se descarta su marca de inicio para no desalinear la pila.
+    conn = exception_context.connection
+    started = conn.info.get("_sql_started_at") if conn is not None else None
+    if started:
+        started.pop()
+
+
+def _install_listeners() -> None:
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _listeners_installed = True
+
+
+def _start_request() -> None:
+    g._sql_stats = SQLStats()
+
+
+def _query_budget(app: Flask) -> int | None:
+    budgets = app.config.get("SQL_QUERY_BUDGETS") or {}
+    return budgets.get(request.endpoint, app.config.get("SQL_QUERY_BUDGET"))
+
+
+def _finish_request(response):
+    stats = current_stats()
+    if stats is None:
+        return response
+    app = current_app._get_current_object()
+
+    response.headers.add(
+        "Server-Timing", f'db;dur={stats.duration_ms};desc="{stats.count} queries"'
+    )
+
+    threshold = app.config.get("SQL_NPLUSONE_THRESHOLD", 5)
+    repeated = stats.repeated(threshold)
+    budget = _query_budget(app)
+    over_budget = budget is not None and stats.count > budget
+
+    record = {
+        "event": "sql",
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        "queries": stats.count,
+        "db_ms": stats.duration_ms,
+    }
+    if g.get("_template_renders"):
+        record["templates"] = g._template_renders
+    if repeated:
+        record["repeated"] = [{"shape": shape, "count": n} for shape, n in repeated]
+    if over_budget:
+        record["budget"] = budget
+    line = json.dumps(record, ensure_ascii=False)
+    if repeated or over_budget:
+        app.logger.warning(line)
+    else:
+        app.logger.info(line)
+
+    if app.config.get("SQL_STRICT", False) and (repeated or over_budget):
+        problems = []
+        if over_budget:
+            problems.append(f"{stats.count} consultas (presupuesto {budget})")
+        problems.extend(f"{n}× {shape}" for shape, n in repeated)
+        raise QueryBudgetExceeded(f"{request.endpoint}: " + "; ".join(problems))
+    return response
+
+
+def enable_collection(app: Flask) -> None:
+    """Acumula estadísticas SQL por solicitud (las usan también el access log y las métricas)."""
+    _install_listeners()
+    if not app.extensions.get(_EXTENSION_KEY):
+        app.extensions[_EXTENSION_KEY] = True
+        app.before_request(_start_request)
+
+
+def init_app(app: Flask) -> None:
+    """Activa la instrumentación si ``SQL_INSTRUMENTATION`` (o ``SQL_STRICT``) está habilitado."""
+    if not (app.config.get("SQL_INSTRUMENTATION", False) or app.config.get("SQL_STRICT", False)):
+        return
+    enable_collection(app)
+    app.after_request(_finish_request)
@@ -0,0 +1,78 @@
+# app/observability/templates.py
+import json
+import time
+
+from flask import Flask, before_render_template, g, template_rendered
+
+from . import sql
+from .metrics import Metrics
+
+_EXTENSION_KEY = "template_timing"
+
+
+def _before_render(_app, template, context, **_extra):
+    stats = sql.current_stats()
+    g.setdefault("_template_stack", []).append((
+        time.perf_counter(),
+        stats.count if stats is not None else 0,
+        stats.shapes.copy() if stats is not None else None,
+    ))
+
+
+def _after_render(app, template, context, **_extra):
+    stack = g.get("_template_stack")
+    if not stack:
+        return
+    started, count_before, shapes_before = stack.pop()
+    elapsed = time.perf_counter() - started
+    # Solo el render más externo suma al total: los anidados ya están dentro de su tiempo.
+    if not stack:
+        g._template_seconds = g.get("_template_seconds", 0.0) + elapsed
+
+    stats = sql.current_stats()
+    queries = stats.count - count_before if stats is not None else 0
+    name = template.name or "<string>"
+    g.setdefault("_template_renders", []).append({
+        "template": name,
+        "ms": round(elapsed * 1000, 2),
+        "queries": queries,
+    })
+
+    state = Metrics._state()
+    if state is not None:
+        state["registry"].observe("template_render_duration_seconds", {"template": name}, elapsed)
+        if queries:
+            state["registry"].inc("template_render_queries_total", {"template": name}, queries)
+
+    if queries and queries >= app.config.get("TEMPLATE_SQL_WARN_THRESHOLD", 5):
+        # Consultas durante el render = cargas perezosas desde la plantilla.
+        shapes = stats.shapes - shapes_before
+        app.logger.warning(json.dumps({
+            "event": "template_sql",
+            "template": name,
+            "ms": round(elapsed * 1000, 2),
+            "queries": queries,
+            "shapes": [{"shape": shape, "count": n} for shape, n in shapes.most_common(5)],
+        }, ensure_ascii=False))
+
+
+def template_ms() -> float:
+    return round(g.get("_template_seconds", 0.0) * 1000, 2)
+
+
+def renders() -> list[dict]:
+    """Plantillas renderizadas en la solicitud actual, con su tiempo y consultas emitidas."""
+    return list(g.get("_template_renders", ()))
+
+
+def init_app(app: Flask) -> None:
+    """
+    Mide cada render de plantilla vía las señales ``before_render_template``/``template_rendered``.
+    El SQL emitido durante el render solo se cuenta si la recolección ya está activa
+    (``SQL_INSTRUMENTATION`` o el access log): medir plantillas no la enciende por sí solo.
+    """
+    if app.extensions.get(_EXTENSION_KEY):
+        return
+    app.extensions[_EXTENSION_KEY] = True
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
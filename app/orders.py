@@ -3,22 +3,40 @@ from flask_login import login_required, current_user
 from .extensions import db
 from .models import Order, PaymentMethod, PaymentStatus, Plan, BillingCycle
 from .services import orders as order_service
+from .services import outbox as outbox_service
 from .services import webpay as webpay_service
 
 bp = Blueprint("orders", __name__, template_folder="templates")
 
+def _receipt_context(order: Order) -> dict:
+    """Datos para las páginas de resultado, tomados del snapshot de la orden si existe."""
+    # Snapshots antiguos o parciales: cada campo que falte se toma de las relaciones
+    snapshot = order.snapshot or {}
+    subscription = order.subscription
+    guardian = snapshot.get("guardian") or {}
+    cycle_code = (snapshot.get("cycle") or {}).get("code")
+    return {
+        "guardian_email": guardian.get("email") or subscription.guardian.user.email,
+        "plan": snapshot.get("plan") or subscription.plan,
+        "billing_cycle": (
+            BillingCycle[cycle_code] if cycle_code in BillingCycle.__members__ else subscription.billing_cycle
+        ),
+    }
+
+
 @bp.route("/pago/<int:order_id>")
 @login_required
 def order_detail(order_id):
-    order = Order.query.get_or_404(order_id)
+    order = db.get_or_404(Order, order_id)
+    snapshot = order.snapshot
     if current_user.is_admin:
-        return render_template("order_detail.html", order=order)
+        return render_template("order_detail.html", order=order, snapshot=snapshot)
     guardian_profile = getattr(current_user, "guardian_profile", None)
     if guardian_profile is None:
         abort(404)
     if order.subscription.guardian_id != guardian_profile.id:
         abort(403)
-    return render_template("order_detail.html", order=order)
+    return render_template("order_detail.html", order=order, snapshot=snapshot)
 
 @bp.route("/pago/<int:order_id>/confirmar", methods=["POST"])
 @login_required
@@ -31,6 +49,33 @@ def confirm_payment(order_id):
     flash("✅ Pago confirmado correctamente", "success")
     return redirect(url_for("orders.order_detail", order_id=order.id))
 
+@bp.route("/pago/confirmar", methods=["POST"])
+@login_required
+def confirm_payments_bulk():
+    if not current_user.is_admin:
+        abort(403)
+    try:
+        order_ids = [int(value) for value in request.form.getlist("order_ids")]
+    except ValueError:
+        abort(400)
+    if not order_ids:
+        flash("Selecciona al menos una orden para confirmar.", "warning")
+        return redirect(url_for("admin.dashboard_payments"))
+
+    results = order_service.confirm_orders_bulk(order_ids)
+    db.session.commit()   # ✅ una sola transacción para todo el lote
+
+    summary = {}
+    for order_id, result in results.items():
+        summary.setdefault(result, []).append(f"#{order_id}")
+    if "confirmed" in summary:
+        flash(f"✅ Pagos confirmados: {', '.join(summary['confirmed'])}", "success")
+    if "already_paid" in summary:
+        flash(f"Ya estaban pagadas: {', '.join(summary['already_paid'])}", "info")
+    if "not_found" in summary:
+        flash(f"No encontradas: {', '.join(summary['not_found'])}", "warning")
+    return redirect(url_for("admin.dashboard_payments"))
+
 @bp.route("/pago/<int:order_id>/webpay/iniciar", methods=["GET", "POST"])
 def start_webpay(order_id):
     order = Order.query.get_or_404(order_id)
@@ -89,33 +134,22 @@ def webpay_return():
 
     session.pop("webpay_inscription", None)
 
+    receipt = _receipt_context(order)
+
     if authorized:
         order_service.mark_order_paid(order)
-
-        guardian_email = order.subscription.guardian.user.email
-        plan = order.subscription.plan
-        billing_cycle = order.subscription.billing_cycle
-
-        if order.detail is not None:
-            order.detail = None
-
+        outbox_service.enqueue_payment_confirmation(order)
         db.session.commit()
 
         return render_template(
             "inscripcion_confirmacion.html",
-            guardian_email=guardian_email,
-            plan=plan,
             order=order,
-            billing_cycle=billing_cycle,
             payment_method_name=PaymentMethod.webpay.name,
             webpay_authorized=True,
+            **receipt,
         )
 
     order_service.mark_order_failed(order)
-
-    if order.detail is not None:
-        order.detail = None
-
     db.session.commit()
 
     error_message = resp.get("status") or resp.get("response_code")
@@ -127,12 +161,10 @@ def webpay_return():
     else:
         error_message = "El pago fue rechazado o cancelado."
 
-    plan = order.subscription.plan
-
     return render_template(
         "webpay_error.html",
         order=order,
-        plan=plan,
+        plan=receipt["plan"],
         error_message=error_message,
     )
 
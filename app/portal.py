@@ -1,7 +1,7 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, abort
+from flask import Blueprint, current_app, render_template, redirect, request, url_for, flash, abort
 from flask_login import login_required, current_user
 
-from .models import Order, PaymentStatus, Subscription
+from .services import portal as portal_service
 
 bp = Blueprint("portal", __name__, template_folder="templates")
 
@@ -27,11 +27,16 @@ def dashboard():
     if guardian is None:
         abort(403)
 
-    orders = (
-        Order.query.join(Subscription)
-        .filter(Subscription.guardian_id == guardian.id)
-        .order_by(Order.created_at.desc())
-        .all()
+    pagination = portal_service.orders_page(
+        guardian.id,
+        page=request.args.get("pagina", 1, type=int),
+        per_page=current_app.config.get("PORTAL_ORDERS_PER_PAGE", 20),
     )
+    summary = portal_service.guardian_summary(guardian.id)
 
-    return render_template("portal/dashboard.html", orders=orders)
\ No newline at end of file
+    return render_template(
+        "portal/dashboard.html",
+        orders=pagination.items,
+        pagination=pagination,
+        summary=summary,
+    )
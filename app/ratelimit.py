@@ -0,0 +1,253 @@
+# app/ratelimit.py
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from flask import Flask, current_app, request, session
+
+_EXTENSION_KEY = "ratelimit"
+
+_PERIODS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+}
+
+# Claves: endpoint ("orders.start_webpay") o blueprint ("auth"). El endpoint tiene prioridad.
+DEFAULT_RULES = {
+    "auth.google_start": "20/minute",
+    "auth.google_callback": "20/minute",
+    "auth.login": "30/minute",
+    "inscriptions.inscripcion": "30/minute",
+    "orders.start_webpay": "10/minute",
+}
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Token bucket: ``capacity`` solicitudes de ráfaga que se reponen en ``period`` segundos."""
+
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Interpreta reglas del tipo ``"10/minute"`` o ``"100/5 minutes"``."""
+        try:
+            amount, period = value.split("/", 1)
+            parts = period.strip().split()
+            multiplier = float(parts[0]) if len(parts) == 2 else 1
+            unit = parts[-1].rstrip("s")
+            return cls(capacity=int(amount), period=multiplier * _PERIODS[unit])
+        except (KeyError, ValueError, IndexError) as exc:
+            raise ValueError(f"Regla de rate limit inválida: {value!r}") from exc
+
+
+def _refill(tokens: float, updated: float, now: float, limit: Limit) -> float:
+    return min(float(limit.capacity), tokens + (now - updated) * limit.rate)
+
+
+def _take(tokens: float, limit: Limit, cost: float) -> tuple[bool, float, float]:
+    """Devuelve (permitido, tokens restantes, segundos hasta poder reintentar)."""
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / limit.rate
+
+
+class MemoryBackend:
+    """Buckets en memoria del proceso; suficiente con un solo worker."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, limit: Limit, cost: float = 1) -> tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(limit.capacity), now))
+            allowed, tokens, retry_after = _take(_refill(tokens, updated, now, limit), limit, cost)
+            if len(self._buckets) >= self.maxsize:
+                # Se descarta el bucket menos usado recientemente (orden de inserción).
+                self._buckets.pop(next(iter(self._buckets)))
+            self._buckets[key] = (tokens, now)
+        return allowed, retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBackend:
+    """
+    Buckets compartidos entre workers en un archivo SQLite local. Cada consumo es una
+    transacción ``BEGIN IMMEDIATE``, que serializa a los escritores sin tocar la base principal.
+    """
+
+    _SWEEP_EVERY = 1000
+
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._calls = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def consume(self, key: str, limit: Limit, cost: float = 1) -> tuple[bool, float]:
+        # Reloj de pared: los workers no comparten el reloj monotónico.
+        now = time.time()
+        conn = self._conn
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            # Archivo bloqueado más allá del timeout: no se castiga al cliente por ello.
+            return True, 0.0
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row is not None else (float(limit.capacity), now)
+            allowed, tokens, retry_after = _take(_refill(tokens, updated, now, limit), limit, cost)
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens,"
+                " updated = excluded.updated",
+                (key, tokens, now),
+            )
+            self._calls += 1
+            if self._calls % self._SWEEP_EVERY == 0:
+                self._sweep(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+    @staticmethod
+    def _sweep(conn: sqlite3.Connection, now: float) -> None:
+        # Un bucket sin uso por un día ya está lleno: borrarlo equivale a dejarlo igual.
+        conn.execute("DELETE FROM buckets WHERE updated < ?", (now - _PERIODS["day"],))
+
+    def reset(self) -> None:
+        self._conn.execute("DELETE FROM buckets")
+
+
+def create_backend(storage: str | None):
+    """``"memory"`` (por defecto) o ``"sqlite:///ruta/al/archivo.db"``."""
+    if not storage or storage == "memory":
+        return MemoryBackend()
+    if storage.startswith("sqlite:///"):
+        return SQLiteBackend(storage[len("sqlite:///"):])
+    raise ValueError(f"Backend de rate limit no soportado: {storage!r}")
+
+
+class RateLimiter:
+    """
+    Limita solicitudes por IP y por usuario con token buckets, según reglas por endpoint o
+    blueprint. Se evalúa en ``before_request``, antes de cargar el usuario o tocar la base.
+    """
+
+    def __init__(self, app: Flask | None = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        rules = dict(DEFAULT_RULES)
+        rules.update(app.config.get("RATELIMIT_RULES") or {})
+        state = {
+            "enabled": app.config.get("RATELIMIT_ENABLED", True),
+            "rules": {name: Limit.parse(rule) for name, rule in rules.items() if rule},
+            "backend": create_backend(app.config.get("RATELIMIT_STORAGE", "memory")),
+        }
+        app.extensions[_EXTENSION_KEY] = state
+        app.before_request(self._check)
+
+    @staticmethod
+    def _state() -> dict:
+        return current_app.extensions[_EXTENSION_KEY]
+
+    @property
+    def backend(self):
+        return self._state()["backend"]
+
+    def limit_for(self, endpoint: str | None) -> tuple[str, Limit] | None:
+        if not endpoint:
+            return None
+        rules = self._state()["rules"]
+        if endpoint in rules:
+            return endpoint, rules[endpoint]
+        blueprint = endpoint.rpartition(".")[0]
+        if blueprint in rules:
+            return blueprint, rules[blueprint]
+        return None
+
+    @staticmethod
+    def _identities() -> list[str]:
+        identities = [f"ip:{request.remote_addr or 'unknown'}"]
+        # Se lee el id desde la sesión para no disparar el user_loader (y su consulta).
+        user_id = session.get("_user_id")
+        if user_id:
+            identities.append(f"user:{user_id}")
+        return identities
+
+    def _check(self):
+        state = self._state()
+        if not state["enabled"] or request.method == "OPTIONS":
+            return None
+        match = self.limit_for(request.endpoint)
+        if match is None:
+            return None
+        scope, limit = match
+
+        retry_after = 0.0
+        for identity in self._identities():
+            allowed, wait = state["backend"].consume(f"{scope}:{identity}", limit)
+            if not allowed:
+                retry_after = max(retry_after, wait)
+        if retry_after:
+            current_app.logger.warning(
+                "Rate limit excedido en %s para %s", scope, request.remote_addr
+            )
+            return self._too_many_requests(retry_after)
+        return None
+
+    @staticmethod
+    def _too_many_requests(retry_after: float):
+        response = current_app.make_response(
+            (
+                "Demasiadas solicitudes. Espera unos segundos e inténtalo nuevamente.",
+                429,
+                {"Content-Type": "text/plain; charset=utf-8"},
+            )
+        )
+        response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def reset(self) -> None:
+        self.backend.reset()
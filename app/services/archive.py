@@ -0,0 +1,190 @@
+# services/archive.py
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import and_, delete, func, insert, literal, or_, select
+from sqlalchemy.orm import aliased, joinedload
+
+from ..extensions import db
+from ..models import (
+    ArchivedEnrollment,
+    ArchivedOrder,
+    ArchivedSubscription,
+    Enrollment,
+    EnrollmentStatus,
+    Order,
+    PaymentStatus,
+    Subscription,
+    SubscriptionStatus,
+)
+
+# Tabla activa -> tabla de archivo (mismas columnas, más ``archived_at``)
+ARCHIVES = {
+    Subscription: ArchivedSubscription,
+    Order: ArchivedOrder,
+    Enrollment: ArchivedEnrollment,
+}
+
+
+def _last_change(model):
+    return func.coalesce(model.updated_at, model.created_at)
+
+
+def archivable_subscriptions(cutoff: datetime):
+    """Canceladas sin cambios desde ``cutoff`` y sin órdenes abiertas (un pago podría llegar aún)."""
+    open_order = (
+        select(Order.id)
+        .where(
+            Order.subscription_id == Subscription.id,
+            Order.payment_status.in_([PaymentStatus.pending, PaymentStatus.reserved]),
+        )
+        .exists()
+    )
+    return and_(
+        Subscription.status == SubscriptionStatus.canceled,
+        _last_change(Subscription) < cutoff,
+        ~open_order,
+    )
+
+
+def archivable_orders(cutoff: datetime):
+    """
+    Pagadas antes de ``cutoff``, salvo la última pagada de cada suscripción: de ella depende
+    el cálculo del próximo vencimiento (``subscription_due_info``).
+    """
+    newer = aliased(Order)
+    newer_paid = (
+        select(newer.id)
+        .where(
+            newer.subscription_id == Order.subscription_id,
+            newer.payment_status == PaymentStatus.paid,
+            or_(
+                newer.created_at > Order.created_at,
+                and_(newer.created_at == Order.created_at, newer.id > Order.id),
+            ),
+        )
+        .exists()
+    )
+    return and_(
+        Order.payment_status == PaymentStatus.paid,
+        Order.created_at < cutoff,
+        newer_paid,
+        ~Order.subscription_id.in_(select(Subscription.id).where(archivable_subscriptions(cutoff))),
+    )
+
+
+def archivable_enrollments(cutoff: datetime):
+    """Cambiadas o canceladas sin modificaciones desde ``cutoff``."""
+    return and_(
+        Enrollment.status.in_([EnrollmentStatus.changed, EnrollmentStatus.canceled]),
+        _last_change(Enrollment) < cutoff,
+        ~Enrollment.subscription_id.in_(select(Subscription.id).where(archivable_subscriptions(cutoff))),
+    )
+
+
+def _move(model, where, archived_at: datetime) -> int:
+    """Copia las filas de ``model`` que cumplen ``where`` a su archivo y las borra (sin commit)."""
+    table, archive = model.__table__, ARCHIVES[model].__table__
+    names = [column.name for column in table.columns]
+    db.session.execute(
+        insert(archive).from_select(
+            names + ["archived_at"],
+            select(*table.columns, literal(archived_at, archive.c.archived_at.type)).where(where),
+        )
+    )
+    return db.session.execute(delete(table).where(where)).rowcount
+
+
+def _chunks(model, condition, chunk_size: int):
+    """Ids que cumplen ``condition`` en bloques ordenados (keyset: no depende de que se borren)."""
+    after = 0
+    while True:
+        ids = db.session.scalars(
+            select(model.id).where(condition, model.id > after).order_by(model.id).limit(chunk_size)
+        ).all()
+        if not ids:
+            return
+        yield ids
+        after = ids[-1]
+
+
+def _lock(model, ids: list[int], condition) -> list[int]:
+    # Se revisa de nuevo dentro de la transacción del bloque: la fila pudo cambiar desde el SELECT.
+    return db.session.scalars(
+        select(model.id).where(model.id.in_(ids), condition).with_for_update()
+    ).all()
+
+
+def archive(
+    *,
+    retention_days: int,
+    chunk_size: int = 500,
+    dry_run: bool = False,
+    now: datetime | None = None,
+    progress: Callable[[str, int], None] | None = None,
+) -> dict[str, int]:
+    """
+    Mueve a las tablas ``archived_*`` lo que lleva más de ``retention_days`` días cerrado:
+    suscripciones canceladas (con todas sus órdenes y matrículas), órdenes pagadas antiguas y
+    matrículas cambiadas o canceladas. Cada bloque de ``chunk_size`` filas es una transacción,
+    y una suscripción se mueve junto con sus hijas: nunca queda una fila activa apuntando a
+    una archivada. Retorna filas movidas (o que se moverían, con ``dry_run``) por tabla.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=retention_days)
+    counts = {"subscriptions": 0, "orders": 0, "enrollments": 0}
+
+    def done(table: str, moved: int) -> None:
+        counts[table] += moved
+        if progress is not None and moved:
+            progress(table, counts[table])
+
+    subscriptions = archivable_subscriptions(cutoff)
+    for ids in _chunks(Subscription, subscriptions, chunk_size):
+        if dry_run:
+            done("orders", db.session.scalar(
+                select(func.count(Order.id)).where(Order.subscription_id.in_(ids))
+            ))
+            done("enrollments", db.session.scalar(
+                select(func.count(Enrollment.id)).where(Enrollment.subscription_id.in_(ids))
+            ))
+            done("subscriptions", len(ids))
+            continue
+        ids = _lock(Subscription, ids, subscriptions)
+        # Hijas primero: la FK de las tablas activas exige que la suscripción exista hasta el final
+        done("orders", _move(Order, Order.subscription_id.in_(ids), now))
+        done("enrollments", _move(Enrollment, Enrollment.subscription_id.in_(ids), now))
+        done("subscriptions", _move(Subscription, Subscription.id.in_(ids), now))
+        db.session.commit()
+
+    for model, table, condition in (
+        (Order, "orders", archivable_orders(cutoff)),
+        (Enrollment, "enrollments", archivable_enrollments(cutoff)),
+    ):
+        for ids in _chunks(model, condition, chunk_size):
+            if dry_run:
+                done(table, len(ids))
+                continue
+            done(table, _move(model, model.id.in_(_lock(model, ids, condition)), now))
+            db.session.commit()
+
+    if dry_run:
+        db.session.rollback()
+    return counts
+
+
+def subscription_history(subscription_id: int) -> dict:
+    """Órdenes y matrículas archivadas de una suscripción (activa o archivada)."""
+    return {
+        "orders": db.session.scalars(
+            select(ArchivedOrder)
+            .where(ArchivedOrder.subscription_id == subscription_id)
+            .order_by(ArchivedOrder.created_at.desc(), ArchivedOrder.id.desc())
+        ).all(),
+        "enrollments": db.session.scalars(
+            select(ArchivedEnrollment)
+            .options(joinedload(ArchivedEnrollment.child), joinedload(ArchivedEnrollment.workshop))
+            .where(ArchivedEnrollment.subscription_id == subscription_id)
+            .order_by(ArchivedEnrollment.id)
+        ).all(),
+    }
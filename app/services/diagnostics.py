@@ -0,0 +1,67 @@
+# services/diagnostics.py
+import time
+
+from flask import Flask, current_app
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..extensions import db
+
+
+def warm_pool(app: Flask, connections: int | None = None) -> int:
+    """
+    Abre ``connections`` conexiones (``DB_POOL_WARMUP`` por defecto) y las devuelve al pool,
+    para que las primeras solicitudes del worker no paguen el handshake con MySQL.
+    Retorna cuántas quedaron abiertas; en SQLite no hace nada.
+    """
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == "sqlite":
+            return 0
+        wanted = app.config.get("DB_POOL_WARMUP", 2) if connections is None else connections
+        size = engine.pool.size() if hasattr(engine.pool, "size") else wanted
+        opened = []
+        try:
+            for _ in range(min(wanted, size)):
+                connection = engine.connect()
+                opened.append(connection)
+                connection.execute(text("SELECT 1"))
+        except SQLAlchemyError as exc:
+            app.logger.warning("No se pudo precalentar el pool de conexiones: %s", exc)
+        finally:
+            for connection in opened:
+                connection.close()
+        return len(opened)
+
+
+def pool_status() -> dict:
+    """Estado del pool del motor actual y latencia de un ``SELECT 1``."""
+    engine = db.engine
+    pool = engine.pool
+    status = {
+        "dialect": engine.dialect.name,
+        "driver": engine.dialect.driver,
+        "url": engine.url.render_as_string(hide_password=True),
+        "pool_class": type(pool).__name__,
+        "options": {
+            key: value
+            for key, value in current_app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}).items()
+            if key != "connect_args"
+        },
+    }
+    for name in ("size", "checkedout", "checkedin", "overflow"):
+        getter = getattr(pool, name, None)
+        status[name] = getter() if callable(getter) else None
+    status["recycle"] = getattr(pool, "_recycle", None)
+    status["pre_ping"] = getattr(pool, "_pre_ping", None)
+
+    started = time.perf_counter()
+    try:
+        db.session.execute(text("SELECT 1"))
+        status["ping_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        status["error"] = None
+    except SQLAlchemyError as exc:
+        db.session.rollback()
+        status["ping_ms"] = None
+        status["error"] = str(exc.__cause__ or exc)
+    return status
@@ -0,0 +1,166 @@
+# services/google_oauth.py
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from flask import Flask
+from requests.adapters import HTTPAdapter
+
+from ..observability.metrics import track_outbound
+
+try:  # pragma: no cover - dependencia opcional
+    from authlib.integrations.requests_client import OAuth2Session
+except ModuleNotFoundError:  # pragma: no cover - sin Authlib no hay cliente que calentar
+    OAuth2Session = None
+
+_EXTENSION_KEY = "google_oauth_documents"
+
+
+class _PersistentAdapter(HTTPAdapter):
+    """Adapter compartido: Authlib cierra su sesión tras cada llamada, pero el pool debe vivir."""
+
+    def close(self):
+        return None
+
+
+_adapter = _PersistentAdapter(pool_connections=4, pool_maxsize=10)
+_http = requests.Session()
+_http.mount("https://", _adapter)
+_http.mount("http://", _adapter)
+
+
+_OPERATIONS = {
+    "openid-configuration": "discovery",
+    "certs": "jwks",
+    "token": "token",
+    "userinfo": "userinfo",
+}
+
+
+def _operation_for(url: str) -> str:
+    """Etiqueta de métricas para una URL de Google (discovery, jwks, token, userinfo)."""
+    return _OPERATIONS.get(urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1], "other")
+
+
+if OAuth2Session is not None:
+
+    class KeepAliveOAuth2Session(OAuth2Session):
+        """OAuth2Session que reutiliza conexiones HTTP entre requests (token, userinfo, JWKS)."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.mount("https://", _adapter)
+            self.mount("http://", _adapter)
+
+        def request(self, method, url, *args, **kwargs):
+            with track_outbound("google", _operation_for(url)):
+                return super().request(method, url, *args, **kwargs)
+
+else:  # pragma: no cover
+    KeepAliveOAuth2Session = None
+
+
+def fetch_json(url: str, timeout: float) -> dict:
+    with track_outbound("google", _operation_for(url)):
+        resp = _http.get(url, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _cache_dir(app: Flask) -> Path:
+    return Path(app.config.get("GOOGLE_OAUTH_CACHE_DIR") or Path(app.instance_path) / "oauth_cache")
+
+
+def _read_disk(path: Path):
+    try:
+        with path.open(encoding="utf-8") as fh:
+            cached = json.load(fh)
+        return cached["fetched_at"], cached["data"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_disk(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as fh:
+        json.dump({"fetched_at": time.time(), "data": data}, fh)
+    os.replace(tmp, path)
+
+
+def load_document(app: Flask, name: str, url: str, *, allow_network: bool = True) -> dict | None:
+    """
+    Devuelve un documento JSON (discovery o JWKS) desde memoria, disco o red, en ese orden.
+    Si la red falla se usa la copia en disco aunque esté vencida.
+    """
+    ttl = app.config.get("GOOGLE_OAUTH_CACHE_TTL", 6 * 60 * 60)
+    memory = app.extensions.setdefault(_EXTENSION_KEY, {})
+    now = time.time()
+
+    cached = memory.get(name)
+    if cached and now - cached[0] < ttl:
+        return cached[1]
+
+    path = _cache_dir(app) / f"{name}.json"
+    on_disk = _read_disk(path)
+    if on_disk and now - on_disk[0] < ttl:
+        memory[name] = on_disk
+        return on_disk[1]
+
+    if allow_network:
+        try:
+            data = fetch_json(url, app.config.get("GOOGLE_HTTP_TIMEOUT", 10))
+        except (requests.RequestException, ValueError) as exc:
+            app.logger.warning("No se pudo descargar %s (%s): %s", name, url, exc)
+        else:
+            memory[name] = (now, data)
+            try:
+                _write_disk(path, data)
+            except OSError as exc:
+                app.logger.warning("No se pudo guardar %s en caché: %s", name, exc)
+            return data
+
+    if on_disk:
+        memory[name] = on_disk
+        return on_disk[1]
+    return None
+
+
+def prime_client(app: Flask, client, *, allow_network: bool = True) -> bool:
+    """
+    Carga discovery y JWKS en ``client.server_metadata`` para que Authlib no los descargue
+    durante el login. Retorna False si no hay metadatos disponibles.
+    """
+    if client is None or not hasattr(client, "server_metadata"):
+        return False
+    if KeepAliveOAuth2Session is not None:
+        client.client_cls = KeepAliveOAuth2Session
+
+    discovery_url = app.config.get("GOOGLE_DISCOVERY_URL")
+    if not discovery_url:
+        return False
+    metadata = load_document(app, "google-discovery", discovery_url, allow_network=allow_network)
+    if not metadata:
+        return False
+    jwks = None
+    if metadata.get("jwks_uri"):
+        jwks = load_document(app, "google-jwks", metadata["jwks_uri"], allow_network=allow_network)
+
+    client.server_metadata.update(metadata)
+    if jwks:
+        client.server_metadata["jwks"] = jwks
+    # Authlib no vuelve a pedir el discovery si existe ``_loaded_at``.
+    client.server_metadata["_loaded_at"] = time.time()
+    app.extensions.setdefault(_EXTENSION_KEY, {})["_primed_at"] = time.time()
+    return True
+
+
+def ensure_fresh(app: Flask, client) -> None:
+    """Refresca los metadatos cargados en el cliente cuando vence el TTL."""
+    ttl = app.config.get("GOOGLE_OAUTH_CACHE_TTL", 6 * 60 * 60)
+    primed_at = app.extensions.get(_EXTENSION_KEY, {}).get("_primed_at")
+    if primed_at is None or time.time() - primed_at >= ttl:
+        prime_client(app, client)
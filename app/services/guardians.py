@@ -2,7 +2,7 @@
 from datetime import date
 
 from ..extensions import db
-from ..models import Child, Guardian, KnowledgeLevel, User
+from ..models import ArchivedEnrollment, Child, Guardian, KnowledgeLevel, User
 
 # -------- Guardian --------
 def create_guardian(user: User, phone: str, allow_whatsapp_group: bool = False) -> Guardian:
@@ -43,4 +43,6 @@ def update_child(child: Child, name: str = None, birthdate: date = None,
     return child
 
 def delete_child(child: Child):
+    # Las matrículas archivadas no están en ``child.enrollments``: se borran aparte
+    ArchivedEnrollment.query.filter_by(child_id=child.id).delete(synchronize_session=False)
     db.session.delete(child)
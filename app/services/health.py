@@ -0,0 +1,115 @@
+# services/health.py
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..extensions import db
+
+_EXTENSION_KEY = "readiness"
+
+
+def _state(app: Flask) -> dict:
+    return app.extensions.setdefault(_EXTENSION_KEY, {
+        "lock": threading.Lock(),
+        "report": None,
+        "checked_at": 0.0,
+        "heads": None,
+    })
+
+
+def _script_heads(app: Flask) -> tuple[str, ...]:
+    # Las migraciones no cambian con el proceso en marcha: se leen una sola vez.
+    state = _state(app)
+    if state["heads"] is None:
+        from alembic.config import Config as AlembicConfig
+        from alembic.script import ScriptDirectory
+
+        migrate_ext = app.extensions.get("migrate")
+        directory = migrate_ext.directory if migrate_ext is not None else "migrations"
+        config = AlembicConfig()
+        config.set_main_option("script_location", directory)
+        try:
+            state["heads"] = tuple(ScriptDirectory.from_config(config).get_heads())
+        except Exception:  # sin carpeta versions/ o scripts ilegibles
+            state["heads"] = ()
+    return state["heads"]
+
+
+def _check_database(app: Flask) -> tuple[dict, dict]:
+    from alembic.runtime.migration import MigrationContext
+
+    started = time.perf_counter()
+    try:
+        with db.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            database = {"status": "ok", "ms": round((time.perf_counter() - started) * 1000, 2)}
+            heads = _script_heads(app)
+            if not heads:
+                return database, {"status": "skipped"}
+            current = tuple(MigrationContext.configure(connection).get_current_heads())
+    except SQLAlchemyError as exc:
+        return {"status": "error", "error": type(exc).__name__}, {"status": "unknown"}
+
+    migrations = {"status": "ok" if set(current) == set(heads) else "pending", "current": sorted(current)}
+    if migrations["status"] == "pending":
+        migrations["heads"] = sorted(heads)
+    return database, migrations
+
+
+def _tcp_reachable(host: str | None, port: int | None, timeout: float) -> bool:
+    if not host or not port:
+        return False
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def _transbank_host(app: Flask) -> str:
+    from transbank.common.integration_type import webpay_host
+    from transbank.common.options import IntegrationType
+
+    env = (app.config.get("TBK_ENV") or "integration").lower()
+    integration_type = IntegrationType.TEST if env == "integration" else IntegrationType.LIVE
+    return urlparse(webpay_host(integration_type)).hostname
+
+
+def compute_readiness(app: Flask) -> dict:
+    """
+    Base de datos (``SELECT 1``) y migraciones en head determinan si el worker está listo.
+    Correo y Transbank (opcionales) solo se informan: una caída externa no debe sacar a
+    todos los workers del balanceador.
+    """
+    database, migrations = _check_database(app)
+    report = {
+        "ready": database["status"] == "ok" and migrations["status"] in ("ok", "skipped"),
+        "checks": {"database": database, "migrations": migrations},
+    }
+    timeout = app.config.get("READYZ_TCP_TIMEOUT", 1.0)
+    if app.config.get("READYZ_CHECK_MAIL", False):
+        report["checks"]["mail"] = {
+            "reachable": _tcp_reachable(app.config.get("MAIL_SERVER"), app.config.get("MAIL_PORT"), timeout)
+        }
+    if app.config.get("READYZ_CHECK_TRANSBANK", False):
+        report["checks"]["transbank"] = {"reachable": _tcp_reachable(_transbank_host(app), 443, timeout)}
+    return report
+
+
+def readiness(app: Flask) -> dict:
+    """Resultado de ``compute_readiness`` cacheado ``READYZ_CACHE_SECONDS`` por proceso."""
+    state = _state(app)
+    ttl = app.config.get("READYZ_CACHE_SECONDS", 2.0)
+    if state["report"] is not None and time.monotonic() - state["checked_at"] < ttl:
+        return state["report"]
+    with state["lock"]:
+        # Sondas concurrentes: solo una consulta la base, las demás usan su resultado.
+        if state["report"] is None or time.monotonic() - state["checked_at"] >= ttl:
+            state["report"] = compute_readiness(app)
+            state["checked_at"] = time.monotonic()
+        return state["report"]
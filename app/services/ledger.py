@@ -0,0 +1,159 @@
+# services/ledger.py
+from collections import defaultdict
+from datetime import date, datetime, timezone
+
+from sqlalchemy import insert, select
+
+from .upserts import upsert
+from ..extensions import db
+from ..models import Order, PaymentEvent, PaymentStatus, RevenueRollup
+
+GRANULARITIES = ("day", "month")
+
+
+def _period_start(granularity: str, when: date) -> date:
+    return when.replace(day=1) if granularity == "month" else when
+
+
+def _revenue_delta(from_status: PaymentStatus | None, to_status: PaymentStatus) -> int:
+    """+1 cuando una orden pasa a pagada, -1 cuando deja de estarlo, 0 en otro caso."""
+    if to_status == PaymentStatus.paid and from_status != PaymentStatus.paid:
+        return 1
+    if from_status == PaymentStatus.paid and to_status != PaymentStatus.paid:
+        return -1
+    return 0
+
+
+def _apply_rollup_deltas(deltas: dict) -> None:
+    """``deltas``: {(granularity, period_start, method): [monto, cantidad]}."""
+    table = RevenueRollup.__table__
+    for (granularity, period_start, method), (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+        upsert(
+            table,
+            values={
+                "granularity": granularity,
+                "period_start": period_start,
+                "payment_method": method,
+                "paid_amount_clp": amount,
+                "paid_count": count,
+            },
+            conflict_columns=["granularity", "period_start", "payment_method"],
+            update_values={
+                "paid_amount_clp": table.c.paid_amount_clp + amount,
+                "paid_count": table.c.paid_count + count,
+            },
+        )
+
+
+def record_transitions(events: list[dict]) -> None:
+    """
+    Inserta eventos de pago y actualiza los acumulados diarios/mensuales en la misma
+    transacción. Cada evento es un dict con las columnas de ``PaymentEvent``.
+    """
+    events = [e for e in events if e["from_status"] != e["to_status"]]
+    if not events:
+        return
+    now = datetime.now(timezone.utc)
+    for event in events:
+        event.setdefault("occurred_at", now)
+    db.session.execute(insert(PaymentEvent), events)
+
+    deltas = defaultdict(lambda: [0, 0])
+    for event in events:
+        sign = _revenue_delta(event["from_status"], event["to_status"])
+        if not sign:
+            continue
+        day = event["occurred_at"].date()
+        for granularity in GRANULARITIES:
+            key = (granularity, _period_start(granularity, day), event["payment_method"])
+            deltas[key][0] += sign * event["amount_clp"]
+            deltas[key][1] += sign
+    _apply_rollup_deltas(deltas)
+
+
+def record_transition(order: Order, from_status: PaymentStatus | None,
+                      to_status: PaymentStatus) -> None:
+    if from_status == to_status:
+        return
+    if order.id is None:
+        db.session.flush()
+    record_transitions([{
+        "order_id": order.id,
+        "subscription_id": order.subscription_id,
+        "from_status": from_status,
+        "to_status": to_status,
+        "payment_method": order.payment_method,
+        "amount_clp": order.amount_clp,
+    }])
+
+
+def revenue_series(granularity: str, start: date, end: date) -> list[dict]:
+    """Ingresos netos por período entre ``start`` y ``end`` (ambos inclusive), desde los acumulados."""
+    rows = (
+        RevenueRollup.query.filter(
+            RevenueRollup.granularity == granularity,
+            RevenueRollup.period_start >= _period_start(granularity, start),
+            RevenueRollup.period_start <= end,
+        )
+        .order_by(RevenueRollup.period_start)
+        .all()
+    )
+    series = {}
+    for row in rows:
+        item = series.setdefault(
+            row.period_start,
+            {"period_start": row.period_start, "total_clp": 0, "count": 0, "by_method": {}},
+        )
+        item["total_clp"] += row.paid_amount_clp
+        item["count"] += row.paid_count
+        item["by_method"][row.payment_method] = row.paid_amount_clp
+    return list(series.values())
+
+
+def backfill_paid_orders() -> int:
+    """Registra un evento inicial para órdenes pagadas que aún no tienen historial."""
+    with_events = select(PaymentEvent.order_id).distinct()
+    orders = (
+        Order.query.filter(Order.payment_status == PaymentStatus.paid, Order.id.not_in(with_events))
+        .all()
+    )
+    record_transitions([
+        {
+            "order_id": order.id,
+            "subscription_id": order.subscription_id,
+            "from_status": None,
+            "to_status": PaymentStatus.paid,
+            "payment_method": order.payment_method,
+            "amount_clp": order.amount_clp,
+            "occurred_at": order.updated_at or order.created_at,
+        }
+        for order in orders
+    ])
+    return len(orders)
+
+
+def rebuild_rollups() -> int:
+    """Recalcula todos los acumulados a partir de ``payment_events``."""
+    db.session.query(RevenueRollup).delete(synchronize_session=False)
+    deltas = defaultdict(lambda: [0, 0])
+    events = db.session.execute(
+        select(
+            PaymentEvent.from_status,
+            PaymentEvent.to_status,
+            PaymentEvent.payment_method,
+            PaymentEvent.amount_clp,
+            PaymentEvent.occurred_at,
+        ).execution_options(yield_per=1000)
+    )
+    for from_status, to_status, method, amount, occurred_at in events:
+        sign = _revenue_delta(from_status, to_status)
+        if not sign:
+            continue
+        for granularity in GRANULARITIES:
+            key = (granularity, _period_start(granularity, occurred_at.date()), method)
+            deltas[key][0] += sign * amount
+            deltas[key][1] += sign
+    _apply_rollup_deltas(deltas)
+    return len(deltas)
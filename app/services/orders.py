@@ -1,38 +1,155 @@
 # services/orders.py
-from .subscriptions import activate_subscription
+import json
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import joinedload, selectinload
+
+from . import ledger, portal
+from .subscriptions import activate_subscription, add_months, cycle_months
 from ..models import (
+    Guardian,
     Order,
     PaymentMethod,
     PaymentStatus,
     Subscription,
     SubscriptionStatus,
     BillingCycle,
+    EnrollmentStatus,
 )
 from ..extensions import db
 
+def build_order_snapshot(subscription: Subscription, amount_clp: int) -> dict:
+    """
+    Foto inmutable de la orden al momento de crearla (plan, ciclo, montos, apoderado,
+    niños y talleres). Permite mostrar el detalle/comprobante sin cargar relaciones.
+    """
+    plan = subscription.plan
+    guardian = subscription.guardian
+    user = guardian.user
+    quarterly = subscription.billing_cycle == BillingCycle.quarterly
+    months = 3 if quarterly else 1
+
+    workshops = []
+    for enrollment in subscription.enrollments:
+        if enrollment.status != EnrollmentStatus.active:
+            continue
+        workshop = enrollment.workshop
+        entry = {
+            "name": workshop.name,
+            "day": workshop.day_of_week.value,
+            "start": workshop.start_time.strftime("%H:%M") if workshop.start_time else None,
+        }
+        if entry not in workshops:
+            workshops.append(entry)
+
+    return {
+        "v": 1,
+        "plan": {"id": plan.id, "name": plan.name},
+        "cycle": {"code": subscription.billing_cycle.name, "label": subscription.billing_cycle.value},
+        "amount": {
+            "monthly": plan.price_monthly,
+            "months": months,
+            "subtotal": plan.price_monthly * months,
+            "discount_pct": plan.quarterly_discount_pct if quarterly else 0,
+            "total": amount_clp,
+        },
+        "guardian": {"user_id": user.id, "name": user.name, "email": user.email},
+        "children": [child.name for child in guardian.children],
+        "workshops": workshops,
+    }
+
+
 def create_order(subscription: Subscription, amount_clp: int,
                  method: PaymentMethod = PaymentMethod.in_person) -> Order:
+    snapshot = build_order_snapshot(subscription, amount_clp)
     order = Order(
         subscription=subscription,
         amount_clp=amount_clp,
         payment_method=method,
-        payment_status=PaymentStatus.pending
+        payment_status=PaymentStatus.pending,
+        detail=json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")),
     )
     db.session.add(order)
     return order
 
 def mark_order_paid(order: Order):
+    ledger.record_transition(order, order.payment_status, PaymentStatus.paid)
     order.payment_status = PaymentStatus.paid
     if order.subscription.status.name == "pending":
         activate_subscription(order.subscription)  # solo cambia el estado
     return order
 
+def confirm_orders_bulk(order_ids) -> dict[int, str]:
+    """
+    Marca como pagadas varias órdenes con un único UPDATE y activa, con un segundo UPDATE,
+    las suscripciones pendientes asociadas. No hace commit: el llamador controla la transacción.
+
+    Retorna ``{order_id: "confirmed" | "already_paid" | "not_found"}``.
+    """
+    ids = sorted({int(order_id) for order_id in order_ids})
+    results = {order_id: "not_found" for order_id in ids}
+    if not ids:
+        return results
+
+    rows = db.session.execute(
+        select(
+            Order.id,
+            Order.subscription_id,
+            Order.payment_status,
+            Order.payment_method,
+            Order.amount_clp,
+        ).where(Order.id.in_(ids))
+    ).all()
+    to_confirm = []
+    events = []
+    for order_id, subscription_id, status, method, amount in rows:
+        if status == PaymentStatus.paid:
+            results[order_id] = "already_paid"
+            continue
+        results[order_id] = "confirmed"
+        to_confirm.append(order_id)
+        events.append({
+            "order_id": order_id,
+            "subscription_id": subscription_id,
+            "from_status": status,
+            "to_status": PaymentStatus.paid,
+            "payment_method": method,
+            "amount_clp": amount,
+        })
+
+    if to_confirm:
+        now = datetime.now(timezone.utc)
+        db.session.execute(
+            update(Order)
+            .where(Order.id.in_(to_confirm), Order.payment_status != PaymentStatus.paid)
+            .values(payment_status=PaymentStatus.paid, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(Subscription)
+            .where(
+                Subscription.status == SubscriptionStatus.pending,
+                Subscription.id.in_(
+                    select(Order.subscription_id).where(Order.id.in_(to_confirm))
+                ),
+            )
+            .values(status=SubscriptionStatus.active, end_date=None, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        ledger.record_transitions(events)
+        # Los UPDATE masivos no pasan por el flush: se invalida el resumen del portal a mano.
+        portal.invalidate_subscriptions({event["subscription_id"] for event in events})
+    return results
+
 def mark_order_failed(order: Order):
+    ledger.record_transition(order, order.payment_status, PaymentStatus.failed)
     order.payment_status = PaymentStatus.failed
     return order
 
 def mark_order_pending(order: Order):
     """Reabre la orden (por ejemplo, si se confirmó por error)."""
+    ledger.record_transition(order, order.payment_status, PaymentStatus.pending)
     order.payment_status = PaymentStatus.pending
     return order
 
@@ -49,6 +166,89 @@ def calculate_subscription_amount(subscription: Subscription) -> int:
     )
 
 
+def subscription_due_info(subscription: Subscription, today: date | None = None) -> dict | None:
+    """
+    Si la suscripción activa ya debe emitir una nueva orden (sin órdenes abiertas y con el ciclo
+    vencido), retorna fecha de vencimiento, días de atraso, monto y método sugerido.
+    """
+    if subscription.status != SubscriptionStatus.active:
+        return None
+
+    orders = sorted(subscription.orders, key=lambda o: o.created_at, reverse=True)
+    pending_like = next(
+        (
+            order
+            for order in orders
+            if order.payment_status in {PaymentStatus.pending, PaymentStatus.reserved}
+        ),
+        None,
+    )
+    if pending_like:
+        return None
+
+    today = today or date.today()
+    months = cycle_months(subscription.billing_cycle)
+    last_paid = next(
+        (order for order in orders if order.payment_status == PaymentStatus.paid), None
+    )
+
+    if last_paid:
+        due_date = add_months(last_paid.created_at.date(), months)
+        if due_date > today:
+            return None
+        recommended_method = last_paid.payment_method
+        last_order = last_paid
+        reason = (
+            f"Última orden pagada el {last_paid.created_at.strftime('%d-%m-%Y')}"
+        )
+    elif orders:
+        last_order = orders[0]
+        due_date = last_order.created_at.date()
+        if due_date > today:
+            return None
+        recommended_method = last_order.payment_method
+        reason = (
+            f"Última orden {last_order.payment_status.value.lower()} el "
+            f"{last_order.created_at.strftime('%d-%m-%Y')}"
+        )
+    else:
+        due_date = subscription.start_date or today
+        if due_date > today:
+            return None
+        last_order = None
+        recommended_method = PaymentMethod.transfer
+        reason = "La suscripción no tiene órdenes registradas."
+
+    days_overdue = max(0, (today - due_date).days)
+    amount = calculate_subscription_amount(subscription)
+
+    return {
+        "subscription": subscription,
+        "due_date": due_date,
+        "days_overdue": days_overdue,
+        "recommended_method": recommended_method,
+        "amount_clp": amount,
+        "last_order": last_order,
+        "reason": reason,
+    }
+
+
+def subscriptions_due(today: date | None = None) -> list[dict]:
+    """``subscription_due_info`` de todas las suscripciones activas vencidas, por fecha de vencimiento."""
+    active = db.session.scalars(
+        select(Subscription)
+        .options(
+            joinedload(Subscription.guardian).joinedload(Guardian.user),
+            joinedload(Subscription.plan),
+            selectinload(Subscription.orders),
+        )
+        .where(Subscription.status == SubscriptionStatus.active)
+    ).unique().all()
+    due = [info for info in (subscription_due_info(sub, today) for sub in active) if info is not None]
+    due.sort(key=lambda item: (item["due_date"], item["subscription"].id))
+    return due
+
+
 def create_billing_cycle_order(
     subscription: Subscription, payment_method: PaymentMethod | None = None
 ) -> Order:
@@ -0,0 +1,216 @@
+# services/outbox.py
+import json
+import os
+import secrets
+import socket
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, has_request_context, render_template, url_for
+from flask_mail import Message
+from sqlalchemy import and_, or_, select, update
+
+from .. import mailer
+from ..extensions import db
+from ..models import Order, OutboxMessage, OutboxStatus
+
+# kind -> (plantilla sin extensión en templates/emails/, asunto)
+KINDS = {
+    "inscription_confirmation": ("emails/inscription_confirmation", "Inscripción recibida – {plan}"),
+    "payment_confirmation": ("emails/payment_confirmation", "Pago confirmado – {plan}"),
+}
+
+
+def enqueue(kind: str, recipient: str, payload: dict, *, dedupe_key: str | None = None) -> OutboxMessage | None:
+    """
+    Agrega el correo a la sesión actual, sin commit: se guarda (o se descarta) junto con el
+    cambio que lo origina. Retorna ``None`` si ya existe uno con la misma ``dedupe_key``.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Tipo de correo desconocido: {kind}")
+    if dedupe_key is not None:
+        exists = db.session.execute(
+            select(OutboxMessage.id).where(OutboxMessage.dedupe_key == dedupe_key)
+        ).first()
+        if exists is not None:
+            return None
+    message = OutboxMessage(
+        kind=kind,
+        recipient=recipient,
+        payload=json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
+        dedupe_key=dedupe_key,
+    )
+    db.session.add(message)
+    return message
+
+
+def _order_payload(order: Order) -> dict:
+    # Desde el snapshot de la orden: el envío no necesita volver a cargar relaciones.
+    snapshot = order.snapshot or {}
+    guardian = snapshot.get("guardian") or {}
+    payload = {
+        "order_id": order.id,
+        "guardian_name": guardian.get("name"),
+        "plan": (snapshot.get("plan") or {}).get("name") or order.subscription.plan.name,
+        "cycle": (snapshot.get("cycle") or {}).get("label"),
+        "amount_clp": order.amount_clp,
+        "payment_method": order.payment_method.value,
+        "payment_status": order.payment_status.value,
+        "children": snapshot.get("children", []),
+        "workshops": snapshot.get("workshops", []),
+        "portal_url": None,
+    }
+    if has_request_context():
+        payload["portal_url"] = url_for("portal.dashboard", _external=True)
+    return payload
+
+
+def _order_recipient(order: Order) -> str:
+    guardian = (order.snapshot or {}).get("guardian") or {}
+    return guardian.get("email") or order.subscription.guardian.user.email
+
+
+def _flush_order(order: Order) -> None:
+    # Recién creada la orden aún no tiene id: sin flush, el payload y la dedupe_key
+    # quedarían con None (y todas las inscripciones compartirían "inscription:None").
+    if order.id is None or order.subscription_id is None:
+        db.session.flush()
+
+
+def enqueue_inscription_confirmation(order: Order) -> OutboxMessage | None:
+    _flush_order(order)
+    return enqueue(
+        "inscription_confirmation",
+        _order_recipient(order),
+        _order_payload(order),
+        dedupe_key=f"inscription:{order.subscription_id}",
+    )
+
+
+def enqueue_payment_confirmation(order: Order) -> OutboxMessage | None:
+    _flush_order(order)
+    return enqueue(
+        "payment_confirmation",
+        _order_recipient(order),
+        _order_payload(order),
+        dedupe_key=f"payment:{order.id}",
+    )
+
+
+def render(message: OutboxMessage) -> Message:
+    template, subject = KINDS[message.kind]
+    context = message.context
+    return Message(
+        subject.format(**context),
+        recipients=[message.recipient],
+        body=render_template(f"{template}.txt", **context),
+        html=render_template(f"{template}.html", **context),
+    )
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_batch(limit: int, *, worker: str | None = None, lease_seconds: int = 300) -> list[OutboxMessage]:
+    """
+    Reclama hasta ``limit`` correos disponibles (o reclamados hace más de ``lease_seconds``,
+    de un drenador que murió). ``SKIP LOCKED`` evita que dos drenadores se bloqueen entre sí
+    donde el motor lo soporta; el UPDATE condicionado garantiza que cada fila quede en uno solo.
+    """
+    now = datetime.now(timezone.utc)
+    claimable = or_(
+        and_(OutboxMessage.status == OutboxStatus.pending, OutboxMessage.available_at <= now),
+        and_(
+            OutboxMessage.status == OutboxStatus.processing,
+            OutboxMessage.claimed_at < now - timedelta(seconds=lease_seconds),
+        ),
+    )
+    ids = db.session.scalars(
+        select(OutboxMessage.id)
+        .where(claimable)
+        .order_by(OutboxMessage.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        db.session.commit()
+        return []
+
+    token = f"{worker or _worker_id()}:{secrets.token_hex(4)}"
+    db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(ids), claimable)
+        .values(status=OutboxStatus.processing, claimed_by=token, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return db.session.scalars(
+        select(OutboxMessage).where(OutboxMessage.claimed_by == token).order_by(OutboxMessage.id)
+    ).all()
+
+
+def _schedule_retry(message: OutboxMessage, error: Exception, max_attempts: int, backoff: float) -> str:
+    message.attempts += 1
+    message.last_error = str(error)[:1000]
+    message.claimed_by = None
+    message.claimed_at = None
+    if message.attempts >= max_attempts:
+        message.status = OutboxStatus.failed
+        return "failed"
+    message.status = OutboxStatus.pending
+    delay = min(backoff * 2 ** (message.attempts - 1), 3600)
+    message.available_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    return "retried"
+
+
+def drain(
+    *,
+    batch_size: int = 50,
+    max_batches: int | None = None,
+    worker: str | None = None,
+    lease_seconds: int = 300,
+    max_attempts: int = 5,
+    backoff: float = 60.0,
+) -> dict[str, int]:
+    """
+    Envía los correos pendientes por lotes sobre una sola conexión SMTP. Cada envío se confirma
+    con su propio commit, así un corte a mitad de lote solo puede repetir el correo en curso.
+    Retorna ``{"sent", "retried", "failed"}``.
+    """
+    app = current_app._get_current_object()
+    counts = {"sent": 0, "retried": 0, "failed": 0}
+    connection = None
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            claimed = claim_batch(batch_size, worker=worker, lease_seconds=lease_seconds)
+            if not claimed:
+                break
+            batches += 1
+            for message in claimed:
+                try:
+                    if connection is None:
+                        connection = mailer.connect(app)
+                        connection.__enter__()
+                    connection.send(render(message))
+                except mailer.SEND_ERRORS as exc:
+                    if mailer.is_permanent(exc):
+                        outcome = _schedule_retry(message, exc, 1, backoff)
+                    else:
+                        if connection is not None:
+                            connection.close()
+                        connection = None
+                        outcome = _schedule_retry(message, exc, max_attempts, backoff)
+                except Exception as exc:  # plantilla rota, datos inválidos
+                    app.logger.exception("Outbox: no se pudo enviar el mensaje %s", message.id)
+                    outcome = _schedule_retry(message, exc, 1, backoff)
+                else:
+                    message.status = OutboxStatus.sent
+                    message.sent_at = datetime.now(timezone.utc)
+                    outcome = "sent"
+                counts[outcome] += 1
+                db.session.commit()
+    finally:
+        if connection is not None:
+            connection.close()
+    return counts
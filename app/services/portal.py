@@ -0,0 +1,152 @@
+# services/portal.py
+from datetime import date
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, contains_eager
+
+from ..cache import TTLCache
+from ..extensions import db
+from ..models import Order, PaymentStatus, Plan, Subscription, SubscriptionStatus
+from .subscriptions import add_months, cycle_months
+
+_EXTENSION_KEY = "portal_summary_cache"
+
+OPEN_STATUSES = (PaymentStatus.pending, PaymentStatus.reserved)
+
+
+def orders_page(guardian_id: int, page: int = 1, per_page: int = 20):
+    """Página de órdenes del apoderado con suscripción y plan cargados en la misma consulta."""
+    stmt = (
+        select(Order)
+        .join(Order.subscription)
+        .where(Subscription.guardian_id == guardian_id)
+        .options(
+            contains_eager(Order.subscription).joinedload(Subscription.plan)
+        )
+        .order_by(Order.created_at.desc(), Order.id.desc())
+    )
+    return db.paginate(stmt, page=page, per_page=per_page, max_per_page=100, error_out=False)
+
+
+def compute_summary(guardian_id: int) -> dict:
+    """
+    Resumen del apoderado: suscripciones activas con su próximo vencimiento y saldo abierto.
+    Son tres consultas agregadas, independientes de cuántas órdenes históricas tenga.
+    """
+    subscriptions = db.session.execute(
+        select(
+            Subscription.id,
+            Subscription.billing_cycle,
+            Subscription.start_date,
+            Plan.name,
+        )
+        .join(Subscription.plan)
+        .where(
+            Subscription.guardian_id == guardian_id,
+            Subscription.status == SubscriptionStatus.active,
+        )
+        .order_by(Subscription.id)
+    ).all()
+
+    last_paid = {}
+    if subscriptions:
+        last_paid = dict(
+            db.session.execute(
+                select(Order.subscription_id, func.max(Order.created_at))
+                .where(
+                    Order.subscription_id.in_([row.id for row in subscriptions]),
+                    Order.payment_status == PaymentStatus.paid,
+                )
+                .group_by(Order.subscription_id)
+            ).all()
+        )
+
+    active = []
+    for subscription_id, billing_cycle, start_date, plan_name in subscriptions:
+        paid_at = last_paid.get(subscription_id)
+        if paid_at is not None:
+            next_due = add_months(paid_at.date(), cycle_months(billing_cycle))
+        else:
+            next_due = start_date or date.today()
+        active.append({
+            "id": subscription_id,
+            "plan_name": plan_name,
+            "billing_cycle": billing_cycle,
+            "next_due_date": next_due,
+        })
+
+    open_count, open_balance = db.session.execute(
+        select(func.count(Order.id), func.coalesce(func.sum(Order.amount_clp), 0))
+        .join(Order.subscription)
+        .where(
+            Subscription.guardian_id == guardian_id,
+            Order.payment_status.in_(OPEN_STATUSES),
+        )
+    ).one()
+
+    return {
+        "active_subscriptions": active,
+        "next_due_date": min((item["next_due_date"] for item in active), default=None),
+        "open_orders": int(open_count),
+        "open_balance_clp": int(open_balance),
+    }
+
+
+def get_cache() -> TTLCache | None:
+    return current_app.extensions.get(_EXTENSION_KEY)
+
+
+def guardian_summary(guardian_id: int) -> dict:
+    cache = get_cache()
+    summary = cache.get(guardian_id) if cache is not None else None
+    if summary is None:
+        summary = compute_summary(guardian_id)
+        if cache is not None:
+            cache.set(guardian_id, summary)
+    return summary
+
+
+def invalidate(guardian_ids) -> None:
+    cache = get_cache() if has_app_context() else None
+    if cache is None:
+        return
+    for guardian_id in guardian_ids:
+        if guardian_id is not None:
+            cache.delete(guardian_id)
+
+
+def invalidate_subscriptions(subscription_ids, session: Session | None = None) -> None:
+    """Invalida los resúmenes de los apoderados dueños de las suscripciones indicadas."""
+    cache = get_cache() if has_app_context() else None
+    ids = {subscription_id for subscription_id in subscription_ids if subscription_id is not None}
+    if cache is None or not ids or not len(cache):
+        return
+    session = session or db.session
+    guardian_ids = session.execute(
+        select(Subscription.guardian_id).where(Subscription.id.in_(ids))
+    ).scalars()
+    invalidate(set(guardian_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_summaries(session, _flush_context):
+    if not has_app_context() or get_cache() is None:
+        return
+    guardian_ids, subscription_ids = set(), set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Subscription):
+            guardian_ids.add(instance.guardian_id or (instance.guardian.id if instance.guardian else None))
+        elif isinstance(instance, Order):
+            subscription = instance.__dict__.get("subscription")
+            if subscription is not None and subscription.guardian_id is not None:
+                guardian_ids.add(subscription.guardian_id)
+            else:
+                subscription_ids.add(instance.subscription_id)
+    invalidate(guardian_ids)
+    invalidate_subscriptions(subscription_ids, session)
+
+
+def init_app(app: Flask) -> None:
+    ttl = app.config.get("PORTAL_SUMMARY_CACHE_TTL", 30)
+    app.extensions[_EXTENSION_KEY] = TTLCache(ttl, app.config.get("PORTAL_SUMMARY_CACHE_SIZE", 2048)) if ttl else None
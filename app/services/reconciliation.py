@@ -0,0 +1,126 @@
+# services/reconciliation.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from . import orders as order_service
+from . import webpay as webpay_service
+from ..extensions import db
+from ..models import Order, PaymentMethod, PaymentStatus, Subscription
+
+OPEN_STATUSES = (PaymentStatus.pending, PaymentStatus.reserved)
+FAILED_TBK_STATUSES = {"FAILED", "REVERSED", "NULLIFIED"}
+
+
+def find_stale_webpay_orders(older_than: timedelta, limit: int | None = None):
+    """Devuelve (id, token) de órdenes Webpay abiertas sin actividad desde ``older_than``."""
+    cutoff = datetime.now(timezone.utc) - older_than
+    query = (
+        db.session.query(Order.id, Order.external_id)
+        .filter(
+            Order.payment_method == PaymentMethod.webpay,
+            Order.payment_status.in_(OPEN_STATUSES),
+            Order.external_id.isnot(None),
+            Order.updated_at < cutoff,
+        )
+        .order_by(Order.updated_at)
+    )
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def classify_status(resp: dict) -> str | None:
+    """Traduce la respuesta de ``Transaction.status`` a ``paid``/``failed``/``None``."""
+    status = (resp.get("status") or "").upper()
+    if status == "AUTHORIZED" and resp.get("response_code", 0) == 0:
+        return "paid"
+    if status in FAILED_TBK_STATUSES:
+        return "failed"
+    # INITIALIZED u otro estado: el apoderado aún puede reintentar Webpay.
+    return None
+
+
+def _query_status(app, token: str):
+    with app.app_context():
+        return webpay_service.status_token(token)
+
+
+def _apply_batch(outcomes: dict[int, tuple[str, str]], report: dict, dry_run: bool) -> None:
+    if not outcomes:
+        return
+    orders = (
+        Order.query.options(joinedload(Order.subscription).joinedload(Subscription.plan))
+        .filter(Order.id.in_(list(outcomes)))
+        .all()
+    )
+    for order in orders:
+        token, outcome = outcomes[order.id]
+        # La orden pudo cambiar mientras consultábamos a Transbank (p. ej. el apoderado volvió).
+        if order.payment_status not in OPEN_STATUSES or order.external_id != token:
+            report["unchanged"].append(order.id)
+            continue
+        if dry_run:
+            report[outcome].append(order.id)
+            continue
+        if outcome == "paid":
+            order_service.mark_order_paid(order)
+        else:
+            order_service.mark_order_failed(order)
+        report[outcome].append(order.id)
+    if not dry_run:
+        db.session.commit()
+
+
+def reconcile_stale_webpay_orders(
+    older_than: timedelta,
+    *,
+    max_workers: int = 8,
+    batch_size: int = 100,
+    limit: int | None = None,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Consulta en Transbank el estado de las órdenes Webpay abandonadas y aplica el resultado.
+
+    Las consultas remotas se hacen en un pool de hilos acotado; los cambios se aplican en el
+    hilo actual y se confirman en lotes de ``batch_size`` órdenes.
+    """
+    stale = find_stale_webpay_orders(older_than, limit=limit)
+    report = {"checked": len(stale), "paid": [], "failed": [], "unchanged": [], "errors": []}
+    if not stale:
+        return report
+
+    app = current_app._get_current_object()
+    pending_batch: dict[int, tuple[str, str]] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(_query_status, app, token): (order_id, token)
+            for order_id, token in stale
+        }
+        for future in as_completed(futures):
+            order_id, token = futures[future]
+            try:
+                resp = future.result()
+            except Exception as exc:
+                current_app.logger.warning(
+                    "No se pudo consultar Webpay para la orden %s: %s", order_id, exc
+                )
+                report["errors"].append((order_id, str(exc)))
+                continue
+
+            outcome = classify_status(resp or {})
+            if outcome is None:
+                report["unchanged"].append(order_id)
+                continue
+
+            pending_batch[order_id] = (token, outcome)
+            if len(pending_batch) >= batch_size:
+                _apply_batch(pending_batch, report, dry_run)
+                pending_batch = {}
+
+    _apply_batch(pending_batch, report, dry_run)
+    return report
@@ -0,0 +1,162 @@
+# services/reminders.py
+import time
+from collections.abc import Callable
+from datetime import date, datetime, timedelta, timezone
+
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import select
+
+from .. import mailer
+from ..extensions import db
+from ..models import PaymentReminder
+from .orders import subscriptions_due
+
+SUBJECT = "Recordatorio de pago – Ajedrez Recreativo"
+
+
+def build_reminders(today: date | None = None) -> list[dict]:
+    """Un recordatorio por apoderado con todas sus suscripciones vencidas (mismas reglas que el panel)."""
+    by_guardian: dict[int, dict] = {}
+    for info in subscriptions_due(today):
+        subscription = info["subscription"]
+        guardian = subscription.guardian
+        reminder = by_guardian.setdefault(guardian.id, {
+            "guardian_id": guardian.id,
+            "recipient": guardian.user.email,
+            "guardian_name": guardian.user.name,
+            "items": [],
+            "total_clp": 0,
+        })
+        reminder["items"].append({
+            "subscription_id": subscription.id,
+            "plan": subscription.plan.name,
+            "cycle": subscription.billing_cycle.value,
+            "due_date": info["due_date"],
+            "days_overdue": info["days_overdue"],
+            "amount_clp": info["amount_clp"],
+            "method": info["recommended_method"].value,
+        })
+        reminder["total_clp"] += info["amount_clp"]
+    return list(by_guardian.values())
+
+
+def recently_reminded(recipients: list[str], window: timedelta) -> set[str]:
+    """Destinatarios que ya recibieron un recordatorio dentro de ``window`` (una sola consulta)."""
+    if not recipients:
+        return set()
+    since = datetime.now(timezone.utc) - window
+    return set(db.session.scalars(
+        select(PaymentReminder.recipient)
+        .where(PaymentReminder.recipient.in_(recipients), PaymentReminder.sent_at >= since)
+        .distinct()
+    ))
+
+
+def _send(app, connection, message: Message):
+    """
+    Envía ``message`` abriendo la conexión si hace falta. Ante un error transitorio reconecta
+    y reintenta una vez. Retorna ``(conexión, error)``; ``error`` es ``None`` si se envió.
+    """
+    error = None
+    for _ in range(2):
+        try:
+            if connection is None:
+                connection = mailer.connect(app)
+                connection.__enter__()
+            connection.send(message)
+            return connection, None
+        except mailer.SEND_ERRORS as exc:
+            error = exc
+            if mailer.is_permanent(exc):
+                break
+            if connection is not None:
+                connection.close()
+            connection = None
+    return connection, error
+
+
+def send_payment_reminders(
+    *,
+    dry_run: bool = False,
+    limit: int | None = None,
+    per_minute: int | None = None,
+    dedupe_days: int | None = None,
+    today: date | None = None,
+    progress: Callable[[str], None] | None = None,
+) -> dict:
+    """
+    Envía los recordatorios de pago sobre una sola conexión SMTP (se reabre una vez ante un
+    error transitorio; si persiste, corta y retorna lo enviado), a lo más ``per_minute`` por
+    minuto, omitiendo destinatarios recordados en los últimos ``dedupe_days`` días. Las
+    plantillas se compilan una vez y se renderizan por apoderado. Con ``dry_run`` solo informa.
+    """
+    app = current_app._get_current_object()
+    config = app.config
+    per_minute = per_minute if per_minute is not None else config.get("REMINDER_RATE_PER_MINUTE", 60)
+    dedupe_days = dedupe_days if dedupe_days is not None else config.get("REMINDER_DEDUPE_DAYS", 7)
+
+    reminders = build_reminders(today)
+    skipped = recently_reminded([r["recipient"] for r in reminders], timedelta(days=dedupe_days))
+    pending = [r for r in reminders if r["recipient"] not in skipped]
+    if limit is not None:
+        pending = pending[:limit]
+
+    report = {
+        "due_guardians": len(reminders),
+        "skipped_recent": sorted(skipped),
+        "to_send": [
+            {"recipient": r["recipient"], "subscriptions": len(r["items"]), "total_clp": r["total_clp"]}
+            for r in pending
+        ],
+        "sent": 0,
+        "errors": [],
+        "interrupted": False,
+        "dry_run": dry_run,
+    }
+    if dry_run or not pending:
+        return report
+
+    text_template = app.jinja_env.get_template("emails/payment_reminder.txt")
+    html_template = app.jinja_env.get_template("emails/payment_reminder.html")
+    interval = 60.0 / per_minute if per_minute else 0.0
+    next_send = time.monotonic()
+
+    connection = None
+    try:
+        for reminder in pending:
+            wait = next_send - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            next_send = time.monotonic() + interval
+
+            message = Message(
+                SUBJECT,
+                recipients=[reminder["recipient"]],
+                body=text_template.render(**reminder),
+                html=html_template.render(**reminder),
+            )
+            connection, error = _send(app, connection, message)
+            if error is not None:
+                report["errors"].append((reminder["recipient"], str(error)))
+                if mailer.is_permanent(error):
+                    continue
+                # Sigue fallando tras reconectar: se corta la pasada y se informa lo ya enviado.
+                # Al repetirla, la ventana de no repetición evita duplicados.
+                report["interrupted"] = True
+                break
+            db.session.add(PaymentReminder(
+                guardian_id=reminder["guardian_id"],
+                recipient=reminder["recipient"],
+                subscription_ids=",".join(str(item["subscription_id"]) for item in reminder["items"]),
+                amount_clp=reminder["total_clp"],
+            ))
+            # Commit por envío: si el proceso se corta, los ya enviados no se repiten
+            db.session.commit()
+            report["sent"] += 1
+            if progress is not None:
+                progress(reminder["recipient"])
+    finally:
+        if connection is not None:
+            connection.close()
+    return report
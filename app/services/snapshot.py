@@ -0,0 +1,171 @@
+# services/snapshot.py
+import hashlib
+import hmac
+import json
+from collections.abc import Callable, Iterable
+
+from sqlalchemy import create_engine, event, insert, inspect, select, text
+from sqlalchemy.engine import Engine
+
+from ..extensions import db
+
+# Tablas que no se copian: datos efímeros sin valor para reproducir rendimiento.
+SKIP_TABLES = {"server_sessions", "outbox_messages"}
+
+
+class Pseudonymizer:
+    """
+    Seudónimos deterministas (HMAC-SHA256 con ``key``): el mismo valor original produce siempre
+    el mismo seudónimo, en cualquier tabla, de modo que unicidad y cruces se conservan.
+    """
+
+    def __init__(self, key: str | bytes):
+        self.key = key.encode() if isinstance(key, str) else key
+
+    def digest(self, kind: str, value) -> str:
+        message = f"{kind}:{value}".encode()
+        return hmac.new(self.key, message, hashlib.sha256).hexdigest()
+
+    def email(self, value):
+        if not value:
+            return value
+        return f"user-{self.digest('email', value.strip().lower())[:16]}@example.invalid"
+
+    def name(self, value):
+        if not value:
+            return value
+        return f"Persona {self.digest('name', value)[:8]}"
+
+    def phone(self, value):
+        if not value:
+            return value
+        return "+569" + str(int(self.digest("phone", value)[:12], 16))[-8:].zfill(8)
+
+    def secret(self, value):
+        if not value:
+            return value
+        return "!" + self.digest("secret", value)[:32]
+
+    def token(self, value):
+        if not value:
+            return value
+        return self.digest("token", value)[:40]
+
+    @staticmethod
+    def redact(value):
+        return "[redactado]" if value else value
+
+    def order_detail(self, value):
+        """Anonimiza el snapshot JSON de la orden con los mismos seudónimos que las tablas."""
+        if not value:
+            return value
+        try:
+            data = json.loads(value)
+        except ValueError:
+            return self.redact(value)
+        if not isinstance(data, dict):
+            return self.redact(value)
+        guardian = data.get("guardian")
+        if isinstance(guardian, dict):
+            guardian["name"] = self.name(guardian.get("name"))
+            guardian["email"] = self.email(guardian.get("email"))
+        if isinstance(data.get("children"), list):
+            data["children"] = [self.name(child) if isinstance(child, str) else child for child in data["children"]]
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def column_rules(pseudonymizer: Pseudonymizer) -> dict[str, dict[str, Callable]]:
+    """Transformación por tabla y columna; lo que no aparece se copia tal cual."""
+    p = pseudonymizer
+    return {
+        "users": {
+            "email": p.email,
+            "name": p.name,
+            "google_sub": p.token,
+            "password_hash": p.secret,
+            "password_reset_token_hash": p.secret,
+        },
+        "guardians": {"phone": p.phone},
+        "children": {"name": p.name, "health_info": p.redact},
+        "enrollments": {"notes": p.redact},
+        "orders": {"detail": p.order_detail, "external_id": p.token},
+        "archived_enrollments": {"notes": p.redact},
+        "archived_orders": {"detail": p.order_detail, "external_id": p.token},
+        "payment_reminders": {"recipient": p.email},
+    }
+
+
+def _fast_sqlite_target(engine: Engine) -> None:
+    # Carga masiva: sin FKs durante la copia (se verifican al final) ni fsync por lote.
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.close()
+
+
+def copy_snapshot(
+    source_url: str,
+    target_path: str,
+    *,
+    key: str | bytes,
+    chunk_size: int = 5000,
+    tables: Iterable[str] | None = None,
+    progress: Callable[[str, int], None] | None = None,
+) -> dict[str, int]:
+    """
+    Copia ``source_url`` a un SQLite en ``target_path`` tabla por tabla (en orden de FKs),
+    leyendo en bloques de ``chunk_size`` con cursor de servidor e insertando cada bloque con
+    un solo ``executemany``. Retorna filas copiadas por tabla.
+    """
+    source = create_engine(source_url)
+    target = create_engine(f"sqlite:///{target_path}")
+    _fast_sqlite_target(target)
+    rules = column_rules(Pseudonymizer(key))
+    wanted = set(tables) if tables else None
+
+    metadata = db.metadata
+    metadata.drop_all(target)
+    metadata.create_all(target)
+    existing = set(inspect(source).get_table_names())
+
+    copied = {}
+    try:
+        with source.connect() as src, target.connect() as dst:
+            for table in metadata.sorted_tables:
+                if table.name in SKIP_TABLES or table.name not in existing:
+                    continue
+                if wanted is not None and table.name not in wanted:
+                    continue
+                source_columns = {column["name"] for column in inspect(source).get_columns(table.name)}
+                columns = [column for column in table.columns if column.name in source_columns]
+                transforms = {
+                    name: fn for name, fn in rules.get(table.name, {}).items() if name in source_columns
+                }
+                stmt = select(*columns).order_by(*table.primary_key.columns)
+                result = src.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+
+                total = 0
+                for partition in result.partitions():
+                    rows = []
+                    for row in partition:
+                        values = row._asdict()
+                        for name, fn in transforms.items():
+                            values[name] = fn(values[name])
+                        rows.append(values)
+                    with dst.begin():
+                        dst.execute(insert(table), rows)
+                    total += len(rows)
+                    if progress is not None:
+                        progress(table.name, total)
+                copied[table.name] = total
+
+            violations = dst.execute(text("PRAGMA foreign_key_check")).fetchall()
+            if violations:
+                raise RuntimeError(f"El snapshot quedó con {len(violations)} referencias rotas.")
+    finally:
+        source.dispose()
+        target.dispose()
+    return copied
@@ -1,4 +1,5 @@
 # services/subscriptions.py
+import calendar
 from datetime import date
 
 from ..models import (
@@ -11,6 +12,19 @@ from ..models import (
 )
 from ..extensions import db
 
+
+def add_months(base_date: date, months: int) -> date:
+    month = base_date.month - 1 + months
+    year = base_date.year + month // 12
+    month = month % 12 + 1
+    day = min(base_date.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def cycle_months(billing_cycle: BillingCycle) -> int:
+    return 1 if billing_cycle == BillingCycle.monthly else 3
+
+
 def create_subscription(guardian: Guardian, plan: Plan,
                         billing_cycle: BillingCycle = BillingCycle.monthly,
                         start_date: date = None) -> Subscription:
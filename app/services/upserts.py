@@ -0,0 +1,33 @@
+# services/upserts.py
+from sqlalchemy import Table, insert, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from ..extensions import db
+
+
+def upsert(table: Table, values: dict, conflict_columns: list[str], update_values: dict):
+    """
+    INSERT que, si choca con ``conflict_columns``, actualiza la fila existente con
+    ``update_values`` (expresiones sobre las columnas de ``table``).
+
+    Usa ON CONFLICT (SQLite/PostgreSQL) u ON DUPLICATE KEY UPDATE (MySQL); en otros motores
+    intenta primero un UPDATE y luego el INSERT.
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(table).values(**values).on_conflict_do_update(
+            index_elements=conflict_columns, set_=update_values
+        )
+        return db.session.execute(stmt)
+
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(table).values(**values).on_duplicate_key_update(**update_values)
+        return db.session.execute(stmt)
+
+    key = [table.c[column] == values[column] for column in conflict_columns]
+    result = db.session.execute(update(table).where(*key).values(**update_values))
+    if result.rowcount:
+        return result
+    return db.session.execute(insert(table).values(**values))
@@ -6,6 +6,8 @@ from transbank.common.options import WebpayOptions, IntegrationType
 from transbank.common.integration_commerce_codes import IntegrationCommerceCodes
 from transbank.common.integration_api_keys import IntegrationApiKeys
 
+from ..observability.metrics import track_outbound
+
 
 def _build_transaction() -> Transaction:
     """
@@ -43,7 +45,8 @@ def create_for_order(order):
     session_id = f"g{order.subscription.guardian_id}-o{order.id}"
     return_url = url_for("orders.webpay_return", _external=True)
 
-    resp = tx.create(buy_order, session_id, order.amount_clp, return_url)
+    with track_outbound("transbank", "create"):
+        resp = tx.create(buy_order, session_id, order.amount_clp, return_url)
     token = resp["token"]
     url = resp["url"]
 
@@ -56,4 +59,14 @@ def commit_token(token: str):
     Devuelve el dict de respuesta de Transbank (con status, amount, etc).
     """
     tx = _build_transaction()
-    return tx.commit(token)
\ No newline at end of file
+    with track_outbound("transbank", "commit"):
+        return tx.commit(token)
+
+def status_token(token: str):
+    """
+    Consulta el estado de una transacción Webpay sin confirmarla.
+    Se usa para reconciliar órdenes cuyo apoderado no volvió desde Webpay.
+    """
+    tx = _build_transaction()
+    with track_outbound("transbank", "status"):
+        return tx.status(token)
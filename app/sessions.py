@@ -0,0 +1,311 @@
+# app/sessions.py
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask, current_app, has_app_context
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+from flask_login import user_logged_in
+from itsdangerous import BadSignature, Signer
+from sqlalchemy import delete, insert, select, update
+
+from .extensions import db
+from .models import ServerSession
+
+BACKENDS = ("cookie", "sqlite", "sqlalchemy")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ServerSideSession(SecureCookieSession):
+    """Sesión cuyo contenido vive en el servidor; la cookie solo transporta ``sid`` firmado."""
+
+    def __init__(self, initial=None, sid: str | None = None, expires_at: datetime | None = None):
+        super().__init__(initial)
+        self.new = sid is None
+        self.sid = sid or self.generate_sid()
+        self.expires_at = expires_at
+        self.previous_sid: str | None = None
+
+    @staticmethod
+    def generate_sid() -> str:
+        return secrets.token_urlsafe(32)
+
+    def regenerate(self) -> None:
+        """Cambia el ``sid`` conservando los datos (evita fijación de sesión al iniciar sesión)."""
+        if not self.new and self.previous_sid is None:
+            self.previous_sid = self.sid
+        self.sid = self.generate_sid()
+        self.modified = True
+
+
+class SQLiteSessionStore:
+    """
+    Sesiones en un archivo SQLite local, compartido por los workers de una misma máquina.
+    Si el archivo sigue bloqueado pasado ``timeout`` no se corta la solicitud: una lectura
+    fallida equivale a una sesión vacía y una escritura fallida solo se registra.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Conexión desechable: create_app corre en el maestro de gunicorn (--preload) y los
+        # workers no deben heredar un handle SQLite abierto.
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Una conexión por hilo y por proceso: tras un fork se abre una nueva.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _warn(action: str, exc: sqlite3.OperationalError) -> None:
+        if has_app_context():
+            current_app.logger.warning("No se pudo %s sesiones en SQLite: %s", action, exc)
+
+    def load(self, sid: str) -> tuple[str, datetime] | None:
+        try:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?",
+                (sid, time.time()),
+            ).fetchone()
+        except sqlite3.OperationalError as exc:
+            self._warn("leer", exc)
+            return None
+        if row is None:
+            return None
+        return row[0], datetime.fromtimestamp(row[1], timezone.utc)
+
+    def save(self, sid: str, data: str, expires_at: datetime) -> None:
+        try:
+            self._conn.execute(
+                "INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(sid) DO UPDATE SET data = excluded.data,"
+                " expires_at = excluded.expires_at",
+                (sid, data, expires_at.timestamp()),
+            )
+        except sqlite3.OperationalError as exc:
+            self._warn("guardar", exc)
+
+    def delete(self, sid: str) -> None:
+        try:
+            self._conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+        except sqlite3.OperationalError as exc:
+            self._warn("borrar", exc)
+
+    def sweep(self) -> int:
+        try:
+            return self._conn.execute(
+                "DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+        except sqlite3.OperationalError as exc:
+            self._warn("limpiar", exc)
+            return 0
+
+
+class SQLAlchemySessionStore:
+    """
+    Sesiones en la tabla ``server_sessions`` de la base principal. Usa conexiones propias del
+    engine para no mezclarse con la transacción de ``db.session`` de la solicitud.
+    """
+
+    table = ServerSession.__table__
+
+    def load(self, sid: str) -> tuple[str, datetime] | None:
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.data, self.table.c.expires_at).where(
+                    self.table.c.sid == sid, self.table.c.expires_at > _utcnow()
+                )
+            ).first()
+        if row is None:
+            return None
+        expires_at = row.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return row.data, expires_at
+
+    def save(self, sid: str, data: str, expires_at: datetime) -> None:
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                update(self.table)
+                .where(self.table.c.sid == sid)
+                .values(data=data, expires_at=expires_at)
+            )
+            if not result.rowcount:
+                conn.execute(insert(self.table).values(sid=sid, data=data, expires_at=expires_at))
+
+    def delete(self, sid: str) -> None:
+        with db.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.sid == sid))
+
+    def sweep(self) -> int:
+        with db.engine.begin() as conn:
+            return conn.execute(
+                delete(self.table).where(self.table.c.expires_at <= _utcnow())
+            ).rowcount
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Guarda la sesión en ``store`` y deja en la cookie solo el ``sid`` firmado. Solo escribe
+    cuando la sesión cambió o cuando ya consumió la mitad de su vigencia, y cada
+    ``sweep_interval`` segundos elimina las sesiones vencidas.
+    """
+
+    serializer = session_json_serializer
+    salt = "server-side-session"
+
+    def __init__(self, store, sweep_interval: float = 3600):
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+
+    def _signer(self, app: Flask) -> Signer | None:
+        if not app.secret_key:
+            return None
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app: Flask, request):
+        signer = self._signer(app)
+        if signer is None:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return ServerSideSession()
+        try:
+            sid = signer.unsign(cookie).decode()
+        except BadSignature:
+            return ServerSideSession()
+        stored = self.store.load(sid)
+        if stored is None:
+            return ServerSideSession()
+        data, expires_at = stored
+        try:
+            return ServerSideSession(self.serializer.loads(data), sid=sid, expires_at=expires_at)
+        except ValueError:
+            return ServerSideSession()
+
+    def _lifetime(self, app: Flask) -> timedelta:
+        return app.permanent_session_lifetime
+
+    def _needs_touch(self, app: Flask, session: ServerSideSession) -> bool:
+        if session.expires_at is None:
+            return True
+        remaining = session.expires_at - _utcnow()
+        return remaining < self._lifetime(app) / 2
+
+    def save_session(self, app: Flask, session: ServerSideSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        partitioned = self.get_cookie_partitioned(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+
+        if not session:
+            if not session.new:
+                self.store.delete(session.sid)
+            if session.modified or session.previous_sid:
+                response.delete_cookie(
+                    name,
+                    domain=domain,
+                    path=path,
+                    secure=secure,
+                    partitioned=partitioned,
+                    samesite=samesite,
+                    httponly=httponly,
+                )
+            self._maybe_sweep()
+            return
+
+        write = session.new or session.modified or self._needs_touch(app, session)
+        if write:
+            session.expires_at = _utcnow() + self._lifetime(app)
+            self.store.save(session.sid, self.serializer.dumps(dict(session)), session.expires_at)
+
+        if write and self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode(),
+                expires=self.get_expiration_time(app, session),
+                httponly=httponly,
+                domain=domain,
+                path=path,
+                secure=secure,
+                partitioned=partitioned,
+                samesite=samesite,
+            )
+        self._maybe_sweep()
+
+    def _maybe_sweep(self) -> None:
+        if time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = time.monotonic()
+            self.store.sweep()
+        finally:
+            self._sweep_lock.release()
+
+
+def create_store(app: Flask, backend: str):
+    if backend == "sqlite":
+        path = app.config.get("SESSION_SQLITE_PATH") or os.path.join(
+            app.instance_path, "sessions.db"
+        )
+        return SQLiteSessionStore(path)
+    if backend == "sqlalchemy":
+        return SQLAlchemySessionStore()
+    raise ValueError(f"SESSION_BACKEND no soportado: {backend!r} (usa uno de {BACKENDS})")
+
+
+def _regenerate_on_login(_app, **_kwargs) -> None:
+    from flask import session
+
+    if isinstance(session, ServerSideSession):
+        session.regenerate()
+
+
+def init_app(app: Flask) -> None:
+    """Activa la sesión del lado del servidor si ``SESSION_BACKEND`` no es ``"cookie"``."""
+    backend = app.config.get("SESSION_BACKEND", "cookie")
+    if backend == "cookie":
+        return
+    app.session_interface = ServerSideSessionInterface(
+        create_store(app, backend),
+        sweep_interval=app.config.get("SESSION_SWEEP_INTERVAL", 3600),
+    )
+    user_logged_in.connect(_regenerate_on_login, app)
@@ -0,0 +1,103 @@
+"""Mide el envío de correo de la app contra un servidor SMTP local (sin tocar Gmail).
+
+Compara dos caminos: ``mail.send`` (una conexión por mensaje) y el drenado del outbox, que
+reutiliza una conexión por lote. Informa mensajes por segundo, conexiones abiertas y memoria.
+
+Uso: python benchmarks/bench_mail.py [cantidad] [--handshake-ms N]
+"""
+from __future__ import annotations
+
+import argparse
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from flask_mail import Message
+
+from app import create_app
+from app.extensions import db, mail
+from app.services import outbox
+from tests.local_smtp import LocalSMTPServer
+
+
+class BenchConfig:
+    TESTING = True
+    SECRET_KEY = "bench"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    MAIL_DEFAULT_SENDER = "bench@example.com"
+    METRICS_ENABLED = False
+
+
+def _message(index: int) -> Message:
+    return Message(
+        f"Recordatorio {index}",
+        recipients=[f"familia-{index}@example.com"],
+        body="Te recordamos que tienes un pago pendiente.\n" * 20,
+    )
+
+
+def _mail_send(count: int) -> None:
+    for index in range(count):
+        mail.send(_message(index))
+
+
+def _outbox(count: int) -> None:
+    payload = {
+        "order_id": 0, "guardian_name": "Ana", "plan": "Plan Base", "cycle": "Mensual",
+        "amount_clp": 10000, "payment_method": "Webpay", "children": ["Niño"], "workshops": [],
+    }
+    for index in range(count):
+        outbox.enqueue("payment_confirmation", f"familia-{index}@example.com", {**payload, "order_id": index})
+    db.session.commit()
+    outbox.drain(batch_size=200)
+
+
+def _run(label: str, fn, count: int, server: LocalSMTPServer) -> None:
+    server.reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(count)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    received = len(server.messages)
+    rate = received / elapsed if elapsed else float("inf")
+    print(
+        f"{label:<28} n={received:<6} {rate:9.1f} msg/s  {elapsed:7.2f} s  "
+        f"conexiones={server.connections:<5} mensajes/conexión={received / max(server.connections, 1):7.1f}  "
+        f"pico={peak / 1024 / 1024:6.1f} MiB"
+    )
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("count", nargs="?", type=int, default=2000)
+    parser.add_argument("--handshake-ms", type=float, default=0.0,
+                        help="Latencia simulada al abrir cada conexión (Gmail en 465: cientos de ms).")
+    args = parser.parse_args(argv)
+
+    with LocalSMTPServer(handshake_delay=args.handshake_ms / 1000) as server:
+        app = create_app(BenchConfig)
+        app.config.update(server.config())
+        mail.init_app(app)
+        with app.app_context():
+            db.create_all()
+            print(f"{args.count} mensajes a {server.host}:{server.port} (handshake {args.handshake_ms:g} ms)")
+            _run("mail.send (1 conexión c/u)", _mail_send, args.count, server)
+            _run("outbox-drain", _outbox, args.count, server)
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"RSS máximo del proceso: {max_rss / 1024:.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,64 @@
+"""Mide la latencia de crear un usuario nuevo de Google con y sin hash de contraseña.
+
+Uso: python benchmarks/bench_signup.py [cantidad]
+"""
+from __future__ import annotations
+
+import secrets
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+
+
+class BenchConfig:
+    TESTING = True
+    SECRET_KEY = "bench"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+
+def _signup(index: int, label: str, hashed: bool) -> float:
+    start = time.perf_counter()
+    user = User(email=f"{label}-{index}@example.com", name=f"Usuario {index}")
+    if hashed:
+        user.set_password(secrets.token_urlsafe(32))  # comportamiento anterior
+    else:
+        user.set_unusable_password()
+    user.activate()
+    db.session.add(user)
+    db.session.commit()
+    return time.perf_counter() - start
+
+
+def _report(label: str, samples: list[float]) -> None:
+    samples_ms = sorted(sample * 1000 for sample in samples)
+    p95 = samples_ms[int(len(samples_ms) * 0.95) - 1]
+    print(
+        f"{label:<22} n={len(samples_ms):<5} media={statistics.mean(samples_ms):8.2f} ms "
+        f"p50={statistics.median(samples_ms):8.2f} ms p95={p95:8.2f} ms"
+    )
+
+
+def main(argv: list[str]) -> int:
+    count = int(argv[0]) if argv else 50
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        method = app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+        print(f"Alta de {count} usuarios OAuth (PASSWORD_HASH_METHOD={method})")
+        _report("antes (hash scrypt)", [_signup(i, "hashed", True) for i in range(count)])
+        _report("después (inutilizable)", [_signup(i, "unusable", False) for i in range(count)])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -7,6 +7,40 @@ def _env_bool(key: str, default: bool = False) -> bool:
     return value.strip().lower() in {"1", "true", "t", "yes", "y"}
 
 
+def _env_int(key: str) -> int | None:
+    value = os.environ.get(key)
+    return int(value) if value not in (None, "") else None
+
+
+def _engine_options(database_uri: str | None) -> dict:
+    """
+    ``SQLALCHEMY_ENGINE_OPTIONS`` desde variables de entorno. Las opciones de pool solo se
+    aplican a motores con QueuePool (no a SQLite), y ``pool_pre_ping`` más ``pool_recycle``
+    por debajo del ``wait_timeout`` de MySQL evitan el "MySQL server has gone away".
+    ``DB_POOL_RECYCLE <= 0`` desactiva el reciclaje (``-1`` en SQLAlchemy, donde ``0``
+    reciclaría la conexión en cada checkout).
+    """
+    options: dict = {"pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True)}
+    if not database_uri or database_uri.startswith("sqlite"):
+        return options
+
+    recycle = _env_int("DB_POOL_RECYCLE")
+    options["pool_recycle"] = 280 if recycle is None else (recycle if recycle > 0 else -1)
+    for option, key in (
+        ("pool_size", "DB_POOL_SIZE"),
+        ("max_overflow", "DB_MAX_OVERFLOW"),
+        ("pool_timeout", "DB_POOL_TIMEOUT"),
+    ):
+        value = _env_int(key)
+        if value is not None:
+            options[option] = value
+
+    connect_timeout = _env_int("DB_CONNECT_TIMEOUT")
+    if connect_timeout is not None and database_uri.startswith("mysql"):
+        options["connect_args"] = {"connect_timeout": connect_timeout}
+    return options
+
+
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 _DEFAULT_PRODUCTION = os.environ.get("FLASK_ENV") == "production"
@@ -19,6 +53,9 @@ class Config:
         or os.environ.get("DATABASE_URL")
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    # Conexiones que cada worker abre al iniciar (wsgi.py); 0 lo desactiva
+    DB_POOL_WARMUP = int(os.environ.get("DB_POOL_WARMUP", 2))
 
     MAIL_PROVIDER = os.environ.get("MAIL_PROVIDER")
     MAIL_SERVER = os.environ.get("MAIL_SERVER")
@@ -27,11 +64,34 @@ class Config:
     )
     MAIL_USE_TLS = _env_bool("MAIL_USE_TLS", False)
     MAIL_USE_SSL = _env_bool("MAIL_USE_SSL", False)
+    MAIL_USERNAME = os.environ.get("MAIL_USERNAME")
+    MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD")
+    MAIL_DEFAULT_SENDER = os.environ.get("MAIL_DEFAULT_SENDER") or os.environ.get("MAIL_USERNAME")
+    # Timeout de socket SMTP (segundos) para el outbox y los recordatorios
+    MAIL_TIMEOUT = float(os.environ.get("MAIL_TIMEOUT", 30))
+    # Outbox transaccional (flask outbox-drain): lote, reclamo vencido y reintentos
+    OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 50))
+    OUTBOX_LEASE_SECONDS = int(os.environ.get("OUTBOX_LEASE_SECONDS", 300))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 5))
+    OUTBOX_RETRY_BACKOFF = float(os.environ.get("OUTBOX_RETRY_BACKOFF", 60))
+    OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 5))
+    # Recordatorios de pago (flask payment-reminders): envíos por minuto y días sin repetir
+    REMINDER_RATE_PER_MINUTE = int(os.environ.get("REMINDER_RATE_PER_MINUTE", 60))
+    REMINDER_DEDUPE_DAYS = int(os.environ.get("REMINDER_DEDUPE_DAYS", 7))
+
+    # Archivo histórico (flask archive): antigüedad mínima y filas movidas por transacción
+    ARCHIVE_RETENTION_DAYS = int(os.environ.get("ARCHIVE_RETENTION_DAYS", 730))
+    ARCHIVE_CHUNK_SIZE = int(os.environ.get("ARCHIVE_CHUNK_SIZE", 500))
 
     # Webpay
     TBK_ENV = os.environ.get("TBK_ENV", "integration")
     TBK_COMMERCE_CODE = os.environ.get("TBK_COMMERCE_CODE")
     TBK_API_KEY = os.environ.get("TBK_API_KEY")
+    WEBPAY_RECONCILE_AFTER_MINUTES = int(
+        os.environ.get("WEBPAY_RECONCILE_AFTER_MINUTES", 30)
+    )
+    WEBPAY_RECONCILE_WORKERS = int(os.environ.get("WEBPAY_RECONCILE_WORKERS", 8))
+    WEBPAY_RECONCILE_BATCH_SIZE = int(os.environ.get("WEBPAY_RECONCILE_BATCH_SIZE", 100))
 
     # Google OAuth
     GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID")
@@ -54,6 +114,9 @@ class Config:
     )
     GOOGLE_REDIRECT_URI = os.environ.get("GOOGLE_REDIRECT_URI")
     GOOGLE_HTTP_TIMEOUT = int(os.environ.get("GOOGLE_HTTP_TIMEOUT", 10))
+    GOOGLE_OAUTH_CACHE_TTL = int(os.environ.get("GOOGLE_OAUTH_CACHE_TTL", 6 * 60 * 60))
+    GOOGLE_OAUTH_CACHE_DIR = os.environ.get("GOOGLE_OAUTH_CACHE_DIR")
+    GOOGLE_OAUTH_WARMUP = _env_bool("GOOGLE_OAUTH_WARMUP", _DEFAULT_PRODUCTION)
 
     SESSION_COOKIE_DOMAIN = os.environ.get(
         "SESSION_COOKIE_DOMAIN", ".ajedrezrecreativo.cl"
@@ -62,6 +125,11 @@ class Config:
         "SESSION_COOKIE_SECURE", _DEFAULT_PRODUCTION
     )
 
+    # Sesión: "cookie" (firmada, por defecto), "sqlite" o "sqlalchemy" (solo un id en la cookie)
+    SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "cookie")
+    SESSION_SQLITE_PATH = os.environ.get("SESSION_SQLITE_PATH")
+    SESSION_SWEEP_INTERVAL = int(os.environ.get("SESSION_SWEEP_INTERVAL", 60 * 60))
+
     REMEMBER_COOKIE_SECURE = _env_bool("REMEMBER_COOKIE_SECURE", True)
 
     SESSION_COOKIE_SAMESITE = os.environ.get(
@@ -69,6 +137,80 @@ class Config:
         "None" if SESSION_COOKIE_SECURE else "Lax",
     )
 
+    # Caché de identidad (segundos; 0 la desactiva)
+    IDENTITY_CACHE_TTL = int(os.environ.get("IDENTITY_CACHE_TTL", 30))
+
+    # Portal de apoderados: órdenes por página y caché del resumen (segundos; 0 la desactiva).
+    # La caché es por proceso y solo se invalida en el worker que escribe: el TTL acota
+    # cuánto puede ver otro worker un resumen desactualizado.
+    PORTAL_ORDERS_PER_PAGE = int(os.environ.get("PORTAL_ORDERS_PER_PAGE", 20))
+    PORTAL_SUMMARY_CACHE_TTL = int(os.environ.get("PORTAL_SUMMARY_CACHE_TTL", 30))
+
+    # Costo del hash de contraseñas (formato de werkzeug.security.generate_password_hash)
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+
+    # Instrumentación SQL por solicitud (Server-Timing + log JSON; estricto = falla sobre presupuesto)
+    SQL_INSTRUMENTATION = _env_bool("SQL_INSTRUMENTATION", False)
+    SQL_STRICT = _env_bool("SQL_STRICT", False)
+    SQL_QUERY_BUDGET = (
+        int(os.environ["SQL_QUERY_BUDGET"]) if os.environ.get("SQL_QUERY_BUDGET") else None
+    )
+    SQL_QUERY_BUDGETS: dict[str, int] = {}
+    SQL_NPLUSONE_THRESHOLD = int(os.environ.get("SQL_NPLUSONE_THRESHOLD", 5))
+
+    # Perfilado: muestreo de solicitudes lentas y cProfile con encabezado firmado (flask profiler-token)
+    PROFILER_ENABLED = _env_bool("PROFILER_ENABLED", False)
+    PROFILER_THRESHOLD_MS = int(os.environ.get("PROFILER_THRESHOLD_MS", 1000))
+    PROFILER_SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILER_SAMPLE_INTERVAL_MS", 5))
+    PROFILER_DIR = os.environ.get("PROFILER_DIR")
+    PROFILER_MAX_FILES = int(os.environ.get("PROFILER_MAX_FILES", 200))
+    PROFILER_HEADER = os.environ.get("PROFILER_HEADER", "X-Profile")
+    PROFILER_TOKEN_MAX_AGE = int(os.environ.get("PROFILER_TOKEN_MAX_AGE", 60 * 60))
+
+    # Access log JSON-lines (hilo escritor con rotación); "{pid}" en la ruta separa workers
+    ACCESS_LOG_ENABLED = _env_bool("ACCESS_LOG_ENABLED", False)
+    ACCESS_LOG_PATH = os.environ.get("ACCESS_LOG_PATH")
+    ACCESS_LOG_MAX_BYTES = int(os.environ.get("ACCESS_LOG_MAX_BYTES", 50 * 1024 * 1024))
+    ACCESS_LOG_ROTATE_SECONDS = int(os.environ.get("ACCESS_LOG_ROTATE_SECONDS", 24 * 60 * 60))
+    ACCESS_LOG_BACKUPS = int(os.environ.get("ACCESS_LOG_BACKUPS", 14))
+
+    # Métricas Prometheus en /metrics; con varios workers, METRICS_DIR compartido entre ellos.
+    # Fuera de DEBUG/TESTING /metrics exige METRICS_TOKEN (Authorization: Bearer <token>)
+    METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+    METRICS_DIR = os.environ.get("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+    # Tiempo de render por plantilla (métricas y logs). Con SQL_INSTRUMENTATION o el access log
+    # activos, además advierte si el render emite este número de consultas o más (cargas perezosas)
+    TEMPLATE_TIMING = _env_bool("TEMPLATE_TIMING", True)
+    TEMPLATE_SQL_WARN_THRESHOLD = int(os.environ.get("TEMPLATE_SQL_WARN_THRESHOLD", 5))
+
+    # Sondas del balanceador (/healthz, /readyz): fuera de las métricas y del access log
+    METRICS_EXCLUDE = ("health.healthz", "health.readyz")
+    ACCESS_LOG_EXCLUDE = ("metrics", "static", "health.healthz", "health.readyz")
+    # /readyz: segundos que se reutiliza el resultado y chequeos TCP opcionales (solo informativos)
+    READYZ_CACHE_SECONDS = float(os.environ.get("READYZ_CACHE_SECONDS", 2))
+    READYZ_CHECK_MAIL = _env_bool("READYZ_CHECK_MAIL", False)
+    READYZ_CHECK_TRANSBANK = _env_bool("READYZ_CHECK_TRANSBANK", False)
+    READYZ_TCP_TIMEOUT = float(os.environ.get("READYZ_TCP_TIMEOUT", 1))
+
+    # Proxies de confianza delante de la app (balanceador): cuántos saltos de X-Forwarded-For
+    # y X-Forwarded-Proto se aceptan. 0 (por defecto) = conexión directa: se ignoran esos
+    # encabezados, que sin proxy cualquier cliente puede falsificar para estrenar bucket de
+    # rate limiting en cada solicitud. Detrás de un balanceador hay que fijarlo (normalmente 1);
+    # si no, remote_addr es la IP del balanceador y todas las visitas comparten un bucket.
+    PROXY_FIX_HOPS = int(os.environ.get("PROXY_FIX_HOPS", 0))
+
+    # Rate limiting (token bucket por IP y usuario; reglas por endpoint o blueprint)
+    RATELIMIT_ENABLED = _env_bool("RATELIMIT_ENABLED", True)
+    # "memory" (un worker) o "sqlite:///ruta/ratelimit.db" (compartido entre workers)
+    RATELIMIT_STORAGE = os.environ.get("RATELIMIT_STORAGE", "memory")
+    RATELIMIT_RULES: dict[str, str] = {}
+
+    # Clave de los seudónimos de `flask snapshot-load` (por defecto SECRET_KEY)
+    SNAPSHOT_PSEUDONYM_KEY = os.environ.get("SNAPSHOT_PSEUDONYM_KEY")
+
     # Tokens
     INITIAL_PASSWORD_TOKEN_SALT = os.environ.get(
         "INITIAL_PASSWORD_TOKEN_SALT", "initial-password"
@@ -0,0 +1,190 @@
+"""Servidor SMTP mínimo en proceso, para pruebas y benchmarks de correo sin tocar Gmail.
+
+Implementa lo que usan ``smtplib``/Flask-Mail (EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT), guarda los mensajes recibidos en memoria y cuenta conexiones. Permite simular
+la latencia del handshake y fallas transitorias (421) o rechazos de destinatario (550).
+"""
+from __future__ import annotations
+
+import itertools
+import socketserver
+import threading
+import time
+from dataclasses import dataclass, field
+from email import message_from_bytes, policy
+
+
+@dataclass
+class ReceivedMessage:
+    connection: int
+    mail_from: str
+    rcpt_tos: list[str]
+    data: bytes
+
+    @property
+    def email(self):
+        return message_from_bytes(self.data, policy=policy.default)
+
+
+@dataclass
+class _ServerState:
+    messages: list[ReceivedMessage] = field(default_factory=list)
+    connections: int = 0
+    handshake_delay: float = 0.0
+    fail_next: int = 0
+    reject: set[str] = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    ids: itertools.count = field(default_factory=lambda: itertools.count(1))
+
+
+def _address(argument: str) -> str:
+    start, end = argument.find("<"), argument.find(">")
+    return argument[start + 1:end] if start != -1 and end != -1 else argument.split(":", 1)[-1].strip()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        state = self.server.state
+        with state.lock:
+            state.connections += 1
+            connection_id = next(state.ids)
+        if state.handshake_delay:
+            time.sleep(state.handshake_delay)
+        self.reply("220 localhost ESMTP prueba")
+
+        mail_from, rcpt_tos = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command, _, argument = raw.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+            command = command.upper()
+
+            if command == "EHLO":
+                self.wfile.write(b"250-localhost\r\n250-8BITMIME\r\n250-SMTPUTF8\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif command == "HELO":
+                self.reply("250 localhost")
+            elif command == "AUTH":
+                mechanism, _, initial = argument.partition(" ")
+                if mechanism.upper() == "LOGIN":
+                    # Usuario y contraseña en dos pasos (sin validar)
+                    for _ in range(2 if not initial else 1):
+                        self.reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                elif not initial:
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.reply("235 2.7.0 Autenticado")
+            elif command == "MAIL":
+                with state.lock:
+                    failing = state.fail_next > 0
+                    if failing:
+                        state.fail_next -= 1
+                if failing:
+                    self.reply("421 4.3.0 Servicio no disponible")
+                    return
+                mail_from, rcpt_tos = _address(argument), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                address = _address(argument)
+                if address in state.reject:
+                    self.reply("550 5.1.1 Destinatario inexistente")
+                else:
+                    rcpt_tos.append(address)
+                    self.reply("250 OK")
+            elif command == "DATA":
+                if not rcpt_tos:
+                    self.reply("503 Sin destinatarios")
+                    continue
+                self.reply("354 Fin con <CRLF>.<CRLF>")
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line == b".\r\n":
+                        break
+                    lines.append(line[1:] if line.startswith(b"..") else line)
+                with state.lock:
+                    state.messages.append(ReceivedMessage(connection_id, mail_from, rcpt_tos, b"".join(lines)))
+                mail_from, rcpt_tos = None, []
+                self.reply("250 OK en cola")
+            elif command == "RSET":
+                mail_from, rcpt_tos = None, []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Adiós")
+                return
+            else:
+                self.reply("502 Comando no implementado")
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalSMTPServer:
+    """
+    ``with LocalSMTPServer() as server:`` escucha en ``127.0.0.1:server.port`` hasta salir
+    del bloque. ``server.messages`` y ``server.connections`` reflejan lo recibido.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, handshake_delay: float = 0.0):
+        self.state = _ServerState(handshake_delay=handshake_delay)
+        self._server = _ThreadingServer((host, port), _SMTPHandler)
+        self._server.state = self.state
+        self.host, self.port = self._server.server_address[:2]
+        self._thread: threading.Thread | None = None
+
+    @property
+    def messages(self) -> list[ReceivedMessage]:
+        return self.state.messages
+
+    @property
+    def connections(self) -> int:
+        return self.state.connections
+
+    def fail_next(self, count: int = 1) -> None:
+        """Las próximas ``count`` transacciones responden 421 y cortan la conexión."""
+        self.state.fail_next = count
+
+    def reject(self, *addresses: str) -> None:
+        self.state.reject.update(addresses)
+
+    def reset(self) -> None:
+        with self.state.lock:
+            self.state.messages.clear()
+            self.state.connections = 0
+
+    def config(self) -> dict:
+        """Configuración de Flask-Mail que apunta a este servidor."""
+        return {
+            "MAIL_SERVER": self.host,
+            "MAIL_PORT": self.port,
+            "MAIL_USE_TLS": False,
+            "MAIL_USE_SSL": False,
+            "MAIL_SUPPRESS_SEND": False,
+        }
+
+    def start(self) -> "LocalSMTPServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, name="local-smtp", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def __enter__(self) -> "LocalSMTPServer":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
@@ -0,0 +1,95 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.observability.accesslog import AccessLogWriter
+from app.observability.metrics import track_outbound
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig:
+        TESTING = True
+        SECRET_KEY = "test-secret"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        ACCESS_LOG_ENABLED = True
+        ACCESS_LOG_PATH = str(tmp_path / "logs" / "access.jsonl")
+
+    app = create_app(TestConfig)
+
+    @app.route("/_test/externo")
+    def _outbound():
+        with track_outbound("transbank", "status"):
+            pass
+        return "ok"
+
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _records(app):
+    writer = app.extensions["access_log"]
+    writer.close()
+    return [json.loads(line) for line in writer.path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_access_log_records_timing_breakdown(app, client):
+    with client.session_transaction() as session_ctx:
+        session_ctx["_user_id"] = "7"
+    client.get("/reglamento")
+    client.get("/_test/externo")
+    client.get("/metrics")
+
+    records = _records(app)
+    assert [record["endpoint"] for record in records] == ["inscriptions.reglamento", "_outbound"]
+
+    page, outbound = records
+    assert page["status"] == 200
+    assert page["user_id"] == "7"
+    assert page["method"] == "GET"
+    assert page["template_ms"] > 0
+    assert [render["template"] for render in page["templates"]] == ["reglamento.html"]
+    assert page["db_queries"] >= 0 and page["db_ms"] >= 0
+    assert page["duration_ms"] >= page["template_ms"]
+    assert page["outbound_ms"] == 0
+    assert outbound["outbound_ms"] >= 0 and outbound["template_ms"] == 0
+
+
+def test_writer_rotates_by_size_and_keeps_backups(tmp_path):
+    writer = AccessLogWriter(str(tmp_path / "access.jsonl"), max_bytes=200, backups=2, flush_interval=0.01)
+    for batch in range(5):
+        for i in range(5):
+            writer.write({"batch": batch, "i": i, "padding": "x" * 20})
+        writer.close()
+
+    rotated = sorted(tmp_path.glob("access.jsonl.*"))
+    assert len(rotated) == 2
+    for path in rotated:
+        assert all(json.loads(line)["padding"] for line in path.read_text().splitlines())
+
+
+def test_writer_drops_instead_of_blocking_when_queue_is_full(tmp_path):
+    writer = AccessLogWriter(str(tmp_path / "access.jsonl"), queue_size=1)
+    writer._ensure_thread = lambda: None  # sin hilo escritor la cola no se vacía
+    for _ in range(10):
+        writer.write({"x": 1})
+    assert writer.dropped == 9
@@ -1,3 +1,5 @@
+import gzip
+import json
 import sys
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
@@ -159,3 +161,77 @@ def test_issue_subscription_order_creates_new_pending_order(client, app, admin_s
         assert new_order.payment_status == PaymentStatus.pending
         assert new_order.payment_method == PaymentMethod.transfer
         assert new_order.amount_clp == admin_setup["expected_amount"]
+
+
+def test_bulk_confirm_marks_orders_paid_and_activates_subscriptions(client, app, admin_setup):
+    force_login(client, app, admin_setup["admin_id"])
+
+    with app.app_context():
+        active_subscription = db.session.get(Subscription, admin_setup["subscription_id"])
+        already_paid_id = active_subscription.orders[0].id
+
+        guardian = Guardian(
+            user=User(email="nuevo@example.com", name="Nuevo", password_hash="hash"),
+            phone="+56922222222",
+        )
+        pending_subscription = Subscription(
+            guardian=guardian,
+            plan=active_subscription.plan,
+            billing_cycle=BillingCycle.monthly,
+        )
+        first = Order(
+            subscription=pending_subscription,
+            amount_clp=25000,
+            payment_method=PaymentMethod.transfer,
+        )
+        second = Order(
+            subscription=active_subscription,
+            amount_clp=25000,
+            payment_method=PaymentMethod.in_person,
+        )
+        db.session.add_all([guardian, pending_subscription, first, second])
+        db.session.commit()
+        pending_subscription_id = pending_subscription.id
+        first_id, second_id = first.id, second.id
+
+    response = client.post(
+        "/pago/confirmar",
+        data={"order_ids": [str(first_id), str(second_id), str(already_paid_id), "9999"]},
+        follow_redirects=True,
+    )
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert f"Pagos confirmados: #{first_id}, #{second_id}" in body
+    assert f"Ya estaban pagadas: #{already_paid_id}" in body
+    assert "No encontradas: #9999" in body
+
+    with app.app_context():
+        assert db.session.get(Order, first_id).payment_status == PaymentStatus.paid
+        assert db.session.get(Order, second_id).payment_status == PaymentStatus.paid
+        subscription = db.session.get(Subscription, pending_subscription_id)
+        assert subscription.status == SubscriptionStatus.active
+
+
+def test_export_orders_streams_csv_and_jsonl(client, app, admin_setup):
+    force_login(client, app, admin_setup["admin_id"])
+
+    response = client.get("/admin/dashboard/pagos/exportar?estado=paid&metodo=transfer")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    lines = response.get_data(as_text=True).strip().splitlines()
+    assert lines[0].startswith("order_id,created_at")
+    assert len(lines) == 2
+    assert "guardian@example.com" in lines[1]
+    assert "Pagada" in lines[1]
+
+    response = client.get("/admin/dashboard/pagos/exportar?formato=jsonl&estado=pending")
+    assert response.status_code == 200
+    assert gzip.decompress(response.get_data()) == b""
+
+    response = client.get("/admin/dashboard/pagos/exportar?formato=jsonl")
+    rows = [json.loads(line) for line in gzip.decompress(response.get_data()).splitlines()]
+    assert [row["plan"] for row in rows] == ["Plan Familiar"]
+    assert rows[0]["amount_clp"] == admin_setup["expected_amount"]
+
+    assert client.get("/admin/dashboard/pagos/exportar?estado=bogus").status_code == 400
@@ -0,0 +1,234 @@
+import sys
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import (
+    ArchivedEnrollment,
+    ArchivedOrder,
+    ArchivedSubscription,
+    BillingCycle,
+    Child,
+    DayOfWeek,
+    Enrollment,
+    EnrollmentStatus,
+    Guardian,
+    Order,
+    PaymentMethod,
+    PaymentStatus,
+    Plan,
+    Subscription,
+    SubscriptionStatus,
+    User,
+    Workshop,
+)
+from app.services import archive, orders as order_service
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    MAIL_SUPPRESS_SEND = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+OLD = NOW - timedelta(days=800)
+RECENT = NOW - timedelta(days=30)
+
+
+def _at(row, when):
+    row.created_at = when
+    row.updated_at = when
+    return row
+
+
+@pytest.fixture
+def family(app):
+    user = User(email="familia@example.com", name="Familia Uno", password_hash="hash")
+    guardian = Guardian(user=user, phone="+56911111111")
+    child = Child(guardian=guardian, name="Tomás")
+    plan = Plan(name="Plan Base", max_children=1, max_workshops_per_child=2, price_monthly=10000)
+    workshop = Workshop(name="Aperturas", day_of_week=DayOfWeek.lunes, start_time=time(17, 0))
+    db.session.add_all([user, guardian, child, plan, workshop])
+
+    def subscription(status, when):
+        sub = _at(Subscription(guardian=guardian, plan=plan, billing_cycle=BillingCycle.monthly,
+                               status=status, start_date=when.date()), when)
+        db.session.add(sub)
+        return sub
+
+    def order(sub, status, when):
+        row = _at(Order(subscription=sub, amount_clp=10000, payment_method=PaymentMethod.transfer,
+                        payment_status=status), when)
+        db.session.add(row)
+        return row
+
+    def enrollment(sub, status, when):
+        row = _at(Enrollment(subscription=sub, child=child, workshop=workshop, status=status), when)
+        db.session.add(row)
+        return row
+
+    canceled = subscription(SubscriptionStatus.canceled, OLD)
+    order(canceled, PaymentStatus.paid, OLD)
+    enrollment(canceled, EnrollmentStatus.canceled, OLD)
+
+    active = subscription(SubscriptionStatus.active, OLD)
+    old_paid = order(active, PaymentStatus.paid, OLD)
+    last_paid = order(active, PaymentStatus.paid, OLD + timedelta(days=30))
+    changed = enrollment(active, EnrollmentStatus.changed, OLD)
+    current = enrollment(active, EnrollmentStatus.active, OLD)
+
+    # Cancelada hace poco y cancelada antigua con un pago en curso: se quedan
+    recent = subscription(SubscriptionStatus.canceled, RECENT)
+    open_order = subscription(SubscriptionStatus.canceled, OLD)
+    order(open_order, PaymentStatus.reserved, OLD)
+    db.session.commit()
+    return {
+        "canceled": canceled.id, "active": active.id, "recent": recent.id, "open_order": open_order.id,
+        "old_paid": old_paid.id, "last_paid": last_paid.id, "changed": changed.id, "current": current.id,
+        "child": child,
+    }
+
+
+def test_archive_moves_closed_rows_and_keeps_integrity(app, family):
+    counts = archive.archive(retention_days=730, chunk_size=1, now=NOW)
+
+    assert counts == {"subscriptions": 1, "orders": 2, "enrollments": 2}
+    assert db.session.get(Subscription, family["canceled"]) is None
+    assert db.session.get(ArchivedSubscription, family["canceled"]).status == SubscriptionStatus.canceled
+    assert {sid for sid, in db.session.query(Subscription.id)} == {
+        family["active"], family["recent"], family["open_order"]
+    }
+
+    # La última orden pagada y la matrícula activa siguen en las tablas activas
+    assert db.session.get(ArchivedOrder, family["old_paid"]) is not None
+    assert db.session.get(Order, family["last_paid"]) is not None
+    assert db.session.get(ArchivedEnrollment, family["changed"]) is not None
+    assert db.session.get(Enrollment, family["current"]) is not None
+
+    # Ninguna fila activa apunta a una suscripción archivada
+    live_ids = {sid for sid, in db.session.query(Subscription.id)}
+    assert {o.subscription_id for o in Order.query} <= live_ids
+    assert {e.subscription_id for e in Enrollment.query} <= live_ids
+
+
+def test_archive_is_idempotent_and_due_dates_unchanged(app, family):
+    active = db.session.get(Subscription, family["active"])
+    due_before = order_service.subscription_due_info(active, today=NOW.date())
+
+    archive.archive(retention_days=730, now=NOW)
+    assert archive.archive(retention_days=730, now=NOW) == {"subscriptions": 0, "orders": 0, "enrollments": 0}
+
+    db.session.expire_all()
+    active = db.session.get(Subscription, family["active"])
+    assert order_service.subscription_due_info(active, today=NOW.date()) == due_before
+
+
+def test_dry_run_counts_without_moving(app, family):
+    counts = archive.archive(retention_days=730, now=NOW, dry_run=True)
+
+    assert counts == {"subscriptions": 1, "orders": 2, "enrollments": 2}
+    assert ArchivedSubscription.query.count() == 0
+    assert db.session.get(Subscription, family["canceled"]) is not None
+
+
+def test_archive_columns_cover_live_tables():
+    for model, archived in archive.ARCHIVES.items():
+        live = {column.name for column in model.__table__.columns}
+        assert live <= {column.name for column in archived.__table__.columns}
+
+
+def _login_admin(client):
+    admin = User(email="admin@example.com", name="Admin", password_hash="", is_admin=True)
+    admin.activate()
+    admin.email_confirmed_at = datetime.now(timezone.utc)
+    db.session.add(admin)
+    db.session.commit()
+    with client.session_transaction() as session_ctx:
+        session_ctx["_user_id"] = str(admin.id)
+        session_ctx["_fresh"] = True
+
+
+def test_subscription_detail_shows_history_on_demand(app, client, family):
+    archive.archive(retention_days=730, now=NOW)
+    _login_admin(client)
+    url = f"/admin/dashboard/subscriptions/{family['active']}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert "Historial archivado" not in response.get_data(as_text=True)
+
+    html = client.get(f"{url}?historial=1").get_data(as_text=True)
+    assert "Historial archivado" in html
+    assert f"#{family['old_paid']}" in html
+    assert "Cambiada" in html
+
+
+def test_archived_subscription_renders_read_only(app, client, family):
+    archive.archive(retention_days=730, now=NOW)
+    _login_admin(client)
+
+    response = client.get(f"/admin/dashboard/subscriptions/{family['canceled']}")
+    html = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert "Archivada" in html
+    assert "familia@example.com" in html
+    assert client.get("/admin/dashboard/subscriptions/9999").status_code == 404
+
+
+def test_actions_on_archived_subscription_redirect(app, client, family):
+    archive.archive(retention_days=730, now=NOW)
+    _login_admin(client)
+
+    response = client.post(f"/admin/dashboard/pagos/subscriptions/{family['canceled']}/emitir")
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith("/admin/dashboard/pagos")
+
+    url = f"/admin/dashboard/subscriptions/{family['canceled']}"
+    response = client.post(url, data={"action": "cancel_subscription"})
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith(url)
+
+    assert client.post("/admin/dashboard/pagos/subscriptions/9999/emitir").status_code == 404
+
+
+def test_archive_cli(app, family):
+    result = app.test_cli_runner().invoke(args=["archive", "--dry-run"])
+
+    assert result.exit_code == 0, result.output
+    assert "[dry-run] Archivadas:" in result.output
+
+
+def test_delete_child_removes_archived_enrollments(app, family):
+    from app.services import guardians as guardian_service
+
+    archive.archive(retention_days=730, now=NOW)
+    guardian_service.delete_child(family["child"])
+    db.session.commit()
+
+    assert ArchivedEnrollment.query.count() == 0
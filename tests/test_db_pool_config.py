@@ -0,0 +1,126 @@
+import importlib
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+from app.services import diagnostics
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig:
+        TESTING = True
+        SECRET_KEY = "test-secret"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": True, "pool_recycle": 280}
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def config_module(monkeypatch):
+    for key in ("DB_POOL_SIZE", "DB_MAX_OVERFLOW", "DB_POOL_RECYCLE", "DB_POOL_PRE_PING", "DB_POOL_TIMEOUT",
+                "DB_CONNECT_TIMEOUT"):
+        monkeypatch.delenv(key, raising=False)
+    sys.modules.pop("config", None)
+    yield importlib.import_module("config")
+    sys.modules.pop("config", None)
+
+
+def test_engine_options_from_environment(config_module, monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "8")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "4")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "600")
+    monkeypatch.setenv("DB_CONNECT_TIMEOUT", "5")
+
+    options = config_module._engine_options("mysql+pymysql://u:p@db/app")
+
+    assert options == {
+        "pool_pre_ping": True,
+        "pool_recycle": 600,
+        "pool_size": 8,
+        "max_overflow": 4,
+        "connect_args": {"connect_timeout": 5},
+    }
+
+
+def test_engine_options_defaults_recycle_below_mysql_timeout(config_module, monkeypatch):
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+
+    options = config_module._engine_options("mysql+pymysql://u:p@db/app")
+
+    assert options == {"pool_pre_ping": False, "pool_recycle": 280}
+
+
+def test_engine_options_allow_disabling_recycle(config_module, monkeypatch):
+    monkeypatch.setenv("DB_POOL_RECYCLE", "0")
+
+    # En SQLAlchemy 0 recicla en cada checkout; -1 es "sin reciclaje"
+    assert config_module._engine_options("mysql+pymysql://u:p@db/app")["pool_recycle"] == -1
+
+
+def test_sqlite_skips_pool_sizing(config_module, monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "8")
+
+    assert config_module._engine_options("sqlite:///:memory:") == {"pool_pre_ping": True}
+
+
+def test_engine_receives_configured_options(app):
+    with app.app_context():
+        assert db.engine.pool._pre_ping is True
+        assert db.engine.pool._recycle == 280
+
+
+def test_warm_pool_is_noop_on_sqlite(app):
+    assert diagnostics.warm_pool(app, 3) == 0
+
+
+def test_pool_status_reports_pool_and_ping(app):
+    with app.app_context():
+        status = diagnostics.pool_status()
+
+    assert status["dialect"] == "sqlite"
+    assert status["error"] is None
+    assert status["ping_ms"] is not None
+    assert status["checkedout"] is not None
+
+
+def test_admin_diagnostics_page(app, client):
+    with app.app_context():
+        admin = User(email="admin@example.com", name="Admin", password_hash="", is_admin=True)
+        admin.activate()
+        admin.email_confirmed_at = datetime.now(timezone.utc)
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+
+    with client.session_transaction() as session_ctx:
+        session_ctx["_user_id"] = str(admin_id)
+        session_ctx["_fresh"] = True
+
+    response = client.get("/admin/dashboard/diagnostico")
+    assert response.status_code == 200
+    assert b"pool_recycle" in response.data
+    assert b"280" in response.data
@@ -0,0 +1,138 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db, oauth
+from app.models import User
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    GOOGLE_CLIENT_ID = "test-client-id"
+    GOOGLE_CLIENT_SECRET = "test-client-secret"
+
+
+class FakeGoogle:
+    def __init__(self, userinfo):
+        self.userinfo = userinfo
+
+    def authorize_access_token(self):
+        return {"userinfo": self.userinfo}
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def commits():
+    counter = []
+
+    def _count(_session):
+        counter.append(1)
+
+    event.listen(Session, "after_commit", _count)
+    yield counter
+    event.remove(Session, "after_commit", _count)
+
+
+def _callback(app, monkeypatch, userinfo):
+    monkeypatch.setattr(oauth, "create_client", lambda name: FakeGoogle(userinfo))
+    client = app.test_client()
+    response = client.get("/auth/google/callback")
+    with client.session_transaction() as session_ctx:
+        logged_in = session_ctx.get("_user_id")
+    return response, logged_in
+
+
+def test_first_google_login_creates_user_in_one_commit(app, monkeypatch, commits):
+    response, logged_in = _callback(
+        app, monkeypatch, {"email": "Nuevo.Apoderado@Example.com", "name": "Nuevo", "sub": "sub-1"}
+    )
+    assert response.status_code == 302
+    assert len(commits) == 1
+
+    with app.app_context():
+        user = User.query.one()
+        assert logged_in == str(user.id)
+        assert user.email == "nuevo.apoderado@example.com"
+        assert user.google_sub == "sub-1"
+        assert user.is_active
+        assert not user.has_usable_password()
+        assert user.last_login_at is not None
+        assert user.previous_login_at is None
+
+
+def test_existing_user_is_matched_case_insensitively_and_logins_rotate(app, monkeypatch, commits):
+    last_login = datetime.now(timezone.utc) - timedelta(days=3)
+    with app.app_context():
+        db.session.execute(
+            User.__table__.insert().values(
+                email="Legacy@Example.com",
+                name="Legacy",
+                password_hash="!legacy",
+                is_admin=False,
+                is_active=False,
+                last_login_at=last_login,
+            )
+        )
+        db.session.commit()
+    commits.clear()
+
+    response, logged_in = _callback(
+        app, monkeypatch, {"email": "legacy@example.com", "name": "Legacy Google", "sub": "sub-2"}
+    )
+    assert response.status_code == 302
+    assert len(commits) == 1
+
+    with app.app_context():
+        user = User.query.one()
+        assert logged_in == str(user.id)
+        assert user.google_sub == "sub-2"
+        assert user.name == "Legacy Google"
+        assert user.is_active
+        assert user.previous_login_at.replace(tzinfo=None) == last_login.replace(tzinfo=None)
+
+
+def test_upsert_updates_row_on_email_conflict(app):
+    from app.auth import _upsert_google_user
+
+    with app.test_request_context("/"):
+        first = _upsert_google_user({"email": "race@example.com", "sub": "sub-3"}, "race@example.com")
+        db.session.commit()
+        first_login = first.last_login_at
+
+        # Simula un login concurrente que no vio la fila: el upsert nativo no debe duplicarla.
+        from app.services.upserts import upsert
+
+        users = User.__table__
+        upsert(
+            users,
+            values={"email": "race@example.com", "name": "Otro", "password_hash": "!x", "is_active": True},
+            conflict_columns=["email"],
+            update_values={"previous_login_at": users.c.last_login_at, "name": "Otro"},
+        )
+        db.session.commit()
+        user = User.query.one()
+        assert user.name == "Otro"
+        assert user.previous_login_at == first_login
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import oauth
+from app.services import google_oauth
+
+DISCOVERY = {
+    "issuer": "https://accounts.google.com",
+    "authorization_endpoint": "https://accounts.google.com/o/oauth2/v2/auth",
+    "token_endpoint": "https://oauth2.googleapis.com/token",
+    "jwks_uri": "https://www.googleapis.com/oauth2/v3/certs",
+}
+JWKS = {"keys": [{"kid": "test", "kty": "RSA", "n": "abc", "e": "AQAB"}]}
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    calls = []
+
+    def _fake_fetch(url, timeout):
+        calls.append(url)
+        return JWKS if url == DISCOVERY["jwks_uri"] else DISCOVERY
+
+    monkeypatch.setattr(google_oauth, "fetch_json", _fake_fetch)
+    return calls
+
+
+def _config(tmp_path, warmup):
+    class TestConfig:
+        TESTING = True
+        SECRET_KEY = "test-secret"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        GOOGLE_CLIENT_ID = "test-client-id"
+        GOOGLE_CLIENT_SECRET = "test-client-secret"
+        GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+        GOOGLE_OAUTH_CACHE_DIR = str(tmp_path)
+        GOOGLE_OAUTH_WARMUP = warmup
+
+    return TestConfig
+
+
+def test_warmup_prefetches_and_next_worker_reads_disk(tmp_path, fetches):
+    app = create_app(_config(tmp_path, warmup=True))
+    assert fetches == [_config(tmp_path, True).GOOGLE_DISCOVERY_URL, DISCOVERY["jwks_uri"]]
+    assert (tmp_path / "google-discovery.json").exists()
+    assert (tmp_path / "google-jwks.json").exists()
+
+    with app.app_context():
+        google = oauth.create_client("google")
+        assert google.server_metadata["token_endpoint"] == DISCOVERY["token_endpoint"]
+        assert google.server_metadata["jwks"] == JWKS
+        assert "_loaded_at" in google.server_metadata
+        assert google.client_cls is google_oauth.KeepAliveOAuth2Session
+
+    # Un worker nuevo (sin warmup) lee el caché en disco y no sale a la red.
+    fetches.clear()
+    create_app(_config(tmp_path, warmup=False))
+    assert fetches == []
+
+
+def test_stale_disk_copy_is_used_when_network_fails(tmp_path, monkeypatch):
+    app = create_app(_config(tmp_path, warmup=False))
+    app.config["GOOGLE_OAUTH_CACHE_TTL"] = 0
+    google_oauth._write_disk(tmp_path / "google-discovery.json", DISCOVERY)
+
+    def _offline(url, timeout):
+        raise google_oauth.requests.ConnectionError("offline")
+
+    monkeypatch.setattr(google_oauth, "fetch_json", _offline)
+    document = google_oauth.load_document(app, "google-discovery", "https://example.invalid")
+    assert document == DISCOVERY
+
+
+def test_token_and_userinfo_requests_have_a_timeout(tmp_path, fetches):
+    app = create_app(_config(tmp_path, warmup=False))
+
+    with app.app_context():
+        session = oauth.create_client("google")._get_oauth_client()
+        assert isinstance(session, google_oauth.KeepAliveOAuth2Session)
+        assert session.default_timeout == app.config.get("GOOGLE_HTTP_TIMEOUT", 10)
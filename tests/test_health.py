@@ -0,0 +1,109 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db, metrics
+from app.services import health as health_service
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig:
+        TESTING = True
+        SECRET_KEY = "test-secret"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        READYZ_CACHE_SECONDS = 60
+        ACCESS_LOG_ENABLED = True
+        ACCESS_LOG_PATH = str(tmp_path / "access.jsonl")
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def statements(app):
+    executed = []
+    with app.app_context():
+        engine = db.engine
+
+    def _record(_conn, _cursor, statement, *_args):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", _record)
+
+
+def test_healthz_does_no_io(client, statements):
+    response = client.get("/healthz")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ok"}
+    assert statements == []
+    assert "Set-Cookie" not in response.headers
+
+
+def test_readyz_caches_database_check(client, statements):
+    first = client.get("/readyz")
+    second = client.get("/readyz")
+
+    assert first.status_code == second.status_code == 200
+    body = first.get_json()
+    assert body["ready"] is True
+    assert body["checks"]["database"]["status"] == "ok"
+    assert [s for s in statements if s.strip().upper() == "SELECT 1"] == ["SELECT 1"]
+
+
+def test_readyz_reports_pending_migrations(app, client, monkeypatch):
+    monkeypatch.setattr(health_service, "_script_heads", lambda _app: ("abc123",))
+
+    response = client.get("/readyz")
+
+    assert response.status_code == 503
+    migrations = response.get_json()["checks"]["migrations"]
+    assert migrations["status"] == "pending"
+    assert migrations["heads"] == ["abc123"]
+
+
+def test_readyz_optional_checks_do_not_affect_readiness(app, client, monkeypatch):
+    app.config.update(READYZ_CHECK_MAIL=True, READYZ_CHECK_TRANSBANK=True, MAIL_SERVER="smtp.invalid")
+    monkeypatch.setattr(health_service, "_tcp_reachable", lambda host, port, timeout: False)
+
+    response = client.get("/readyz")
+
+    assert response.status_code == 200
+    checks = response.get_json()["checks"]
+    assert checks["mail"] == {"reachable": False}
+    assert checks["transbank"] == {"reachable": False}
+
+
+def test_probes_are_excluded_from_metrics_and_access_log(app, client):
+    client.get("/healthz")
+    client.get("/readyz")
+    app.extensions["access_log"].close()
+
+    with app.app_context():
+        registry = metrics.collect()
+    endpoints = {dict(key).get("endpoint") for key in registry.counters.get("http_requests_total", {})}
+    assert not endpoints & {"health.healthz", "health.readyz"}
+    log = Path(app.config["ACCESS_LOG_PATH"])
+    assert not log.exists() or log.read_text(encoding="utf-8") == ""
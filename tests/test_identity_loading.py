@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app, identity
+from app.extensions import db
+from app.models import Guardian, User
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    MAIL_SUPPRESS_SEND = True
+    IDENTITY_CACHE_TTL = 60
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(email="guardian@example.com", name="Guardian", password_hash="hash")
+        user.activate()
+        db.session.add_all([user, Guardian(user=user, phone="123456789")])
+        db.session.commit()
+        app.config["USER_ID"] = user.id
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def statements(app):
+    captured = []
+    with app.app_context():
+        engine = db.engine
+
+    def _capture(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    yield captured
+    event.remove(engine, "before_cursor_execute", _capture)
+
+
+def test_user_and_guardian_load_in_one_query_then_from_cache(app, statements):
+    user_id = app.config["USER_ID"]
+
+    with app.test_request_context("/"):
+        user = identity.load_user(user_id)
+        assert user.guardian_profile.phone == "123456789"
+    assert len(statements) == 1
+    assert "guardians" in statements[0]
+
+    statements.clear()
+    with app.test_request_context("/"):
+        user = identity.load_user(user_id)
+        assert user.email == "guardian@example.com"
+        assert user.guardian_profile.phone == "123456789"
+        assert user in db.session
+    assert statements == []
+
+
+def test_updating_guardian_invalidates_cached_identity(app):
+    user_id = app.config["USER_ID"]
+
+    with app.test_request_context("/"):
+        identity.load_user(user_id)
+
+    with app.test_request_context("/"):
+        user = identity.load_user(user_id)
+        user.guardian_profile.phone = "+56900000000"
+        user.name = "Nuevo Nombre"
+        db.session.commit()
+
+    with app.test_request_context("/"):
+        user = identity.load_user(user_id)
+        assert user.name == "Nuevo Nombre"
+        assert user.guardian_profile.phone == "+56900000000"
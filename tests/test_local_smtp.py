@@ -0,0 +1,112 @@
+import sys
+from pathlib import Path
+
+import pytest
+from flask_mail import Message
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db, mail
+from app.models import OutboxMessage, OutboxStatus
+from app.services import outbox
+from tests.local_smtp import LocalSMTPServer
+
+
+@pytest.fixture
+def smtp_server():
+    with LocalSMTPServer() as server:
+        yield server
+
+
+@pytest.fixture
+def app(smtp_server):
+    class TestConfig:
+        TESTING = True
+        SECRET_KEY = "test-secret"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        MAIL_DEFAULT_SENDER = "no-reply@example.com"
+        MAIL_TIMEOUT = 5
+
+    app = create_app(TestConfig)
+    app.config.update(smtp_server.config())
+    # Flask-Mail lee la configuración en init_app
+    mail.init_app(app)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def _message(index, recipient="familia@example.com"):
+    return Message(f"Aviso {index} – ñandú", recipients=[recipient], body=f"Cuerpo {index}")
+
+
+def test_flask_mail_send_reaches_local_server(app, smtp_server):
+    with app.app_context():
+        mail.send(_message(1))
+
+    [received] = smtp_server.messages
+    assert received.mail_from == "no-reply@example.com"
+    assert received.rcpt_tos == ["familia@example.com"]
+    assert received.email["Subject"] == "Aviso 1 – ñandú"
+    assert received.email.get_content().strip() == "Cuerpo 1"
+
+
+def test_outbox_drain_over_local_server(app, smtp_server):
+    with app.app_context():
+        for index in range(5):
+            outbox.enqueue("payment_confirmation", f"f{index}@example.com", {
+                "order_id": index, "guardian_name": "Ana", "plan": "Plan Base", "cycle": "Mensual",
+                "amount_clp": 10000, "payment_method": "Webpay", "children": [], "workshops": [],
+            })
+        db.session.commit()
+
+        counts = outbox.drain(batch_size=2)
+        statuses = set(db.session.scalars(db.select(OutboxMessage.status)))
+
+    assert counts["sent"] == 5
+    assert statuses == {OutboxStatus.sent}
+    assert smtp_server.connections == 1
+    assert smtp_server.messages[0].email["Subject"] == "Pago confirmado – Plan Base"
+
+
+
+def _enqueue(index, recipient):
+    outbox.enqueue("payment_confirmation", recipient, {
+        "order_id": index, "guardian_name": "Ana", "plan": "Plan Base", "cycle": "Mensual",
+        "amount_clp": 10000, "payment_method": "Webpay", "children": [], "workshops": [],
+    })
+
+
+def test_outbox_retries_after_421(app, smtp_server):
+    smtp_server.fail_next(1)
+
+    with app.app_context():
+        _enqueue(1, "familia@example.com")
+        db.session.commit()
+        counts = outbox.drain()
+        message = db.session.scalars(db.select(OutboxMessage)).one()
+
+    assert counts == {"sent": 0, "retried": 1, "failed": 0}
+    assert message.status == OutboxStatus.pending and message.attempts == 1
+    assert smtp_server.messages == []
+
+
+def test_rejected_recipient_is_permanent(app, smtp_server):
+    smtp_server.reject("nadie@example.com")
+
+    with app.app_context():
+        _enqueue(1, "nadie@example.com")
+        _enqueue(2, "familia@example.com")
+        db.session.commit()
+        counts = outbox.drain()
+
+    assert counts == {"sent": 1, "retried": 0, "failed": 1}
+    assert [m.rcpt_tos for m in smtp_server.messages] == [["familia@example.com"]]
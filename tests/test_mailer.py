@@ -0,0 +1,25 @@
+import smtplib
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import mailer
+
+
+@pytest.mark.parametrize("exc, permanent", [
+    (smtplib.SMTPSenderRefused(421, b"4.7.0 Try again later", "a@example.com"), False),
+    (smtplib.SMTPSenderRefused(553, b"5.1.8 Sender rejected", "a@example.com"), True),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (450, b"mailbox busy")}), False),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"no existe")}), True),
+    (smtplib.SMTPDataError(452, b"insufficient storage"), False),
+    (smtplib.SMTPAuthenticationError(535, b"bad credentials"), False),
+    (smtplib.SMTPServerDisconnected("cerrada"), False),
+    (OSError("timeout"), False),
+])
+def test_is_permanent_by_reply_code(exc, permanent):
+    assert mailer.is_permanent(exc) is permanent
@@ -0,0 +1,149 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.observability.metrics import MetricsRegistry, render, track_outbound
+from app.services import webpay as webpay_service
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _samples(text: str) -> dict[str, float]:
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+def test_metrics_expose_request_latency_and_status(client):
+    client.get("/reglamento")
+    client.get("/reglamento")
+    client.get("/no-existe")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    samples = _samples(text)
+
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert samples['http_requests_total{endpoint="inscriptions.reglamento",method="GET",status="200"}'] == 2
+    assert samples['http_requests_total{endpoint="<unmatched>",method="GET",status="404"}'] == 1
+    assert samples['http_request_duration_seconds_bucket{endpoint="inscriptions.reglamento",le="+Inf"}'] == 2
+    assert samples['http_request_duration_seconds_count{endpoint="inscriptions.reglamento"}'] == 2
+    # La propia ruta de métricas no se cuenta.
+    assert 'endpoint="metrics"' not in text
+
+
+def test_outbound_calls_are_timed(app, client, monkeypatch):
+    class FakeTransaction:
+        def status(self, token):
+            return {"status": "AUTHORIZED"}
+
+        def commit(self, token):
+            raise RuntimeError("timeout")
+
+    monkeypatch.setattr(webpay_service, "_build_transaction", lambda: FakeTransaction())
+    with app.app_context():
+        webpay_service.status_token("tok")
+        with pytest.raises(RuntimeError):
+            webpay_service.commit_token("tok")
+
+    samples = _samples(client.get("/metrics").get_data(as_text=True))
+    assert samples['outbound_requests_total{operation="status",outcome="ok",service="transbank"}'] == 1
+    assert samples['outbound_requests_total{operation="commit",outcome="error",service="transbank"}'] == 1
+    assert samples['outbound_request_duration_seconds_count{operation="status",service="transbank"}'] == 1
+
+
+def test_track_outbound_without_app_context_is_noop():
+    with track_outbound("google", "token"):
+        pass
+
+
+def test_metrics_token_protects_endpoint():
+    class TokenConfig(TestConfig):
+        METRICS_TOKEN = "s3cret"
+
+    client = create_app(TokenConfig).test_client()
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_metrics_require_token_outside_debug_and_testing():
+    class ProductionConfig(TestConfig):
+        TESTING = False
+
+    client = create_app(ProductionConfig).test_client()
+    assert client.get("/metrics").status_code == 403
+
+
+def test_multiprocess_files_are_merged(tmp_path):
+    class MultiConfig(TestConfig):
+        METRICS_DIR = str(tmp_path / "metrics")
+        # Con un archivo SQLAlchemy usa QueuePool, que expone checkedout()/overflow().
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+
+    app = create_app(MultiConfig)
+    with app.app_context():
+        db.create_all()
+
+    # Otro worker (ya terminado) dejó su propio volcado.
+    other = MetricsRegistry()
+    other.inc("http_requests_total", {"endpoint": "inscriptions.reglamento", "method": "GET", "status": 200}, 3)
+    other.observe("http_request_duration_seconds", {"endpoint": "inscriptions.reglamento"}, 0.2)
+    other.set_gauge("db_pool_checked_out", {}, 7)
+    (tmp_path / "metrics" / "999999.json").write_text(json.dumps(other.to_dict()))
+
+    client = app.test_client()
+    client.get("/reglamento")
+    samples = _samples(client.get("/metrics").get_data(as_text=True))
+
+    assert samples['http_requests_total{endpoint="inscriptions.reglamento",method="GET",status="200"}'] == 4
+    assert samples['http_request_duration_seconds_count{endpoint="inscriptions.reglamento"}'] == 2
+    assert samples['http_request_duration_seconds_bucket{endpoint="inscriptions.reglamento",le="0.25"}'] == 2
+    # Los gauges de un proceso muerto no se suman.
+    assert samples["db_pool_checked_out"] == 0
+    assert samples["db_pool_size"] == 5
+
+    # El archivo del worker muerto se plegó en retired.json: los totales no cambian.
+    assert not (tmp_path / "metrics" / "999999.json").exists()
+    assert (tmp_path / "metrics" / "retired.json").exists()
+    samples = _samples(client.get("/metrics").get_data(as_text=True))
+    assert samples['http_requests_total{endpoint="inscriptions.reglamento",method="GET",status="200"}'] == 4
+
+
+def test_render_escapes_label_values():
+    registry = MetricsRegistry()
+    registry.inc("http_requests_total", {"endpoint": 'a"b', "method": "GET", "status": 500})
+    assert 'endpoint="a\\"b"' in render(registry)
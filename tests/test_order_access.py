@@ -1,3 +1,4 @@
+import json
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
@@ -12,6 +13,7 @@ if str(ROOT_DIR) not in sys.path:
 
 from app import create_app
 from app.extensions import db
+from app.orders import _receipt_context
 from app.models import (
     BillingCycle,
     Guardian,
@@ -163,4 +165,22 @@ def test_user_without_guardian_profile_gets_404(client, app, order_context):
     force_login(client, app, order_context["outsider_id"])
 
     response = client.get(f"/pago/{order_context['order_id']}")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_partial_snapshot_falls_back_and_keeps_ownership(client, app, order_context):
+    with app.app_context():
+        order = db.session.get(Order, order_context["order_id"])
+        # Snapshot antiguo sin apoderado, con un user_id ajeno que no debe dar acceso
+        order.detail = json.dumps({"plan": {"name": "Plan Antiguo"}, "user_id": order_context["intruder_id"]})
+        db.session.commit()
+        receipt = _receipt_context(order)
+        assert receipt["guardian_email"] == "owner@example.com"
+        assert receipt["billing_cycle"] == BillingCycle.monthly
+
+    force_login(client, app, order_context["owner_id"])
+    response = client.get(f"/pago/{order_context['order_id']}")
+    assert response.status_code == 200
+    assert b"Plan Antiguo" in response.data
+
+    force_login(client, app, order_context["intruder_id"])
+    assert client.get(f"/pago/{order_context['order_id']}").status_code == 403
@@ -0,0 +1,141 @@
+import sys
+from datetime import datetime, time, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import (
+    DayOfWeek,
+    Order,
+    PaymentMethod,
+    PaymentStatus,
+    Plan,
+    User,
+    Workshop,
+)
+from app.services import webpay as webpay_service
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    MAIL_SUPPRESS_SEND = True
+    SERVER_NAME = "example.com"
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def enrolled(app, client):
+    with app.app_context():
+        plan = Plan(
+            name="Plan Trimestral",
+            max_children=1,
+            max_workshops_per_child=1,
+            price_monthly=10000,
+            quarterly_discount_pct=10,
+        )
+        workshop = Workshop(
+            name="Taller Sábado",
+            day_of_week=DayOfWeek.sabado,
+            start_time=time(10, 0),
+            is_active=True,
+        )
+        user = User(email="guardian@example.com", name="Guardian", password_hash="hash")
+        user.activate()
+        user.email_confirmed_at = datetime.now(timezone.utc)
+        db.session.add_all([plan, workshop, user])
+        db.session.commit()
+        plan_id, workshop_id, user_id = plan.id, workshop.id, user.id
+
+    with client.session_transaction() as session_ctx:
+        session_ctx["_user_id"] = str(user_id)
+        session_ctx["_fresh"] = True
+
+    response = client.post(
+        f"/inscripcion/{plan_id}?billing=quarterly",
+        data={
+            "guardian_name": "Guardian",
+            "guardian_email": "guardian@example.com",
+            "phone": "+56912345678",
+            "children-0-name": "Niña Snapshot",
+            "children-0-knowledge_level": "none",
+            "payment_method": "webpay",
+            "workshops": [str(workshop_id)],
+        },
+    )
+    assert response.status_code == 302
+
+    with app.app_context():
+        order = Order.query.one()
+        return {"order_id": order.id, "plan_id": plan_id}
+
+
+def test_order_creation_stores_snapshot(app, enrolled):
+    with app.app_context():
+        snapshot = db.session.get(Order, enrolled["order_id"]).snapshot
+
+    assert snapshot["plan"]["name"] == "Plan Trimestral"
+    assert snapshot["cycle"]["code"] == "quarterly"
+    assert snapshot["amount"] == {
+        "monthly": 10000,
+        "months": 3,
+        "subtotal": 30000,
+        "discount_pct": 10,
+        "total": 27000,
+    }
+    assert snapshot["guardian"]["email"] == "guardian@example.com"
+    assert snapshot["children"] == ["Niña Snapshot"]
+    assert snapshot["workshops"] == [{"name": "Taller Sábado", "day": "Sábado", "start": "10:00"}]
+
+
+def test_receipt_pages_render_from_snapshot(app, client, enrolled, monkeypatch):
+    with app.app_context():
+        # El comprobante no debe cambiar aunque luego se edite el plan.
+        db.session.get(Plan, enrolled["plan_id"]).name = "Plan Renombrado"
+        order = db.session.get(Order, enrolled["order_id"])
+        order.external_id = "snapshot-token"
+        db.session.commit()
+
+    response = client.get(f"/pago/{enrolled['order_id']}")
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert "Plan Trimestral" in body
+    assert "Niña Snapshot" in body
+    assert "Plan Renombrado" not in body
+
+    monkeypatch.setattr(
+        webpay_service, "commit_token", lambda token: {"status": "AUTHORIZED", "response_code": 0}
+    )
+    response = client.post("/pago/webpay/retorno", data={"token_ws": "snapshot-token"})
+    assert response.status_code == 200
+    assert "Plan Trimestral" in response.get_data(as_text=True)
+
+    with app.app_context():
+        order = db.session.get(Order, enrolled["order_id"])
+        assert order.payment_status == PaymentStatus.paid
+        assert order.payment_method == PaymentMethod.webpay
+        assert order.snapshot["plan"]["name"] == "Plan Trimestral"
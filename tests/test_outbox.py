@@ -0,0 +1,240 @@
+import smtplib
+import sys
+from datetime import datetime, time, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app, mailer
+from app.extensions import db
+from app.models import (
+    DayOfWeek,
+    Order,
+    OutboxMessage,
+    OutboxStatus,
+    Plan,
+    User,
+    Workshop,
+)
+from app.services import outbox
+from app.services import webpay as webpay_service
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    MAIL_DEFAULT_SENDER = "test@example.com"
+    MAIL_SUPPRESS_SEND = True
+    SERVER_NAME = "localhost"
+
+
+class FakeConnection:
+    def __init__(self, log, fail=0):
+        self.log = log
+        self.fail = fail
+
+    def __enter__(self):
+        self.log.append("connect")
+        return self
+
+    def send(self, message):
+        if self.fail:
+            self.fail -= 1
+            raise smtplib.SMTPServerDisconnected("caída")
+        self.log.append((message.recipients[0], message.subject, message.body))
+
+    def close(self):
+        self.log.append("close")
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def smtp_log(monkeypatch):
+    log = []
+    monkeypatch.setattr(mailer, "connect", lambda _app=None: FakeConnection(log))
+    return log
+
+
+def _enroll(client, app, payment_method="transfer", email="guardian@example.com"):
+    with app.app_context():
+        plan_name = "Plan Test" if email == "guardian@example.com" else f"Plan {email}"
+        plan = Plan(name=plan_name, max_children=1, max_workshops_per_child=1, price_monthly=10000)
+        workshop = Workshop(
+            name="Taller Test", day_of_week=DayOfWeek.lunes,
+            start_time=time(10, 0), end_time=time(11, 0), is_active=True,
+        )
+        user = User(email=email, name="Guardian", password_hash="hash")
+        user.activate()
+        user.email_confirmed_at = datetime.now(timezone.utc)
+        db.session.add_all([plan, workshop, user])
+        db.session.commit()
+        plan_id, workshop_id, user_id = plan.id, workshop.id, user.id
+
+    with client.session_transaction() as session_ctx:
+        session_ctx["_user_id"] = str(user_id)
+        session_ctx["_fresh"] = True
+
+    return client.post(
+        f"/inscripcion/{plan_id}",
+        data={
+            "guardian_name": "Guardian",
+            "guardian_email": email,
+            "phone": "+56912345678",
+            "children-0-name": "Niño Test",
+            "children-0-birthdate": "2015-01-01",
+            "children-0-knowledge_level": "none",
+            "payment_method": payment_method,
+            "workshops": [str(workshop_id)],
+        },
+    )
+
+
+def test_inscription_writes_outbox_row_in_same_transaction(client, app, smtp_log):
+    response = _enroll(client, app)
+
+    assert response.status_code == 200
+    assert smtp_log == []  # la respuesta no espera al SMTP
+    with app.app_context():
+        message = db.session.execute(db.select(OutboxMessage)).scalar_one()
+        assert message.kind == "inscription_confirmation"
+        assert message.recipient == "guardian@example.com"
+        assert message.status == OutboxStatus.pending
+        assert message.context["plan"] == "Plan Test"
+        assert message.context["children"] == ["Niño Test"]
+
+
+def test_each_inscription_gets_its_own_outbox_row(client, app, smtp_log):
+    assert _enroll(client, app).status_code == 200
+    assert _enroll(client, app, email="otra@example.com").status_code == 200
+
+    with app.app_context():
+        messages = db.session.scalars(db.select(OutboxMessage).order_by(OutboxMessage.id)).all()
+        orders = db.session.scalars(db.select(Order).order_by(Order.id)).all()
+        assert [m.recipient for m in messages] == ["guardian@example.com", "otra@example.com"]
+        assert [m.context["order_id"] for m in messages] == [o.id for o in orders]
+        assert [m.dedupe_key for m in messages] == [
+            f"inscription:{o.subscription_id}" for o in orders
+        ]
+        assert None not in [o.id for o in orders]
+
+
+def test_failed_commit_leaves_no_outbox_row(client, app, monkeypatch):
+    real_commit = db.session.commit
+
+    def _commit():
+        # Falla solo el commit de la inscripción (el que lleva el correo)
+        if any(isinstance(obj, OutboxMessage) for obj in db.session.new):
+            raise RuntimeError("base caída")
+        real_commit()
+
+    monkeypatch.setattr(db.session, "commit", _commit)
+    response = _enroll(client, app)
+
+    assert response.status_code == 200
+    assert "base caída" in response.get_data(as_text=True)
+    with app.app_context():
+        assert db.session.execute(db.select(OutboxMessage)).first() is None
+        assert db.session.execute(db.select(Order)).first() is None
+
+
+def test_webpay_return_enqueues_payment_confirmation_once(client, app, monkeypatch, smtp_log):
+    monkeypatch.setattr(webpay_service, "create_for_order", lambda order: ("tok-1", "https://webpay.test"))
+    _enroll(client, app, payment_method="webpay")
+    with app.app_context():
+        order = db.session.execute(db.select(Order)).scalar_one()
+        order.external_id = "tok-1"
+        db.session.commit()
+
+    monkeypatch.setattr(webpay_service, "commit_token", lambda token: {"status": "AUTHORIZED", "response_code": 0})
+    client.post("/pago/webpay/retorno", data={"token_ws": "tok-1"})
+    client.post("/pago/webpay/retorno", data={"token_ws": "tok-1"})
+
+    with app.app_context():
+        kinds = db.session.scalars(db.select(OutboxMessage.kind).order_by(OutboxMessage.id)).all()
+    assert kinds == ["inscription_confirmation", "payment_confirmation"]
+
+
+def test_drain_sends_batch_over_one_connection(client, app, smtp_log):
+    _enroll(client, app)
+    with app.app_context():
+        order = db.session.execute(db.select(Order)).scalar_one()
+        outbox.enqueue_payment_confirmation(order)
+        db.session.commit()
+
+        counts = outbox.drain(batch_size=10)
+
+        statuses = db.session.scalars(db.select(OutboxMessage.status)).all()
+    assert counts == {"sent": 2, "retried": 0, "failed": 0}
+    assert statuses == [OutboxStatus.sent, OutboxStatus.sent]
+    assert smtp_log[0] == "connect" and smtp_log[-1] == "close"
+    assert smtp_log.count("connect") == 1
+    recipient, subject, body = smtp_log[1]
+    assert recipient == "guardian@example.com"
+    assert subject == "Inscripción recibida – Plan Test"
+    assert "Niño Test" in body
+
+
+def test_drain_retries_transient_errors_with_backoff(client, app, monkeypatch):
+    _enroll(client, app)
+    log = []
+    monkeypatch.setattr(mailer, "connect", lambda _app=None: FakeConnection(log, fail=1))
+
+    with app.app_context():
+        counts = outbox.drain(backoff=60)
+        message = db.session.execute(db.select(OutboxMessage)).scalar_one()
+        assert counts == {"sent": 0, "retried": 1, "failed": 0}
+        assert message.status == OutboxStatus.pending
+        assert message.attempts == 1
+        assert "caída" in message.last_error
+        # Aún no disponible: el siguiente drenado no lo toma
+        assert outbox.drain() == {"sent": 0, "retried": 0, "failed": 0}
+
+
+def test_claims_do_not_overlap_and_stale_claims_are_recovered(client, app):
+    with app.app_context():
+        for index in range(3):
+            outbox.enqueue("payment_confirmation", f"f{index}@example.com", {"plan": "P"})
+        db.session.commit()
+
+        first = [m.id for m in outbox.claim_batch(2, worker="a")]
+        second = [m.id for m in outbox.claim_batch(2, worker="b")]
+        assert len(first) == 2 and len(second) == 1
+        assert not set(first) & set(second)
+        assert outbox.claim_batch(2, worker="c") == []
+
+        stale = db.session.get(OutboxMessage, first[0])
+        stale.claimed_at = datetime.now(timezone.utc) - timedelta(minutes=10)
+        db.session.commit()
+        recovered = outbox.claim_batch(2, worker="c", lease_seconds=300)
+        assert [m.id for m in recovered] == [first[0]]
+
+
+def test_outbox_drain_command(client, app, smtp_log):
+    _enroll(client, app)
+
+    result = app.test_cli_runner().invoke(args=["outbox-drain"])
+
+    assert result.exit_code == 0, result.output
+    assert "Enviados: 1" in result.output
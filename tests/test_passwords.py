@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_oauth_only_user_has_unusable_password(app):
+    user = User(email="oauth@example.com", name="OAuth")
+    user.set_unusable_password()
+
+    assert not user.has_usable_password()
+    assert not user.check_password("")
+    assert not user.check_password(user.password_hash)
+    assert not user.password_needs_rehash()
+
+
+def test_password_needs_rehash_when_policy_changes(app):
+    user = User(email="admin@example.com", name="Admin", is_admin=True)
+    user.set_password("IamBatman")
+    db.session.add(user)
+    db.session.commit()
+    assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+    assert not user.password_needs_rehash()
+
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+    assert user.password_needs_rehash()
+    assert not user.check_password("wrong")
+
+    # Verificar no modifica el hash: el rehash queda a cargo del flujo de login
+    assert user.check_password("IamBatman")
+    assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+
+    user.set_password("IamBatman")
+    db.session.commit()
+    assert db.session.get(User, user.id).password_hash.startswith("pbkdf2:sha256:2000$")
+    assert not user.password_needs_rehash()
+    assert user.check_password("IamBatman")
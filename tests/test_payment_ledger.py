@@ -0,0 +1,130 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+from flask import session
+from flask_login import login_user
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import (
+    BillingCycle,
+    Guardian,
+    Order,
+    PaymentEvent,
+    PaymentMethod,
+    PaymentStatus,
+    Plan,
+    RevenueRollup,
+    Subscription,
+    User,
+)
+from app.services import ledger
+from app.services import orders as order_service
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    MAIL_SUPPRESS_SEND = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def orders(app):
+    plan = Plan(name="Plan", max_children=1, max_workshops_per_child=1, price_monthly=10000)
+    user = User(email="guardian@example.com", name="Guardian", password_hash="hash")
+    guardian = Guardian(user=user, phone="123456789")
+    subscription = Subscription(guardian=guardian, plan=plan, billing_cycle=BillingCycle.monthly)
+    transfer = Order(subscription=subscription, amount_clp=10000, payment_method=PaymentMethod.transfer)
+    webpay = Order(subscription=subscription, amount_clp=25000, payment_method=PaymentMethod.webpay)
+    db.session.add_all([plan, user, guardian, subscription, transfer, webpay])
+    db.session.commit()
+    return transfer, webpay
+
+
+def _rollup(granularity, method):
+    today = date.today()
+    period_start = today.replace(day=1) if granularity == "month" else today
+    return RevenueRollup.query.filter_by(
+        granularity=granularity, period_start=period_start, payment_method=method
+    ).one_or_none()
+
+
+def test_transitions_append_events_and_update_rollups(app, orders):
+    transfer, webpay = orders
+
+    order_service.mark_order_paid(transfer)
+    order_service.mark_order_paid(webpay)
+    db.session.commit()
+    order_service.mark_order_pending(webpay)
+    order_service.mark_order_failed(webpay)
+    db.session.commit()
+
+    events = PaymentEvent.query.filter_by(order_id=webpay.id).order_by(PaymentEvent.id).all()
+    assert [(e.from_status, e.to_status) for e in events] == [
+        (PaymentStatus.pending, PaymentStatus.paid),
+        (PaymentStatus.paid, PaymentStatus.pending),
+        (PaymentStatus.pending, PaymentStatus.failed),
+    ]
+
+    for granularity in ("day", "month"):
+        assert _rollup(granularity, PaymentMethod.transfer).paid_amount_clp == 10000
+        assert _rollup(granularity, PaymentMethod.webpay).paid_amount_clp == 0
+        assert _rollup(granularity, PaymentMethod.webpay).paid_count == 0
+
+    series = ledger.revenue_series("month", date.today(), date.today())
+    assert series[0]["total_clp"] == 10000
+
+    # Reconstruir desde el libro debe dar el mismo resultado.
+    ledger.rebuild_rollups()
+    db.session.commit()
+    assert _rollup("day", PaymentMethod.transfer).paid_amount_clp == 10000
+
+
+def test_bulk_confirm_writes_ledger(app, orders):
+    transfer, webpay = orders
+
+    order_service.confirm_orders_bulk([transfer.id, webpay.id])
+    db.session.commit()
+
+    assert PaymentEvent.query.count() == 2
+    assert _rollup("month", PaymentMethod.transfer).paid_amount_clp == 10000
+    assert _rollup("month", PaymentMethod.webpay).paid_amount_clp == 25000
+
+
+def test_revenue_dashboard_reads_rollups(app, orders):
+    order_service.mark_order_paid(orders[0])
+    admin = User(email="admin@example.com", name="Admin", password_hash="hash", is_admin=True)
+    admin.activate()
+    db.session.add(admin)
+    db.session.commit()
+
+    client = app.test_client()
+    with app.test_request_context("/"):
+        login_user(db.session.get(User, admin.id), force=True)
+        session_data = dict(session)
+    with client.session_transaction() as session_ctx:
+        session_ctx.update(session_data)
+
+    response = client.get("/admin/dashboard/ingresos?granularidad=day")
+    assert response.status_code == 200
+    assert "$10.000" in response.get_data(as_text=True)
+    assert client.get("/admin/dashboard/ingresos?granularidad=year").status_code == 400
@@ -0,0 +1,217 @@
+import smtplib
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app, mailer
+from app.extensions import db
+from app.models import (
+    BillingCycle,
+    Guardian,
+    Order,
+    PaymentMethod,
+    PaymentReminder,
+    PaymentStatus,
+    Plan,
+    Subscription,
+    SubscriptionStatus,
+    User,
+)
+from app.services import reminders
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    MAIL_DEFAULT_SENDER = "test@example.com"
+    MAIL_SUPPRESS_SEND = True
+    REMINDER_RATE_PER_MINUTE = 0
+
+
+class FakeConnection:
+    def __init__(self, log, refuse=(), busy=None):
+        self.log = log
+        self.refuse = set(refuse)
+        # destinatario -> veces que el servidor responde 421 antes de aceptar
+        self.busy = busy if busy is not None else {}
+
+    def __enter__(self):
+        self.log.append("connect")
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    def close(self):
+        self.log.append("close")
+
+    def send(self, message):
+        recipient = message.recipients[0]
+        if recipient in self.refuse:
+            raise smtplib.SMTPRecipientsRefused({recipient: (550, b"no existe")})
+        if self.busy.get(recipient):
+            self.busy[recipient] -= 1
+            raise smtplib.SMTPSenderRefused(421, b"4.7.0 Try again later", "test@example.com")
+        self.log.append((recipient, message.body))
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def smtp_log(monkeypatch):
+    log = []
+    monkeypatch.setattr(mailer, "connect", lambda _app=None: FakeConnection(log))
+    return log
+
+
+def _guardian_with_paid_order(email, paid_days_ago, subscriptions=1):
+    user = User(email=email, name=email.split("@")[0].title(), password_hash="hash")
+    guardian = Guardian(user=user, phone="+56911111111")
+    plan = Plan(name=f"Plan {email}", max_children=1, max_workshops_per_child=1, price_monthly=10000)
+    db.session.add_all([user, guardian, plan])
+    for _ in range(subscriptions):
+        subscription = Subscription(
+            guardian=guardian, plan=plan, billing_cycle=BillingCycle.monthly,
+            status=SubscriptionStatus.active, start_date=date.today() - timedelta(days=90),
+        )
+        order = Order(
+            subscription=subscription, amount_clp=10000,
+            payment_method=PaymentMethod.transfer, payment_status=PaymentStatus.paid,
+        )
+        order.created_at = datetime.now(timezone.utc) - timedelta(days=paid_days_ago)
+        db.session.add_all([subscription, order])
+    db.session.commit()
+    return guardian
+
+
+def test_one_reminder_per_guardian_over_single_connection(app, smtp_log):
+    with app.app_context():
+        _guardian_with_paid_order("ana@example.com", 40, subscriptions=2)
+        _guardian_with_paid_order("beto@example.com", 35)
+        _guardian_with_paid_order("al-dia@example.com", 5)
+
+        report = reminders.send_payment_reminders()
+
+        assert report["sent"] == 2
+        assert smtp_log.count("connect") == 1
+        recipients = [entry[0] for entry in smtp_log if isinstance(entry, tuple)]
+        assert sorted(recipients) == ["ana@example.com", "beto@example.com"]
+        ana_body = next(body for recipient, body in smtp_log[1:-1] if recipient == "ana@example.com")
+        assert ana_body.count("Plan ana@example.com") == 2
+        assert "$20.000 CLP" in ana_body
+        assert db.session.scalar(db.select(db.func.count(PaymentReminder.id))) == 2
+
+
+def test_dedupe_window_skips_recent_recipients(app, smtp_log):
+    with app.app_context():
+        _guardian_with_paid_order("ana@example.com", 40)
+        reminders.send_payment_reminders()
+        smtp_log.clear()
+
+        again = reminders.send_payment_reminders()
+        later = reminders.send_payment_reminders(dedupe_days=0)
+
+    assert again["sent"] == 0
+    assert again["skipped_recent"] == ["ana@example.com"]
+    assert later["sent"] == 1
+
+
+def test_dry_run_reports_without_sending(app, smtp_log):
+    with app.app_context():
+        _guardian_with_paid_order("ana@example.com", 40, subscriptions=2)
+
+        report = reminders.send_payment_reminders(dry_run=True)
+
+        assert report["to_send"] == [{"recipient": "ana@example.com", "subscriptions": 2, "total_clp": 20000}]
+        assert report["sent"] == 0
+        assert smtp_log == []
+        assert db.session.scalar(db.select(db.func.count(PaymentReminder.id))) == 0
+
+
+def test_refused_recipient_does_not_stop_the_run(app, monkeypatch):
+    log = []
+    monkeypatch.setattr(
+        mailer, "connect", lambda _app=None: FakeConnection(log, refuse={"ana@example.com"})
+    )
+    with app.app_context():
+        _guardian_with_paid_order("ana@example.com", 40)
+        _guardian_with_paid_order("beto@example.com", 40)
+
+        report = reminders.send_payment_reminders()
+
+    assert report["sent"] == 1
+    assert [recipient for recipient, _ in report["errors"]] == ["ana@example.com"]
+
+
+def test_transient_error_reconnects_and_retries(app, monkeypatch):
+    log, busy = [], {"ana@example.com": 1}
+    monkeypatch.setattr(mailer, "connect", lambda _app=None: FakeConnection(log, busy=busy))
+    with app.app_context():
+        _guardian_with_paid_order("ana@example.com", 40)
+
+        report = reminders.send_payment_reminders()
+
+    assert report["sent"] == 1 and not report["interrupted"]
+    assert log.count("connect") == 2
+
+
+def test_persistent_transient_error_stops_with_partial_report(app, monkeypatch):
+    log, busy = [], {"ana@example.com": 5}
+    monkeypatch.setattr(mailer, "connect", lambda _app=None: FakeConnection(log, busy=busy))
+    with app.app_context():
+        _guardian_with_paid_order("ana@example.com", 40)
+
+        report = reminders.send_payment_reminders()
+        assert db.session.scalar(db.select(db.func.count(PaymentReminder.id))) == 0
+
+    assert report["interrupted"] is True
+    assert report["sent"] == 0
+    assert [recipient for recipient, _ in report["errors"]] == ["ana@example.com"]
+    assert log.count("connect") == log.count("close") == 2
+
+    result = app.test_cli_runner().invoke(args=["payment-reminders"])
+    assert result.exit_code == 1
+    assert "Enviados: 0 de 1" in result.output
+    assert "Traceback" not in result.output
+
+
+def test_throttle_spaces_sends(app, smtp_log, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(reminders.time, "sleep", sleeps.append)
+    with app.app_context():
+        for index in range(3):
+            _guardian_with_paid_order(f"f{index}@example.com", 40)
+
+        reminders.send_payment_reminders(per_minute=30)
+
+    assert len(sleeps) == 2
+    assert all(1.5 < wait <= 2.0 for wait in sleeps)
+
+
+def test_payment_reminders_command_dry_run(app, smtp_log):
+    with app.app_context():
+        _guardian_with_paid_order("ana@example.com", 40)
+
+    result = app.test_cli_runner().invoke(args=["payment-reminders", "--dry-run"])
+
+    assert result.exit_code == 0, result.output
+    assert "[dry-run] ana@example.com: 1 suscripción(es), $10.000" in result.output
+    assert smtp_log == []
@@ -0,0 +1,161 @@
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import (
+    BillingCycle,
+    Guardian,
+    Order,
+    PaymentMethod,
+    PaymentStatus,
+    Plan,
+    Subscription,
+    SubscriptionStatus,
+    User,
+)
+from app.services import orders as order_service
+from app.services import portal as portal_service
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    PORTAL_ORDERS_PER_PAGE = 5
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def family(app, client):
+    """Apoderado con una suscripción mensual activa y 12 meses de órdenes."""
+    with app.app_context():
+        plan = Plan(name="Plan Mensual", max_children=1, max_workshops_per_child=1, price_monthly=20000)
+        user = User(email="familia@example.com", name="Familia", password_hash="hash")
+        user.activate()
+        guardian = Guardian(user=user, phone="+56911111111")
+        subscription = Subscription(
+            guardian=guardian,
+            plan=plan,
+            billing_cycle=BillingCycle.monthly,
+            status=SubscriptionStatus.active,
+            start_date=date(2024, 1, 1),
+        )
+        db.session.add_all([plan, user, guardian, subscription])
+        last_paid = datetime(2024, 12, 5, 12, tzinfo=timezone.utc)
+        for month in range(12):
+            db.session.add(Order(
+                subscription=subscription,
+                amount_clp=20000,
+                payment_method=PaymentMethod.transfer,
+                payment_status=PaymentStatus.paid,
+                created_at=last_paid - timedelta(days=30 * (11 - month)),
+            ))
+        pending = Order(
+            subscription=subscription,
+            amount_clp=20000,
+            payment_method=PaymentMethod.transfer,
+            payment_status=PaymentStatus.pending,
+            created_at=last_paid + timedelta(days=31),
+        )
+        db.session.add(pending)
+        db.session.commit()
+        ids = {"user": user.id, "guardian": guardian.id, "pending": pending.id}
+
+    with client.session_transaction() as session_ctx:
+        session_ctx["_user_id"] = str(ids["user"])
+        session_ctx["_fresh"] = True
+    return ids
+
+
+def _count_queries(app):
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", _record)
+
+
+def test_summary_reports_active_plan_due_date_and_balance(app, family):
+    with app.app_context():
+        summary = portal_service.compute_summary(family["guardian"])
+    assert [item["plan_name"] for item in summary["active_subscriptions"]] == ["Plan Mensual"]
+    assert summary["next_due_date"] == date(2025, 1, 5)
+    assert summary["open_orders"] == 1
+    assert summary["open_balance_clp"] == 20000
+
+
+def test_dashboard_paginates_without_per_row_queries(app, client, family):
+    client.get("/portal/")  # calienta cachés de identidad y resumen
+
+    statements, stop = _count_queries(app)
+    try:
+        first = client.get("/portal/")
+        first_count = len(statements)
+        statements.clear()
+        last = client.get("/portal/?pagina=3")
+        last_count = len(statements)
+    finally:
+        stop()
+
+    assert first.status_code == 200
+    assert first.data.count(b"Ver detalle") == 5
+    assert b"Plan Mensual" in first.data
+    assert b"05-01-2025" in first.data
+    assert b"$20.000 CLP" in first.data
+    assert last.data.count(b"Ver detalle") == 3
+    # COUNT + SELECT paginado: el plan de cada fila no dispara consultas extra.
+    assert first_count == last_count == 2
+
+
+def test_order_writes_invalidate_cached_summary(app, client, family):
+    client.get("/portal/")
+    with app.app_context():
+        assert portal_service.get_cache().get(family["guardian"]) is not None
+
+        order = db.session.get(Order, family["pending"])
+        order_service.mark_order_paid(order)
+        db.session.commit()
+        assert portal_service.get_cache().get(family["guardian"]) is None
+
+    response = client.get("/portal/")
+    assert b"05-02-2025" in response.data
+    with app.app_context():
+        assert portal_service.guardian_summary(family["guardian"])["open_balance_clp"] == 0
+
+
+def test_bulk_confirmation_invalidates_cached_summary(app, client, family):
+    client.get("/portal/")
+    with app.app_context():
+        order_service.confirm_orders_bulk([family["pending"]])
+        db.session.commit()
+        assert portal_service.get_cache().get(family["guardian"]) is None
@@ -0,0 +1,144 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.ratelimit import Limit, SQLiteBackend
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    RATELIMIT_RULES = {"inscriptions.inscripcion": "2/minute", "auth": "3/minute"}
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_limit_parse():
+    assert Limit.parse("10/minute") == Limit(capacity=10, period=60)
+    assert Limit.parse("100/5 minutes") == Limit(capacity=100, period=300)
+    with pytest.raises(ValueError):
+        Limit.parse("10/fortnight")
+
+
+def test_endpoint_rule_rejects_with_retry_after(client):
+    statuses = [client.get("/inscripcion/999").status_code for _ in range(3)]
+    assert statuses[:2] == [404, 404]
+    assert statuses[2] == 429
+
+    response = client.get("/inscripcion/999")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_buckets_are_per_ip(client):
+    for _ in range(2):
+        client.get("/inscripcion/999", environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    blocked = client.get("/inscripcion/999", environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    other = client.get("/inscripcion/999", environ_base={"REMOTE_ADDR": "10.0.0.2"})
+    assert blocked.status_code == 429
+    assert other.status_code == 404
+
+
+def test_forwarded_ips_get_separate_buckets_behind_proxy():
+    class ProxiedConfig(TestConfig):
+        PROXY_FIX_HOPS = 1
+
+    app = create_app(ProxiedConfig)
+    client = app.test_client()
+    balancer = {"REMOTE_ADDR": "10.0.0.254"}
+
+    def get(ip):
+        return client.get("/inscripcion/999", environ_base=balancer, headers={"X-Forwarded-For": ip})
+
+    with app.app_context():
+        db.create_all()
+        statuses = [get("203.0.113.1").status_code for _ in range(3)]
+        other = get("203.0.113.2")
+        db.drop_all()
+
+    assert statuses == [404, 404, 429]
+    assert other.status_code == 404
+
+
+def test_spoofed_forwarded_for_is_ignored_without_proxy():
+    class DirectConfig(TestConfig):
+        PROXY_FIX_HOPS = 0
+
+    app = create_app(DirectConfig)
+    client = app.test_client()
+    direct = {"REMOTE_ADDR": "198.51.100.7"}
+
+    with app.app_context():
+        db.create_all()
+        statuses = [
+            client.get("/inscripcion/999", environ_base=direct,
+                       headers={"X-Forwarded-For": f"203.0.113.{i}"}).status_code
+            for i in range(3)
+        ]
+        db.drop_all()
+
+    assert statuses == [404, 404, 429]
+
+
+def test_blueprint_rule_and_user_bucket(client):
+    # Un usuario autenticado se limita también por su id, aunque cambie de IP.
+    with client.session_transaction() as session_ctx:
+        session_ctx["_user_id"] = "42"
+    statuses = [
+        client.get("/auth/logout", environ_base={"REMOTE_ADDR": f"10.0.1.{i}"}).status_code
+        for i in range(4)
+    ]
+    assert 429 not in statuses[:3]
+    assert statuses[3] == 429
+
+
+def test_unlisted_endpoints_are_not_limited(client):
+    assert all(client.get("/reglamento").status_code == 200 for _ in range(10))
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    limit = Limit(capacity=2, period=60)
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+
+    assert first.consume("k", limit)[0]
+    assert second.consume("k", limit)[0]
+    allowed, retry_after = first.consume("k", limit)
+    assert not allowed
+    assert 0 < retry_after <= 30
+
+
+def test_sqlite_storage_from_config(tmp_path):
+    class SQLiteConfig(TestConfig):
+        RATELIMIT_STORAGE = f"sqlite:///{tmp_path / 'rl.db'}"
+
+    app = create_app(SQLiteConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    statuses = [client.get("/inscripcion/999").status_code for _ in range(3)]
+    assert statuses[-1] == 429
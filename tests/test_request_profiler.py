@@ -0,0 +1,118 @@
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+from app.observability import profiling
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig:
+        TESTING = True
+        SECRET_KEY = "test-secret"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        PROFILER_ENABLED = True
+        PROFILER_THRESHOLD_MS = 40
+        PROFILER_SAMPLE_INTERVAL_MS = 1
+        PROFILER_DIR = str(tmp_path / "profiles")
+        PROFILER_MAX_FILES = 3
+
+    app = create_app(TestConfig)
+
+    @app.route("/_test/lenta")
+    def _slow():
+        time.sleep(0.1)
+        return "ok"
+
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_slow_requests_are_sampled(app, client):
+    client.get("/_test/lenta")
+    client.get("/metrics")
+
+    profiles = profiling.list_profiles(app)
+    assert [profile["path"] for profile in profiles] == ["/_test/lenta"]
+    profile = profiles[0]
+    assert profile["mode"] == "sampling"
+    assert profile["duration_ms"] >= 100
+    assert profile["samples"] > 0
+    assert any("_slow" in row["function"] for row in profile["top"])
+
+
+def test_signed_header_runs_cprofile(app, client):
+    token = profiling.make_token(app, user_id=1)
+    client.get("/reglamento", headers={"X-Profile": token})
+
+    profile = profiling.list_profiles(app)[0]
+    assert profile["mode"] == "cprofile"
+    assert profile["endpoint"] == "inscriptions.reglamento"
+    assert (profiling.profile_dir(app) / profile["raw"]).exists()
+    assert any("render_template" in row["function"] for row in profile["top"])
+
+
+def test_invalid_header_is_ignored(app, client):
+    client.get("/reglamento", headers={"X-Profile": "not-a-token"})
+    assert profiling.list_profiles(app) == []
+
+
+def test_profiles_are_rotated(app, client):
+    token = profiling.make_token(app, user_id=1)
+    for _ in range(5):
+        client.get("/reglamento", headers={"X-Profile": token})
+    assert len(list(profiling.profile_dir(app).glob("*.json"))) == 3
+    assert len(list(profiling.profile_dir(app).glob("*.prof"))) == 3
+
+
+def test_admin_page_lists_slowest_profiles(app, client):
+    with app.app_context():
+        admin = User(email="admin@example.com", name="Admin", password_hash="", is_admin=True)
+        admin.activate()
+        admin.email_confirmed_at = datetime.now(timezone.utc)
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+
+    client.get("/_test/lenta")
+    with client.session_transaction() as session_ctx:
+        session_ctx["_user_id"] = str(admin_id)
+        session_ctx["_fresh"] = True
+
+    response = client.get("/admin/dashboard/perfiles")
+    assert response.status_code == 200
+    assert b"/_test/lenta" in response.data
+    assert b"_slow" in response.data
+
+
+def test_profiler_token_command(app):
+    with app.app_context():
+        admin = User(email="admin@example.com", name="Admin", password_hash="", is_admin=True)
+        db.session.add(admin)
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["profiler-token", "Admin@Example.com"])
+    assert result.exit_code == 0
+    token = result.output.split(": ", 1)[1].strip()
+    assert profiling._header_token_valid(app, token)
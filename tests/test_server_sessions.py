@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from flask import session
+from sqlalchemy import func, select
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db, oauth
+from app.models import ServerSession
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    SESSION_COOKIE_DOMAIN = None
+
+
+@pytest.fixture(params=["sqlite", "sqlalchemy"])
+def app(request, tmp_path):
+    class SessionConfig(TestConfig):
+        SESSION_BACKEND = request.param
+        SESSION_SQLITE_PATH = str(tmp_path / "sessions.db")
+        # Con ":memory:" cada conexión vería otra base: se usa un archivo.
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+
+    app = create_app(SessionConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def saves(app, monkeypatch):
+    store = app.session_interface.store
+    calls = []
+    original = store.save
+
+    def _save(sid, data, expires_at):
+        calls.append(sid)
+        return original(sid, data, expires_at)
+
+    monkeypatch.setattr(store, "save", _save)
+    return calls
+
+
+def _session_cookie(client):
+    return client.get_cookie("session")
+
+
+def test_anonymous_requests_store_nothing(app, client, saves):
+    assert client.get("/reglamento").status_code == 200
+    assert _session_cookie(client) is None
+    assert saves == []
+
+
+def test_cookie_holds_only_signed_id(app, client):
+    with client.session_transaction() as session_ctx:
+        session_ctx["webpay_inscription"] = {"order_id": 1, "children": ["Niña"] * 50}
+    cookie = _session_cookie(client)
+    assert cookie is not None
+    assert len(cookie.value) < 80
+
+    sid = cookie.value.rsplit(".", 1)[0]
+    with app.app_context():
+        stored = app.session_interface.store.load(sid)
+    assert stored is not None
+    assert "webpay_inscription" in stored[0]
+
+
+def test_unmodified_session_is_not_rewritten(app, client, saves):
+    with client.session_transaction() as session_ctx:
+        session_ctx["google_oauth_next"] = "/portal/"
+    # La primera solicitud deja la marca "_fresh" de Flask-Login; desde ahí no hay cambios.
+    client.get("/reglamento")
+    saves.clear()
+
+    for _ in range(3):
+        assert client.get("/reglamento").status_code == 200
+    assert saves == []
+
+    with client.session_transaction() as session_ctx:
+        assert session_ctx["google_oauth_next"] == "/portal/"
+
+
+def test_emptied_session_is_deleted(app, client):
+    with client.session_transaction() as session_ctx:
+        session_ctx["google_oauth_next"] = "/portal/"
+    sid = _session_cookie(client).value.rsplit(".", 1)[0]
+
+    with client.session_transaction() as session_ctx:
+        session_ctx.clear()
+    assert _session_cookie(client) is None
+    with app.app_context():
+        assert app.session_interface.store.load(sid) is None
+
+
+def test_tampered_cookie_starts_a_new_session(app, client):
+    client.set_cookie("session", "forged-session-id.signature")
+    with client.session_transaction() as session_ctx:
+        assert dict(session_ctx) == {}
+
+
+def test_login_regenerates_session_id(app, client, monkeypatch):
+    class FakeGoogle:
+        def authorize_access_token(self):
+            return {"userinfo": {"email": "apoderado@example.com", "sub": "sub-1"}}
+
+    app.config.update(GOOGLE_CLIENT_ID="id", GOOGLE_CLIENT_SECRET="secret")
+    monkeypatch.setattr(oauth, "create_client", lambda name: FakeGoogle())
+
+    with client.session_transaction() as session_ctx:
+        session_ctx["google_oauth_next"] = "/portal/"
+    before = _session_cookie(client).value.rsplit(".", 1)[0]
+
+    assert client.get("/auth/google/callback").status_code == 302
+    after = _session_cookie(client).value.rsplit(".", 1)[0]
+    assert after != before
+    with app.app_context():
+        store = app.session_interface.store
+        assert store.load(before) is None
+        assert '"_user_id"' in store.load(after)[0]
+
+
+def test_sweep_command_removes_expired_sessions(app):
+    store = app.session_interface.store
+    now = datetime.now(timezone.utc)
+    with app.app_context():
+        store.save("expired", "{}", now - timedelta(minutes=1))
+        store.save("alive", "{}", now + timedelta(days=1))
+
+    result = app.test_cli_runner().invoke(args=["sessions-sweep"])
+    assert "Sesiones eliminadas: 1" in result.output
+    with app.app_context():
+        assert store.load("alive") is not None
+        if app.config["SESSION_BACKEND"] == "sqlalchemy":
+            assert db.session.scalar(select(func.count()).select_from(ServerSession)) == 1
+
+
+@pytest.fixture
+def sqlite_app(tmp_path):
+    class SessionConfig(TestConfig):
+        SESSION_BACKEND = "sqlite"
+        SESSION_SQLITE_PATH = str(tmp_path / "sessions.db")
+
+    return create_app(SessionConfig)
+
+
+def test_sqlite_store_reconnects_after_fork(sqlite_app):
+    store = sqlite_app.session_interface.store
+    # create_app no deja una conexión abierta que los workers puedan heredar
+    assert getattr(store._local, "conn", None) is None
+
+    conn = store._conn
+    assert store._conn is conn
+    store._local.pid = -1  # como si el proceso fuera un worker recién creado
+    assert store._conn is not conn
+
+
+class LockedConnection:
+    def execute(self, *_args):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_locked_sqlite_store_fails_open(sqlite_app, monkeypatch):
+    store = sqlite_app.session_interface.store
+    monkeypatch.setattr(store._local, "conn", LockedConnection(), raising=False)
+    monkeypatch.setattr(store._local, "pid", os.getpid(), raising=False)
+
+    with sqlite_app.app_context():
+        assert store.load("sid") is None
+        store.save("sid", "{}", datetime.now(timezone.utc))
+        assert store.sweep() == 0
+
+    @sqlite_app.get("/sesion")
+    def _touch_session():
+        session["k"] = "v"
+        return "ok"
+
+    client = sqlite_app.test_client()
+    client.set_cookie("session", sqlite_app.session_interface._signer(sqlite_app).sign("sid").decode())
+    assert client.get("/sesion").status_code == 200
@@ -0,0 +1,108 @@
+import json
+import sqlite3
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import (
+    BillingCycle,
+    Child,
+    Guardian,
+    PaymentMethod,
+    Plan,
+    Subscription,
+    User,
+)
+from app.services import orders as order_service
+from app.services.snapshot import Pseudonymizer
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig:
+        TESTING = True
+        SECRET_KEY = "test-secret"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'source.db'}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        SNAPSHOT_PSEUDONYM_KEY = "snapshot-key"
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        plan = Plan(name="Plan Mensual", max_children=2, max_workshops_per_child=1, price_monthly=20000)
+        for i in range(7):
+            user = User(email=f"Familia{i}@Example.com", name=f"Familia {i}", password_hash="scrypt:hash")
+            guardian = Guardian(user=user, phone=f"+5691234567{i}")
+            child = Child(guardian=guardian, name=f"Hijo {i}", health_info="Asma" if i % 2 else None)
+            subscription = Subscription(
+                guardian=guardian, plan=plan, billing_cycle=BillingCycle.monthly, start_date=date(2024, 3, 1)
+            )
+            db.session.add_all([user, guardian, child, subscription])
+            db.session.flush()
+            order_service.create_order(subscription, 20000, PaymentMethod.transfer)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def _load(app, output, *extra):
+    result = app.test_cli_runner().invoke(
+        args=["snapshot-load", app.config["SQLALCHEMY_DATABASE_URI"], "--output", str(output), "--chunk-size", "3", *extra]
+    )
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def test_snapshot_preserves_cardinalities_and_foreign_keys(app, tmp_path):
+    output = tmp_path / "snapshot.db"
+    result = _load(app, output)
+    assert "users: 7" in result.output
+    assert "server_sessions" not in result.output
+
+    conn = sqlite3.connect(output)
+    for table in ("users", "guardians", "children", "subscriptions", "orders", "plans"):
+        source = sqlite3.connect(tmp_path / "source.db").execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+        assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone() == source
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    joined = conn.execute(
+        "SELECT COUNT(*) FROM orders o JOIN subscriptions s ON s.id = o.subscription_id"
+        " JOIN guardians g ON g.id = s.guardian_id JOIN users u ON u.id = g.user_id"
+    ).fetchone()
+    assert joined == (7,)
+
+
+def test_personal_data_is_pseudonymized_deterministically(app, tmp_path):
+    first, second = tmp_path / "a.db", tmp_path / "b.db"
+    _load(app, first)
+    _load(app, second)
+
+    rows = sqlite3.connect(first).execute("SELECT email, name, password_hash FROM users ORDER BY id").fetchall()
+    assert rows == sqlite3.connect(second).execute("SELECT email, name, password_hash FROM users ORDER BY id").fetchall()
+    assert all(email.endswith("@example.invalid") and "familia" not in email for email, _, _ in rows)
+    assert all(not name.startswith("Familia") for _, name, _ in rows)
+    assert len({email for email, _, _ in rows}) == 7
+    assert all(password.startswith("!") for _, _, password in rows)
+
+    conn = sqlite3.connect(first)
+    phones = [phone for (phone,) in conn.execute("SELECT phone FROM guardians")]
+    assert all(phone.startswith("+569") and len(phone) == 12 and "1234567" not in phone for phone in phones)
+    health = {value for (value,) in conn.execute("SELECT health_info FROM children")}
+    assert health == {None, "[redactado]"}
+
+    # El snapshot JSON de la orden usa los mismos seudónimos que la tabla users.
+    pseudonymizer = Pseudonymizer("snapshot-key")
+    detail = json.loads(conn.execute("SELECT detail FROM orders ORDER BY id LIMIT 1").fetchone()[0])
+    assert detail["guardian"]["email"] == pseudonymizer.email("familia0@example.com")
+    assert detail["guardian"]["email"] == rows[0][0]
+    assert detail["children"] == [pseudonymizer.name("Hijo 0")]
@@ -0,0 +1,109 @@
+import json
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import Plan
+from app.observability import QueryBudgetExceeded
+from app.observability.sql import statement_shape
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    SQL_INSTRUMENTATION = True
+    SQL_NPLUSONE_THRESHOLD = 3
+
+
+def _make_app(config):
+    app = create_app(config)
+
+    # Endpoint de prueba con un N+1 deliberado: una consulta por plan.
+    @app.route("/_test/planes")
+    def _test_plans():
+        ids = db.session.scalars(db.select(Plan.id)).all()
+        names = [db.session.scalar(db.select(Plan.name).where(Plan.id == plan_id)) for plan_id in ids]
+        return ", ".join(names)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            Plan(name=f"Plan {i}", max_children=1, max_workshops_per_child=1, price_monthly=1000)
+            for i in range(4)
+        )
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def app():
+    app = _make_app(TestConfig)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_statement_shape_collapses_literals_and_in_lists():
+    first = statement_shape("SELECT * FROM orders WHERE id IN (?, ?, ?) AND status = 'paid'")
+    second = statement_shape("SELECT *  FROM orders\nWHERE id IN (?) AND status = 'failed'")
+    assert first == second == "SELECT * FROM orders WHERE id IN (?) AND status = ?"
+    assert statement_shape("SELECT 1 LIMIT 20 OFFSET 40") == "SELECT ? LIMIT ? OFFSET ?"
+
+
+def test_server_timing_header_and_log_line(client, caplog):
+    with caplog.at_level(logging.INFO):
+        response = client.get("/reglamento")
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    records = [json.loads(r.message) for r in caplog.records if r.message.startswith('{"event": "sql"')]
+    assert records[-1]["endpoint"] == "inscriptions.reglamento"
+    assert records[-1]["queries"] == 0
+
+
+def test_repeated_statements_are_reported(client, caplog):
+    with caplog.at_level(logging.INFO):
+        response = client.get("/_test/planes")
+    assert 'desc="5 queries"' in response.headers["Server-Timing"]
+    record = json.loads(next(r.message for r in caplog.records if '"repeated"' in r.message))
+    assert record["repeated"][0]["count"] == 4
+    assert "WHERE plans.id = ?" in record["repeated"][0]["shape"]
+
+
+def test_strict_mode_fails_on_n_plus_one_and_budget():
+    class StrictConfig(TestConfig):
+        SQL_STRICT = True
+        SQL_NPLUSONE_THRESHOLD = 10
+        SQL_QUERY_BUDGETS = {"_test_plans": 2}
+
+    app = _make_app(StrictConfig)
+    client = app.test_client()
+    with pytest.raises(QueryBudgetExceeded, match="5 consultas"):
+        client.get("/_test/planes")
+    assert client.get("/reglamento").status_code == 200
+
+
+def test_disabled_by_default():
+    class PlainConfig(TestConfig):
+        SQL_INSTRUMENTATION = False
+
+    app = create_app(PlainConfig)
+    with app.app_context():
+        db.create_all()
+    assert "Server-Timing" not in app.test_client().get("/reglamento").headers
@@ -0,0 +1,103 @@
+import json
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+from flask import render_template_string
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import Plan
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    SQL_INSTRUMENTATION = True
+    TEMPLATE_SQL_WARN_THRESHOLD = 3
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+
+    # Plantilla con carga perezosa por fila: plan.subscriptions se consulta durante el render.
+    @app.route("/_test/planes")
+    def _test_plans():
+        plans = db.session.scalars(db.select(Plan)).all()
+        return render_template_string(
+            "{% for plan in plans %}{{ plan.name }}={{ plan.subscriptions|length }};{% endfor %}",
+            plans=plans,
+        )
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            Plan(name=f"Plan {i}", max_children=1, max_workshops_per_child=1, price_monthly=1000)
+            for i in range(3)
+        )
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_template_render_time_is_exposed_in_metrics(client):
+    client.get("/reglamento")
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'template_render_duration_seconds_count{template="reglamento.html"} 1' in text
+    assert 'template_render_queries_total{template="reglamento.html"}' not in text
+
+
+def test_lazy_loads_during_render_are_counted_and_logged(client, caplog):
+    with caplog.at_level(logging.WARNING):
+        assert client.get("/_test/planes").status_code == 200
+
+    record = json.loads(next(r.message for r in caplog.records if '"template_sql"' in r.message))
+    assert record["template"] == "<string>"
+    assert record["queries"] == 3
+    assert record["shapes"][0]["count"] == 3
+    assert "subscriptions" in record["shapes"][0]["shape"]
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'template_render_queries_total{template="<string>"} 3' in text
+
+
+def test_render_sql_is_not_collected_unless_instrumentation_is_on(caplog):
+    class PlainConfig(TestConfig):
+        SQL_INSTRUMENTATION = False
+
+    app = create_app(PlainConfig)
+    with app.app_context():
+        db.create_all()
+    with caplog.at_level(logging.WARNING):
+        assert app.test_client().get("/reglamento").status_code == 200
+
+    assert "sql_stats" not in app.extensions
+    assert not any('"template_sql"' in r.message for r in caplog.records)
+    text = app.test_client().get("/metrics").get_data(as_text=True)
+    assert 'template_render_duration_seconds_count{template="reglamento.html"} 1' in text
+
+
+def test_template_timing_can_be_disabled():
+    class NoTimingConfig(TestConfig):
+        TEMPLATE_TIMING = False
+
+    app = create_app(NoTimingConfig)
+    client = app.test_client()
+    client.get("/reglamento")
+    assert "template_render_duration_seconds" not in client.get("/metrics").get_data(as_text=True)
@@ -0,0 +1,116 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import create_app
+from app.extensions import db
+from app.models import (
+    BillingCycle,
+    Guardian,
+    Order,
+    PaymentMethod,
+    PaymentStatus,
+    Plan,
+    Subscription,
+    SubscriptionStatus,
+    User,
+)
+from app.services import reconciliation
+from app.services import webpay as webpay_service
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    MAIL_SUPPRESS_SEND = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def stale_orders(app):
+    with app.app_context():
+        plan = Plan(name="Plan", max_children=1, max_workshops_per_child=1, price_monthly=10000)
+        user = User(email="guardian@example.com", name="Guardian", password_hash="hash")
+        guardian = Guardian(user=user, phone="123456789")
+        subscription = Subscription(guardian=guardian, plan=plan, billing_cycle=BillingCycle.monthly)
+        db.session.add_all([plan, user, guardian, subscription])
+
+        old = datetime.now(timezone.utc) - timedelta(hours=2)
+        ids = {}
+        for token in ["tok-paid", "tok-failed", "tok-open", "tok-error", "tok-recent"]:
+            order = Order(
+                subscription=subscription,
+                amount_clp=10000,
+                payment_method=PaymentMethod.webpay,
+                payment_status=PaymentStatus.pending,
+                external_id=token,
+            )
+            db.session.add(order)
+            db.session.flush()
+            if token != "tok-recent":
+                order.updated_at = old
+            ids[token] = order.id
+        db.session.commit()
+        return ids
+
+
+def _fake_status(token):
+    if token == "tok-paid":
+        return {"status": "AUTHORIZED", "response_code": 0}
+    if token == "tok-failed":
+        return {"status": "FAILED", "response_code": -1}
+    if token == "tok-error":
+        raise RuntimeError("timeout")
+    return {"status": "INITIALIZED"}
+
+
+def test_reconcile_applies_remote_status_in_batches(app, stale_orders, monkeypatch):
+    monkeypatch.setattr(webpay_service, "status_token", _fake_status)
+
+    with app.app_context():
+        report = reconciliation.reconcile_stale_webpay_orders(
+            timedelta(minutes=30), max_workers=4, batch_size=1
+        )
+
+        assert report["checked"] == 4
+        assert report["paid"] == [stale_orders["tok-paid"]]
+        assert report["failed"] == [stale_orders["tok-failed"]]
+        assert report["unchanged"] == [stale_orders["tok-open"]]
+        assert [order_id for order_id, _ in report["errors"]] == [stale_orders["tok-error"]]
+
+        paid = db.session.get(Order, stale_orders["tok-paid"])
+        assert paid.payment_status == PaymentStatus.paid
+        assert paid.subscription.status == SubscriptionStatus.active
+        assert db.session.get(Order, stale_orders["tok-failed"]).payment_status == PaymentStatus.failed
+        assert db.session.get(Order, stale_orders["tok-recent"]).payment_status == PaymentStatus.pending
+
+
+def test_reconcile_dry_run_does_not_modify_orders(app, stale_orders, monkeypatch):
+    monkeypatch.setattr(webpay_service, "status_token", _fake_status)
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["webpay-reconcile", "--dry-run", "--older-than", "30"])
+    assert result.exit_code == 0
+    assert "[dry-run] Pagadas: 1" in result.output
+
+    with app.app_context():
+        assert db.session.get(Order, stale_orders["tok-paid"]).payment_status == PaymentStatus.pending
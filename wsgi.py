@@ -1,3 +1,20 @@
+import os
+
 from app import create_app
+from app.extensions import db
+from app.services.diagnostics import warm_pool
+
+app = create_app()
+
+
+def _warm_worker_pool():
+    # Con --preload el worker hereda del maestro los sockets del pool: se descartan sin
+    # cerrarlos (siguen siendo del maestro) y el worker abre y precalienta los suyos.
+    with app.app_context():
+        db.engine.dispose(close=False)
+    warm_pool(app)
+
 
-app = create_app()
\ No newline at end of file
+# Sin --preload gunicorn importa este módulo ya dentro de cada worker y no vuelve a hacer fork.
+os.register_at_fork(after_in_child=_warm_worker_pool)
+warm_pool(app)